@@ -4,61 +4,61 @@ from flask import Flask, jsonify, request
 from flask_cors import CORS
 import sys
 import os
+from itertools import chain
 
 # Import the chatbot
 # from chatbot import PopcornHubChatbot
-from chatbot import PopcornHubChatbot
+from chatbot import CONFIDENCE_THRESHOLD, get_batcher, get_chatbot
+from catalog import AUTOCOMPLETE, CATALOG, FACETS, RATINGS, RELATED, SCORES, SEARCH, TRIGRAMS
+from catalog.facets import parse_filters
+from catalog.related import related_movies
+from recommend import EMBEDDINGS, TOPLISTS, ItemSimilarity
 
 app = Flask(__name__)
-CORS(app)
-
-# Mock movie data - in production, this would come from a database
-MOVIES = [
-    {
-        "id": 1,
-        "title": "Inception",
-        "description": "A thief who steals corporate secrets through the use of dream-sharing technology is given the inverse task of planting an idea into the mind of a CEO.",
-        "genre": ["Sci-Fi", "Action", "Thriller"],
-        "rating": 8.8,
-        "releaseYear": 2010,
-        "duration": "148 min",
-        "director": "Christopher Nolan",
-        "cast": [
-            {"name": "Leonardo DiCaprio", "role": "Dom Cobb"},
-            {"name": "Marion Cotillard", "role": "Mal Cobb"},
-            {"name": "Tom Hardy", "role": "Eames"}
-        ],
-        "poster": "https://via.placeholder.com/600x900/1a1a1a/ffffff?text=Inception+Poster",
-        "trailerUrl": "https://www.youtube.com/embed/YoHD9XEInc0",
-        "relatedMovies": [
-            {"id": 2, "title": "Interstellar", "poster": "https://via.placeholder.com/300x450/1a1a1a/ffffff?text=Interstellar", "rating": 8.6},
-            {"id": 3, "title": "The Dark Knight", "poster": "https://via.placeholder.com/300x450/1a1a1a/ffffff?text=Dark+Knight", "rating": 9.0}
-        ]
-    },
-    {
-        "id": 2,
-        "title": "The Shawshank Redemption",
-        "description": "Two imprisoned men bond over a number of years, finding solace and eventual redemption through acts of common decency.",
-        "genre": ["Drama"],
-        "rating": 9.3,
-        "releaseYear": 1994,
-        "duration": "142 min",
-        "director": "Frank Darabont",
-        "cast": [
-            {"name": "Tim Robbins", "role": "Andy Dufresne"},
-            {"name": "Morgan Freeman", "role": "Ellis Redding"}
-        ],
-        "poster": "https://via.placeholder.com/600x900/1a1a1a/ffffff?text=Shawshank",
-        "trailerUrl": "https://www.youtube.com/embed/6hB3S9bIaco",
-        "relatedMovies": [
-            {"id": 1, "title": "Inception", "poster": "https://via.placeholder.com/300x450/1a1a1a/ffffff?text=Inception", "rating": 8.8}
-        ]
-    }
-]
+# Let browsers read the pagination cursor of GET /api/movies
+CORS(app, expose_headers=['X-Next-Cursor'])
+
+# Movie data is served from the shared, indexed catalog store
+MOVIES = CATALOG
 
 # Mock watchlist - in production, this would be in a database
 WATCHLISTS = {}
 
+# Most messages accepted by one POST /api/ai-chat/batch
+MAX_CHAT_BATCH = 1000
+
+# Item-item similarities learned from WATCHLISTS, for recommendations
+SIMILAR = ItemSimilarity(WATCHLISTS)
+
+def _limit_arg(default=None):
+    """Read the positive integer `limit` query parameter (`default` when
+    absent). Raises ValueError otherwise."""
+    limit = request.args.get('limit')
+    if not limit:
+        return default
+    if not limit.isdigit() or int(limit) < 1:
+        raise ValueError("Query parameter 'limit' must be a positive integer")
+    return int(limit)
+
+def _offset_arg():
+    """Read the non-negative integer `offset` query parameter (0 when
+    absent). Raises ValueError otherwise."""
+    offset = request.args.get('offset')
+    if not offset:
+        return 0
+    if not offset.isdigit():
+        raise ValueError("Query parameter 'offset' must be a non-negative integer")
+    return int(offset)
+
+def _best_for(watchlist, limit=None, weighted=False):
+    """Yield the ids of the best titles for a watchlist, best first: the
+    best scoring for its genres, or the best rated (a slice of RATINGS)
+    when it is empty. Nothing is ranked until the first id is asked for."""
+    if watchlist:
+        yield from SCORES.top(limit, weighted=weighted, taste=watchlist)
+    else:
+        yield from RATINGS.top(limit, weighted=weighted)
+
 # API Routes
 @app.route('/api/health', methods=['GET'])
 def health():
@@ -68,87 +68,150 @@ def health():
 def get_movies():
     q = request.args.get('q', '').lower()
     genre = request.args.get('genre', '').lower()
-    limit = request.args.get('limit')
-    offset = request.args.get('offset')
-
-    filtered_movies = MOVIES
-
-    if q:
-        filtered_movies = [m for m in filtered_movies if q in m['title'].lower() or q in m['description'].lower()]
-
-    if genre:
-        filtered_movies = [m for m in filtered_movies if any(g.lower() == genre for g in m['genre'])]
-
-    if offset:
-        filtered_movies = filtered_movies[int(offset):]
-
-    if limit:
-        filtered_movies = filtered_movies[:int(limit)]
-
-    return jsonify(filtered_movies)
+    cursor = request.args.get('cursor')
+
+    ids = TRIGRAMS.match_ids(q) if q else None
+    try:
+        filters = parse_filters(request.args)
+        selection = FACETS.select(ids, limit=_limit_arg(), offset=_offset_arg(),
+                                  cursor=cursor, genre=genre, **filters)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    response = jsonify(MOVIES.get_many(selection.ids))
+    if selection.next_cursor:
+        response.headers['X-Next-Cursor'] = selection.next_cursor
+    return response
+
+@app.route('/api/movies/browse', methods=['GET'])
+def browse_movies():
+    q = request.args.get('q', '').lower()
+    genre = request.args.get('genre', '').lower()
+    cursor = request.args.get('cursor')
+
+    within = TRIGRAMS.match_ids(q) if q else None
+    try:
+        filters = parse_filters(request.args)
+        selection = FACETS.select(within, facets=True, limit=_limit_arg(), offset=_offset_arg(),
+                                  cursor=cursor, genre=genre, **filters)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify({
+        "movies": MOVIES.get_many(selection.ids),
+        "total": selection.total,
+        "facets": selection.facets,
+        "next_cursor": selection.next_cursor
+    })
 
 @app.route('/api/movies/<int:movie_id>', methods=['GET'])
 def get_movie(movie_id):
-    movie = next((m for m in MOVIES if m['id'] == movie_id), None)
+    movie = MOVIES.get(movie_id)
     if movie:
-        return jsonify(movie)
+        return jsonify(dict(movie, relatedMovies=related_movies(MOVIES, movie, RELATED)))
     return jsonify({"error": "Movie not found"}), 404
 
 @app.route('/api/movies/recommendations', methods=['GET'])
 def get_recommendations():
-    limit = request.args.get('limit')
-    recommendations = sorted(MOVIES, key=lambda x: x['rating'], reverse=True)
-    if limit:
-        recommendations = recommendations[:int(limit)]
+    try:
+        limit = _limit_arg()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    weighted = request.args.get('weighted', '').lower() == 'true'
+    user_id = request.headers.get('X-User-ID', 'anonymous')
+    watchlist = WATCHLISTS.get(user_id, [])
+
+    # Titles kept alongside the user's watchlist by others, then titles near
+    # it in embedding space, topped up with the best scoring ones for the
+    # user's genres (see catalog/scoring.py), or the best rated without a
+    # watchlist; read from the offline lists when the user has one, computed
+    # live otherwise, and the top-up ranked only if a list runs short
+    top_rated = _best_for(watchlist, limit, weighted)
+    ids = TOPLISTS.recommend(user_id, watchlist, limit, fallback=top_rated) if TOPLISTS is not None else None
+    if ids is None:
+        if EMBEDDINGS is not None and watchlist:
+            top_rated = chain(EMBEDDINGS.similar(watchlist, limit or 10), top_rated)
+        ids = SIMILAR.recommend(watchlist, limit, fallback=top_rated)
+    recommendations = MOVIES.get_many(ids)
     return jsonify(recommendations)
 
 @app.route('/api/movies/search', methods=['GET'])
 def search_movies():
     q = request.args.get('q', '')
-    limit = request.args.get('limit')
 
     if not q:
         return jsonify({"error": "Query parameter 'q' is required"}), 400
+    try:
+        limit = _limit_arg()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
-    results = []
-    for movie in MOVIES:
-        if q.lower() in movie['title'].lower() or q.lower() in movie['description'].lower():
-            results.append({
-                "id": movie['id'],
-                "title": movie['title'],
-                "poster": movie['poster'],
-                "rating": movie['rating'],
-                "year": movie['releaseYear']
-            })
+    ranked = SEARCH.search(q, limit)
 
-    if limit:
-        results = results[:int(limit)]
+    results = []
+    for movie in MOVIES.get_many(movie_id for movie_id, _ in ranked):
+        results.append({
+            "id": movie['id'],
+            "title": movie['title'],
+            "poster": movie['poster'],
+            "rating": movie['rating'],
+            "year": movie['releaseYear']
+        })
 
     return jsonify(results)
 
+@app.route('/api/movies/autocomplete', methods=['GET'])
+def autocomplete_movies():
+    prefix = request.args.get('prefix', '')
+
+    if not prefix:
+        return jsonify({"error": "Query parameter 'prefix' is required"}), 400
+    try:
+        limit = _limit_arg()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    completions = AUTOCOMPLETE.complete(prefix, limit)
+    return jsonify([
+        {"id": movie_id, "title": title, "year": year}
+        for movie_id, title, year in completions
+    ])
+
+@app.route('/api/genres', methods=['GET'])
+def get_genres():
+    return jsonify([{"name": name, "count": count} for name, count in RATINGS.genres()])
+
+@app.route('/api/genres/<genre>/top', methods=['GET'])
+def get_genre_top(genre):
+    try:
+        limit = _limit_arg(10)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    weighted = request.args.get('weighted', '').lower() == 'true'
+    top = RATINGS.top(limit, weighted=weighted, genre=genre)
+    if not top:
+        return jsonify({"error": "Genre not found"}), 404
+    return jsonify(MOVIES.get_many(top))
+
 @app.route('/api/ai-chat', methods=['POST'])
 def ai_chat():
     data = request.get_json()
     if not data or 'message' not in data:
         return jsonify({"error": "Message is required"}), 400
+    if not isinstance(data['message'], str):
+        return jsonify({"error": "message must be a string"}), 400
 
     user_message = data['message']
 
-    # Initialize chatbot
-    bot = PopcornHubChatbot()
+    # The shared chatbot, loaded once per process
+    bot = get_chatbot()
 
     # Get user ID from request (default if not provided)
     user_id = request.headers.get('X-User-ID', 'default_user')
 
-    # Predict intent and extract entities
-    intent, confidence = bot.predict_intent(user_message)
-    entities = bot.extract_entities(user_message)
-
-    if confidence < 0.6:
-        intent = 'fallback'
-
-    # Get response from chatbot
-    bot_response = bot.get_response(intent, entities, user_message)
+    # Intent, entities and reply, answered together with any concurrent
+    # messages by the micro-batcher
+    intent, entities, bot_response = get_batcher().respond(user_message)
 
     # Update memory
     bot.update_memory(user_id, intent, entities)
@@ -156,10 +219,10 @@ def ai_chat():
     # Create suggestions based on intent
     suggestions = []
     if intent == 'suggest_movie' and 'genre' in entities:
-        # Filter movies by genre
-        genre_movies = [m for m in MOVIES if any(g.lower() == entities['genre'] for g in m['genre'])]
+        # Best rated movies of the genre, read off its leaderboard
+        genre_movies = MOVIES.get_many(RATINGS.top(3, genre=entities['genre']))
         if genre_movies:
-            for movie in genre_movies[:3]:  # Limit to 3 suggestions
+            for movie in genre_movies:
                 suggestions.append({
                     "id": movie['id'],
                     "title": movie['title'],
@@ -168,8 +231,11 @@ def ai_chat():
                     "rating": movie['rating']
                 })
     elif intent in ['suggest_movie', 'greeting']:
-        # General recommendations
-        top_movies = sorted(MOVIES, key=lambda x: x['rating'], reverse=True)[:3]
+        # General recommendations: titles like the ones on the user's
+        # watchlist when there are any, otherwise the best scoring
+        watchlist = WATCHLISTS.get(user_id, [])
+        similar = EMBEDDINGS.similar(watchlist, 3) if EMBEDDINGS is not None and watchlist else []
+        top_movies = MOVIES.get_many(similar or _best_for(watchlist, 3))
         for movie in top_movies:
             suggestions.append({
                 "id": movie['id'],
@@ -186,6 +252,25 @@ def ai_chat():
 
     return jsonify(response)
 
+@app.route('/api/ai-chat/batch', methods=['POST'])
+def ai_chat_batch():
+    data = request.get_json()
+    messages = data.get('messages') if isinstance(data, dict) else None
+    if not isinstance(messages, list) or not messages or not all(isinstance(m, str) for m in messages):
+        return jsonify({"error": "messages must be a non-empty list of strings"}), 400
+    if len(messages) > MAX_CHAT_BATCH:
+        return jsonify({"error": f"At most {MAX_CHAT_BATCH} messages per batch"}), 400
+
+    # Classify every message with one model call; no replies or memory
+    bot = get_chatbot()
+    results = []
+    for (intent, confidence), entities in zip(bot.predict_intent_batch(messages),
+                                              bot.extract_entities_batch(messages)):
+        if confidence < CONFIDENCE_THRESHOLD:
+            intent = 'fallback'
+        results.append({"intent": intent, "confidence": confidence, "entities": entities})
+    return jsonify(results)
+
 @app.route('/api/watchlist', methods=['GET'])
 def get_watchlist():
     user_id = request.headers.get('X-User-ID', 'anonymous')
@@ -205,6 +290,7 @@ def add_to_watchlist():
     movie_id = data['movie_id']
     if movie_id not in WATCHLISTS[user_id]:
         WATCHLISTS[user_id].append(movie_id)
+        SIMILAR.added(user_id, movie_id)
 
     return jsonify({"message": "Movie added to watchlist"})
 
@@ -219,6 +305,7 @@ def remove_from_watchlist():
 
     if user_id in WATCHLISTS and movie_id in WATCHLISTS[user_id]:
         WATCHLISTS[user_id].remove(movie_id)
+        SIMILAR.removed(user_id, movie_id)
         return jsonify({"message": "Movie removed from watchlist"})
 
     return jsonify({"error": "Movie not in watchlist"}), 404
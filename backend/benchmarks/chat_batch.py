@@ -0,0 +1,56 @@
+"""
+Batch chat benchmark: predict_intent_batch / extract_entities_batch against
+a loop of single calls.
+
+Classifies the same messages both ways with the shared chatbot, checks that
+they agree, and reports messages per second for each batch size.
+
+Usage (from backend/):
+    python -m benchmarks.chat_batch
+    python -m benchmarks.chat_batch --sizes 10 100 1000 --repeat 5
+"""
+
+import argparse
+import time
+
+from benchmarks.chat_latency import MESSAGES
+from chatbot import get_chatbot
+
+
+def best_time(function, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        begin = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - begin)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark batched intent and entity extraction.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    bot = get_chatbot()
+    for size in args.sizes:
+        messages = [MESSAGES[i % len(MESSAGES)] for i in range(size)]
+
+        def single():
+            return [(bot.predict_intent(message), bot.extract_entities(message)) for message in messages]
+
+        def batch():
+            return list(zip(bot.predict_intent_batch(messages), bot.extract_entities_batch(messages)))
+
+        for ((intent, confidence), entities), ((batch_intent, batch_confidence), batch_entities) in zip(single(), batch()):
+            assert intent == batch_intent and entities == batch_entities
+            assert abs(confidence - batch_confidence) < 1e-9
+
+        single_time = best_time(single, args.repeat)
+        batch_time = best_time(batch, args.repeat)
+        print(f"{size:5d} messages: single calls {size / single_time:8.0f} msg/s, "
+              f"batch {size / batch_time:8.0f} msg/s ({single_time / batch_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
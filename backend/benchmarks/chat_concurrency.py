@@ -0,0 +1,76 @@
+"""
+Chat concurrency benchmark: /api/ai-chat throughput against thread count.
+
+Sends chat messages to the Flask app from a pool of client threads sharing
+one process (and so one warm chatbot), for each thread count in turn, and
+reports requests per second, latency percentiles and the mean micro-batch
+size, with micro-batching off (window 0) and on for each window given. A
+request that fails or comes back without a reply counts as an error. Chat
+memory goes to a temporary file (POPCORNHUB_CHAT_MEMORY) instead of the
+chatbot's own.
+
+Throughput can only scale while the work releases the GIL (NumPy and
+scikit-learn kernels, file writes), and not beyond the machine's cores.
+
+Usage (from backend/):
+    python -m benchmarks.chat_concurrency
+    python -m benchmarks.chat_concurrency --threads 1 2 4 8 16 --requests 2000
+    python -m benchmarks.chat_concurrency --windows 0 1 2 5 --batch-size 32
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.chat_latency import MESSAGES, percentile
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark concurrent chat requests.")
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 2, 4, 8, 16])
+    parser.add_argument('--requests', type=int, default=1000, help="requests per thread count")
+    parser.add_argument('--windows', type=float, nargs='+', default=[0, 2],
+                        help="micro-batching windows in milliseconds (0 disables batching)")
+    parser.add_argument('--batch-size', type=int, default=32, help="largest micro-batch")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ['POPCORNHUB_CHAT_MEMORY'] = os.path.join(directory, 'memory.json')
+        from app_connexion import app
+        from chatbot import get_batcher, get_chatbot
+
+        get_chatbot()
+        batcher = get_batcher()
+        batcher.max_batch = args.batch_size
+        client = app.test_client()
+
+        def send(i):
+            message = MESSAGES[i % len(MESSAGES)]
+            begin = time.perf_counter()
+            response = client.post('/api/ai-chat', json={'message': message},
+                                   headers={'X-User-ID': f"user{i % 64}"})
+            elapsed = time.perf_counter() - begin
+            ok = response.status_code == 200 and bool(response.get_json().get('text'))
+            return elapsed, ok
+
+        for window in args.windows:
+            batcher.window = window / 1000
+            print(f"window {window:g}ms:")
+            for threads in args.threads:
+                batcher.batches = batcher.messages = 0
+                with ThreadPoolExecutor(max_workers=threads) as pool:
+                    started = time.perf_counter()
+                    results = list(pool.map(send, range(args.requests)))
+                    wall = time.perf_counter() - started
+                latencies = sorted(elapsed for elapsed, _ in results)
+                errors = sum(1 for _, ok in results if not ok)
+                batch = batcher.messages / batcher.batches if batcher.batches else 1
+                print(f"  {threads:3d} threads: {args.requests / wall:7.0f} requests/s "
+                      f"p50 {percentile(latencies, 0.5):.2f}ms p99 {percentile(latencies, 0.99):.2f}ms "
+                      f"mean batch {batch:.1f} errors {errors}")
+
+
+if __name__ == "__main__":
+    main()
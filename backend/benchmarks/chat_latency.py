@@ -0,0 +1,68 @@
+"""
+Chat latency benchmark: a chatbot built per request against the shared one.
+
+Answers the same messages (intent, entities and response text, as
+/api/ai-chat does) twice: constructing a PopcornHubChatbot for every
+message, which loads the intent model, intents and knowledge base each
+time, and with the warm process-wide instance from get_chatbot(). Memory is
+not written, so the benchmark leaves chatbot_memory.json alone.
+
+Usage (from backend/):
+    python -m benchmarks.chat_latency
+    python -m benchmarks.chat_latency --requests 500
+"""
+
+import argparse
+import time
+
+from chatbot import CONFIDENCE_THRESHOLD, PopcornHubChatbot, get_chatbot
+
+MESSAGES = [
+    "hello there",
+    "suggest a horror movie",
+    "schedule a watch for friday at 8pm",
+    "start a watch party",
+    "what snacks go with movies? maybe popcorn",
+    "tell me an icebreaker",
+    "who directed the best sci-fi films?",
+    "bye",
+]
+
+
+def answer(bot, message):
+    intent, confidence = bot.predict_intent(message)
+    entities = bot.extract_entities(message)
+    if confidence < CONFIDENCE_THRESHOLD:
+        intent = 'fallback'
+    return bot.get_response(intent, entities, message)
+
+
+def percentile(latencies, p):
+    return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+
+def measure(requests, make_bot):
+    latencies = []
+    for i in range(requests):
+        message = MESSAGES[i % len(MESSAGES)]
+        begin = time.perf_counter()
+        answer(make_bot(), message)
+        latencies.append(time.perf_counter() - begin)
+    latencies.sort()
+    return latencies
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark per-request against shared chatbot construction.")
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args(argv)
+
+    get_chatbot()
+    for name, make_bot in (("new chatbot per request", PopcornHubChatbot), ("shared chatbot", get_chatbot)):
+        latencies = measure(args.requests, make_bot)
+        print(f"{name}: p50 {percentile(latencies, 0.5):.2f}ms p99 {percentile(latencies, 0.99):.2f}ms "
+              f"({args.requests / sum(latencies):.0f} messages/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""
+Entity extraction benchmark: the single-pass EntityExtractor against the
+per-entity regexes it replaced.
+
+Generates a labeled corpus of chat messages (dates, times, genres,
+participants and snacks dropped into filler text, in random case, with
+some near misses such as "dramatic" or "next  week"), checks that the
+extractor agrees with the regexes on every message and counts how many
+match their labels (a near miss or a second keyword of the same entity can
+change the answer), then times them. The same is done
+with keyword vocabularies grown to --vocabulary terms per entity, where the
+regex side is one alternation per entity as before.
+
+Usage (from backend/):
+    python -m benchmarks.entity_extraction
+    python -m benchmarks.entity_extraction --messages 20000 --vocabulary 5000
+"""
+
+import argparse
+import random
+import re
+import time
+
+from chatbot.entities import KEYWORDS, EntityExtractor
+
+FILLER = ['can', 'we', 'watch', 'something', 'please', 'maybe', 'with', 'at', 'on', 'the', 'a',
+          'movie', 'night', 'plan', 'dramatic', 'actionable', 'weekend', 'me', 'and', 'my',
+          'pizzazz', 'todays', 'sodas', 'next', 'tonight', 'film', 'café', 'naïve']
+NEAR_MISSES = ['next  week', 'me and  my friends', 'me and my friend', 'fridays', '123pm', '1/2/3/4']
+TIMES = ['8pm', '8 pm', '10:30 PM', '7am', '11:15am', '9 AM']
+NUMERIC_DATES = ['12/25', '3/4/2024', '1/1/25']
+
+
+def regex_extract(message, keywords=KEYWORDS):
+    """The original per-entity regex extraction."""
+    entities = {}
+    date_patterns = [
+        r'\b(' + '|'.join(keywords['date']) + r')\b',
+        r'\b(\d{1,2}/\d{1,2}(/\d{2,4})?)\b'
+    ]
+    for pattern in date_patterns:
+        match = re.search(pattern, message, re.IGNORECASE)
+        if match:
+            entities['date'] = match.group()
+            break
+    time_patterns = [
+        r'\b(\d{1,2}(:\d{2})?\s*(am|pm|AM|PM))\b',
+        r'\b(\d{1,2})\s*(am|pm|AM|PM)\b'
+    ]
+    for pattern in time_patterns:
+        match = re.search(pattern, message, re.IGNORECASE)
+        if match:
+            entities['time'] = match.group()
+            break
+    match = re.search(r'\b(' + '|'.join(keywords['genre']) + r')\b', message, re.IGNORECASE)
+    if match:
+        entities['genre'] = match.group().lower()
+    match = re.search(r'\b(' + '|'.join(keywords['participants']) + r')\b', message, re.IGNORECASE)
+    if match:
+        entities['participants'] = match.group()
+    match = re.search(r'\b(' + '|'.join(keywords['snack']) + r')\b', message, re.IGNORECASE)
+    if match:
+        entities['snack'] = match.group().lower()
+    return entities
+
+
+def compiled_regex_extractor(keywords):
+    """The same regexes, compiled once (as extract_entities had them)."""
+    date_words = re.compile(r'\b(' + '|'.join(keywords['date']) + r')\b', re.IGNORECASE)
+    numeric_date = re.compile(r'\b(\d{1,2}/\d{1,2}(/\d{2,4})?)\b')
+    time_pattern = re.compile(r'\b(\d{1,2}(:\d{2})?\s*(am|pm|AM|PM))\b', re.IGNORECASE)
+    others = [(entity, re.compile(r'\b(' + '|'.join(keywords[entity]) + r')\b', re.IGNORECASE))
+              for entity in ('genre', 'participants', 'snack')]
+
+    def extract(message):
+        entities = {}
+        match = date_words.search(message) or numeric_date.search(message)
+        if match:
+            entities['date'] = match.group()
+        match = time_pattern.search(message)
+        if match:
+            entities['time'] = match.group()
+        for entity, pattern in others:
+            match = pattern.search(message)
+            if match:
+                entities[entity] = match.group().lower() if entity in ('genre', 'snack') else match.group()
+        return entities
+    return extract
+
+
+def grow(keywords, size, seed=0):
+    """Return the keyword lists padded with synthetic terms to `size` each."""
+    rng = random.Random(seed)
+    grown = {}
+    for entity, terms in keywords.items():
+        extra = []
+        while len(terms) + len(extra) < size:
+            words = [''.join(rng.choice('bcdfghjklmnpqrstvwxz') + rng.choice('aeiou') for _ in range(3))
+                     for _ in range(rng.choice((1, 1, 2)))]
+            extra.append(' '.join(words))
+        grown[entity] = list(terms) + extra
+    return grown
+
+
+def shuffle_case(text, rng):
+    choice = rng.random()
+    if choice < 0.5:
+        return text
+    if choice < 0.7:
+        return text.upper()
+    if choice < 0.85:
+        return text.title()
+    return ''.join(c.upper() if rng.random() < 0.5 else c for c in text)
+
+
+def make_corpus(count, keywords, seed=0):
+    """Return [(message, labels)]."""
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(count):
+        parts = [rng.choice(FILLER) for _ in range(rng.randint(1, 6))]
+        labels = {}
+        slots = []
+        if rng.random() < 0.5:
+            if rng.random() < 0.7:
+                slots.append(('date', shuffle_case(rng.choice(keywords['date']), rng)))
+            else:
+                slots.append(('numeric_date', rng.choice(NUMERIC_DATES)))
+        if rng.random() < 0.4:
+            slots.append(('time', shuffle_case(rng.choice(TIMES), rng)))
+        for entity in ('genre', 'participants', 'snack'):
+            if rng.random() < 0.4:
+                slots.append((entity, shuffle_case(rng.choice(keywords[entity]), rng)))
+        if rng.random() < 0.3:
+            slots.append(('near_miss', rng.choice(NEAR_MISSES)))
+        for _, text in slots:
+            parts.insert(rng.randint(0, len(parts)), text)
+        for entity, text in slots:
+            if entity == 'numeric_date':
+                labels.setdefault('date', text)
+            elif entity in ('genre', 'snack'):
+                labels[entity] = text.lower()
+            elif entity != 'near_miss':
+                labels[entity] = text
+        corpus.append((rng.choice(['', '', '"']) + ' '.join(parts) + rng.choice(['', '?', '!', '.']), labels))
+    return corpus
+
+
+def check(corpus, extract, reference):
+    """Count messages where `extract` disagrees with the reference, and
+    where the reference disagrees with the generated labels."""
+    mismatches = sum(1 for message, _ in corpus if extract(message) != reference(message))
+    unlabeled = sum(1 for message, labels in corpus if reference(message) != labels)
+    return mismatches, unlabeled
+
+
+def throughput(extract, messages, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        begin = time.perf_counter()
+        for message in messages:
+            extract(message)
+        best = min(best, time.perf_counter() - begin)
+    return len(messages) / best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark single-pass entity extraction.")
+    parser.add_argument('--messages', type=int, default=10000)
+    parser.add_argument('--vocabulary', type=int, default=2000, help="keywords per entity in the grown run")
+    args = parser.parse_args(argv)
+
+    for name, keywords in (("built-in keywords", KEYWORDS),
+                           (f"{args.vocabulary} keywords per entity", grow(KEYWORDS, args.vocabulary))):
+        corpus = make_corpus(args.messages, keywords)
+        messages = [message for message, _ in corpus]
+        extractor = EntityExtractor(keywords)
+
+        def reference(message):
+            return regex_extract(message, keywords)
+
+        mismatches, unlabeled = check(corpus, extractor.extract, reference)
+        labeled = sum(1 for message, labels in corpus if extractor.extract(message) == labels)
+        print(f"{name}: {len(corpus)} messages, {mismatches} differ from the regexes, "
+              f"{labeled} match their labels ({unlabeled} where a near miss or a second "
+              f"keyword changes the label)")
+
+        compiled = compiled_regex_extractor(keywords)
+        rates = [("regexes", throughput(reference, messages)),
+                 ("compiled regexes", throughput(compiled, messages)),
+                 ("single pass", throughput(extractor.extract, messages))]
+        for label, rate in rates:
+            print(f"  {label:16s} {rate:10.0f} msg/s")
+        print(f"  speedup {rates[2][1] / rates[0][1]:.1f}x over regexes, "
+              f"{rates[2][1] / rates[1][1]:.1f}x over compiled regexes")
+
+
+if __name__ == "__main__":
+    main()
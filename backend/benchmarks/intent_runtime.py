@@ -0,0 +1,89 @@
+"""
+Intent runtime benchmark: the exported NumPy intent model against the
+pickled scikit-learn pipeline.
+
+Checks that both give the same probabilities (bit for bit) on the training
+patterns and the benchmark messages, then measures, each in a fresh
+interpreter, the time to import the runtime and load the model and the
+resident memory afterwards, and in this process the latency of one
+prediction.
+
+Usage (from backend/):
+    python -m benchmarks.intent_runtime
+    python -m benchmarks.intent_runtime --starts 10
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.chat_latency import MESSAGES, percentile
+from chatbot.chatbot import CHATBOT_DIR, INTENTS_PATH, MODEL_PATH
+from chatbot.intent_model import load_intent_model
+
+PICKLE_PATH = MODEL_PATH[:-len('.npz')] + '.pkl'
+
+# Run in a fresh interpreter: seconds to load, RSS in KiB (ru_maxrss would
+# include the parent's before exec), whether scikit-learn was imported
+STARTUP = """
+import sys, time
+begin = time.perf_counter()
+sys.path.insert(0, {directory!r})
+from intent_model import load_intent_model
+model = load_intent_model({path!r})
+model.predict_proba(['hello'])
+seconds = time.perf_counter() - begin
+with open('/proc/self/status') as f:
+    rss = next(line.split()[1] for line in f if line.startswith('VmRSS:'))
+print(seconds, rss, 'sklearn' in sys.modules)
+"""
+
+
+def startup(path, starts):
+    """Median load time, RSS and whether scikit-learn was imported."""
+    runs = []
+    for _ in range(starts):
+        output = subprocess.run([sys.executable, '-c', STARTUP.format(directory=CHATBOT_DIR, path=path)],
+                                check=True, capture_output=True, text=True).stdout.split()
+        runs.append((float(output[0]), int(output[1]), output[2] == 'True'))
+    runs.sort()
+    return runs[len(runs) // 2]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the NumPy intent runtime.")
+    parser.add_argument('--starts', type=int, default=5, help="fresh interpreters per model")
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    with open(INTENTS_PATH) as f:
+        patterns = [pattern.lower() for intent in json.load(f) for pattern in intent['patterns']]
+    messages = patterns + [message.lower() for message in MESSAGES]
+
+    models = [("pickled pipeline", PICKLE_PATH), ("NumPy export", MODEL_PATH)]
+    pipeline, exported = (load_intent_model(path) for _, path in models)
+    same = np.array_equal(pipeline.predict_proba(messages), exported.predict_proba(messages)) and all(
+        np.array_equal(pipeline.predict_proba([message]), exported.predict_proba([message]))
+        for message in messages)
+    print(f"{len(messages)} messages, identical probabilities: {same}")
+
+    for (name, path), model in zip(models, (pipeline, exported)):
+        seconds, rss, sklearn = startup(path, args.starts)
+        latencies = []
+        for i in range(args.requests):
+            message = messages[i % len(messages)]
+            begin = time.perf_counter()
+            model.predict_proba([message])
+            latencies.append(time.perf_counter() - begin)
+        latencies.sort()
+        print(f"{name}: load {seconds * 1000:.0f}ms, RSS {rss / 1024:.0f}MiB, "
+              f"scikit-learn imported: {sklearn}, predict p50 {percentile(latencies, 0.5):.3f}ms "
+              f"p99 {percentile(latencies, 0.99):.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
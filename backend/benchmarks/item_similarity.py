@@ -0,0 +1,91 @@
+"""
+Watchlist recommendation benchmark: ItemSimilarity build time, latency and
+incremental updates.
+
+Builds synthetic watchlists over a large catalog (popular titles are much
+more likely to be saved) and times personalized recommendations for heavy
+users, whose watchlists hold hundreds of titles. Then adds titles to heavy
+users' watchlists through the update queue and times how long each takes to
+be applied.
+
+Usage (from backend/):
+    python -m benchmarks.item_similarity
+    python -m benchmarks.item_similarity --catalog 1000000 --users 20000 --heavy 300 --updates 1000
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from recommend import ItemSimilarity
+
+
+def make_watchlists(catalog, users, heavy, seed=0):
+    """Return {user: [movie ids]} with Zipf-distributed titles; every tenth
+    user is a heavy user with `heavy` titles."""
+    rng = np.random.default_rng(seed)
+    # A shuffled id per popularity rank, so popular titles are spread out
+    ids = rng.permutation(catalog) + 1
+    watchlists = {}
+    for user in range(users):
+        size = heavy if user % 10 == 0 else int(rng.integers(1, 40))
+        ranks = np.minimum(rng.zipf(1.3, size * 2), catalog) - 1
+        watchlists[f"user{user}"] = list(dict.fromkeys(ids[ranks].tolist()))[:size]
+    return watchlists
+
+
+def percentile(latencies, p):
+    return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark item-item recommendations over watchlists.")
+    parser.add_argument('--catalog', type=int, default=1000000, help="number of titles")
+    parser.add_argument('--users', type=int, default=20000)
+    parser.add_argument('--heavy', type=int, default=300, help="watchlist size of heavy users")
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--limit', type=int, default=10)
+    parser.add_argument('--updates', type=int, default=1000, help="watchlist additions to apply")
+    args = parser.parse_args(argv)
+
+    watchlists = make_watchlists(args.catalog, args.users, args.heavy)
+    engine = ItemSimilarity(watchlists)
+    start = time.perf_counter()
+    engine.recommend([])
+    build = time.perf_counter() - start
+
+    heavy = [ids for ids in watchlists.values() if len(ids) >= args.heavy // 2][:args.queries]
+    fallback = range(1, args.limit * 2 + args.heavy + 1)
+    latencies = []
+    for ids in heavy:
+        begin = time.perf_counter()
+        engine.recommend(ids, args.limit, fallback=fallback)
+        latencies.append(time.perf_counter() - begin)
+    latencies.sort()
+
+    print(f"{args.users} users over {args.catalog} titles: {len(engine)} items, build {build:.1f}s")
+    print(f"{len(heavy)} heavy users (~{args.heavy} titles): "
+          f"p50 {percentile(latencies, 0.5):.2f}ms p99 {percentile(latencies, 0.99):.2f}ms")
+
+    # Time from queuing an addition to it being reflected in the table
+    rng = np.random.default_rng(1)
+    users = [user for user, ids in watchlists.items() if len(ids) >= args.heavy // 2]
+    latencies = []
+    for _ in range(args.updates):
+        user = users[rng.integers(len(users))]
+        movie_id = int(rng.integers(1, args.catalog + 1))
+        if movie_id in watchlists[user]:
+            continue
+        watchlists[user].append(movie_id)
+        begin = time.perf_counter()
+        engine.added(user, movie_id)
+        engine.flush()
+        latencies.append(time.perf_counter() - begin)
+    latencies.sort()
+    print(f"{len(latencies)} watchlist additions by heavy users: "
+          f"p50 {percentile(latencies, 0.5):.2f}ms p99 {percentile(latencies, 0.99):.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
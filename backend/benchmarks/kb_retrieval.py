@@ -0,0 +1,119 @@
+"""
+KB retrieval benchmark: the knowledge base index against scoring every
+sentence.
+
+Generates a synthetic FAQ corpus (Zipf-distributed words, a handful of very
+common ones), builds the index file, and answers queries (corpus sentences
+with words dropped, swapped or added, and bags of random words) both
+through the index and with a sparse product over the whole TF-IDF matrix
+built from the same vectorizer. Checks that both pick a sentence with the
+same similarity, and reports build time, file size and query latencies.
+
+Usage (from backend/):
+    python -m benchmarks.kb_retrieval
+    python -m benchmarks.kb_retrieval --sentences 200000 --queries 2000
+"""
+
+import argparse
+import itertools
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.chat_latency import percentile
+from chatbot.kb_index import KBIndex, write_kb_index
+
+COMMON = ['how', 'do', 'i', 'the', 'a', 'to', 'can', 'my', 'is', 'what', 'popcornhub', 'watch', 'party',
+          'movie', 'with', 'friends', 'on', 'for', 'you', 'and']
+
+
+def make_corpus(count, vocabulary, seed=0):
+    rng = random.Random(seed)
+    words = [f"w{i}" for i in range(vocabulary)]
+    cumulative = list(itertools.accumulate(1 / (rank + 1) for rank in range(vocabulary)))
+    sentences = []
+    for _ in range(count):
+        length = rng.randint(5, 15)
+        sentence = rng.choices(COMMON, k=rng.randint(1, length // 2 + 1))
+        sentence += rng.choices(words, cum_weights=cumulative, k=length - len(sentence))
+        rng.shuffle(sentence)
+        sentences.append(' '.join(sentence).capitalize() + rng.choice('?.'))
+    return sentences, words
+
+
+def make_queries(count, sentences, words, seed=1):
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        if rng.random() < 0.8:
+            query = rng.choice(sentences).rstrip('?.').lower().split()
+            for _ in range(rng.randint(0, 3)):
+                if rng.random() < 0.5 and len(query) > 1:
+                    query.pop(rng.randrange(len(query)))
+                else:
+                    query.insert(rng.randrange(len(query) + 1), rng.choice(words + COMMON))
+        else:
+            query = rng.choices(words + COMMON, k=rng.randint(1, 8))
+        queries.append(' '.join(query))
+    return queries
+
+
+def main(argv=None):
+    from scipy import sparse
+
+    parser = argparse.ArgumentParser(description="Benchmark knowledge base retrieval.")
+    parser.add_argument('--sentences', type=int, default=200000)
+    parser.add_argument('--vocabulary', type=int, default=50000)
+    parser.add_argument('--queries', type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    sentences, words = make_corpus(args.sentences, args.vocabulary)
+    queries = make_queries(args.queries, sentences, words)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'kb.phkb')
+        began = time.perf_counter()
+        write_kb_index(path, sentences)
+        built = time.perf_counter() - began
+        began = time.perf_counter()
+        index = KBIndex.open(path)
+        opened = time.perf_counter() - began
+        print(f"{len(sentences)} sentences, {len(index.tfidf.terms)} terms: built in {built:.1f}s, "
+              f"{os.path.getsize(path) / 2 ** 20:.0f}MiB, opened in {opened * 1000:.0f}ms")
+
+        # Every sentence scored: the whole TF-IDF matrix times the query
+        indptr, indices, data = index.tfidf.transform(sentences)
+        matrix = sparse.csr_matrix((data, indices, indptr), shape=(len(sentences), len(index.tfidf.terms)))
+
+        def exhaustive(query):
+            indptr, indices, data = index.tfidf.transform([query])
+            scores = matrix @ sparse.csr_matrix((data, indices, indptr), shape=(1, matrix.shape[1])).T
+            scores = scores.toarray().ravel()
+            best = int(scores.argmax())
+            return best, float(scores[best])
+
+        # Each method over all queries in turn, so neither evicts the other
+        # from the caches
+        results = {}
+        timings = {}
+        for name, method in (("index", index.best), ("every sentence", exhaustive)):
+            results[name], timings[name] = [], []
+            for query in queries:
+                begin = time.perf_counter()
+                results[name].append(method(query))
+                timings[name].append(time.perf_counter() - begin)
+        mismatches = 0
+        for (found, similarity), (_, expected) in zip(results["index"], results["every sentence"]):
+            if found < 0:
+                mismatches += expected != 0
+            elif abs(similarity - expected) > 1e-9:
+                mismatches += 1
+        print(f"{len(queries)} queries, {mismatches} with a different best similarity")
+        for name, latencies in timings.items():
+            latencies.sort()
+            print(f"  {name:15s} p50 {percentile(latencies, 0.5):.3f}ms p99 {percentile(latencies, 0.99):.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Substring filter benchmark: CatalogStore.matches (full scan) vs TrigramIndex.
+
+Builds synthetic catalogs of increasing size and times the same mix of
+`GET /movies?q=` style queries both ways, checking that the results agree.
+
+Usage (from backend/):
+    python -m benchmarks.substring_search
+    python -m benchmarks.substring_search --sizes 10000 100000 --queries 200
+"""
+
+import argparse
+import random
+import time
+from itertools import accumulate
+
+from catalog.store import CatalogStore
+from catalog.trigram import TrigramIndex
+
+SYLLABLES = "ka ri mo sel tan vor li en da ro mi shu ter al ne gor bra fin us ha".split()
+VOCABULARY = 5000
+
+DIRECTORS = ["Christopher Nolan", "Frank Darabont", "Greta Gerwig", "Denis Villeneuve", "Ava DuVernay"]
+
+
+def make_words(seed=0):
+    """Return a vocabulary and Zipf-like cumulative weights for it."""
+    rng = random.Random(seed)
+    words = set()
+    while len(words) < VOCABULARY:
+        words.add(''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    words = sorted(words)
+    rng.shuffle(words)
+    weights = list(accumulate(1.0 / rank for rank in range(1, len(words) + 1)))
+    return words, weights
+
+
+WORDS, WEIGHTS = make_words()
+
+
+def pick(rng, count):
+    return rng.choices(WORDS, cum_weights=WEIGHTS, k=count)
+
+
+def make_catalog(size, seed=0):
+    rng = random.Random(seed)
+    movies = []
+    for movie_id in range(1, size + 1):
+        title = ' '.join(pick(rng, rng.randint(1, 4))).title()
+        description = ' '.join(pick(rng, rng.randint(8, 20))).capitalize() + '.'
+        movies.append({
+            'id': movie_id,
+            'title': f"{title} {rng.randint(1, 999)}",
+            'description': description,
+            'director': rng.choice(DIRECTORS),
+            'rating': round(rng.uniform(1, 10), 1),
+        })
+    return movies
+
+
+def make_queries(count, seed=1):
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        kind = rng.random()
+        if kind < 0.15:
+            # Short queries use the prefix fallback
+            queries.append(pick(rng, 1)[0][:rng.randint(1, 2)])
+        elif kind < 0.5:
+            queries.append(pick(rng, 1)[0])
+        elif kind < 0.75:
+            queries.append(' '.join(pick(rng, 2)))
+        elif kind < 0.9:
+            queries.append(f"{pick(rng, 1)[0]} {rng.randint(1, 999)}")
+        else:
+            queries.append(pick(rng, 1)[0] + 'zz')
+    return queries
+
+
+def timed(fn, queries):
+    latencies = []
+    results = []
+    for query in queries:
+        start = time.perf_counter()
+        results.append(fn(query))
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return results, latencies
+
+
+def percentile(latencies, p):
+    return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+
+def run(size, queries):
+    movies = make_catalog(size)
+    store = CatalogStore(movies)
+    del movies
+
+    index = TrigramIndex(store)
+    start = time.perf_counter()
+    index.match_ids('warm')
+    build = time.perf_counter() - start
+
+    scanned, scan = timed(store.matches, queries)
+    indexed, lookup = timed(index.matches, queries)
+    for query, expected, got in zip(queries, scanned, indexed):
+        if [m['id'] for m in expected] != [m['id'] for m in got]:
+            raise AssertionError(f"results differ for {query!r}")
+
+    print(f"{size:>9} movies  build {build:6.1f}s  "
+          f"scan p50 {percentile(scan, 0.5):8.2f}ms p99 {percentile(scan, 0.99):8.2f}ms  "
+          f"index p50 {percentile(lookup, 0.5):7.2f}ms p99 {percentile(lookup, 0.99):7.2f}ms  "
+          f"speedup {sum(scan) / sum(lookup):6.1f}x")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark substring filtering: scan vs trigram index.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--queries', type=int, default=100, help="queries per catalog size")
+    args = parser.parse_args(argv)
+
+    queries = make_queries(args.queries)
+    for size in args.sizes:
+        run(size, queries)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Vector index benchmark: recall@k vs latency of IVFPQIndex.
+
+Builds an index over synthetic clustered embeddings (the shape real movie
+embeddings have: titles bunch up by genre and style), then, for a range of
+nprobe settings, times queries and compares their results with an exact
+scan. The index is saved and queried through a memory-mapped load, as the
+API serves it.
+
+Usage (from backend/):
+    python -m benchmarks.vector_search
+    python -m benchmarks.vector_search --size 100000 --nprobe 4 8 16 32
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from recommend.ann import IVFPQIndex, normalize
+
+
+def make_vectors(size, dims, clusters=2000, seed=0):
+    """Return unit vectors scattered around random cluster centers."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dims)).astype(np.float32)
+    vectors = np.empty((size, dims), np.float32)
+    for start in range(0, size, 100000):
+        stop = min(start + 100000, size)
+        labels = rng.integers(0, clusters, stop - start)
+        vectors[start:stop] = centers[labels] + rng.standard_normal((stop - start, dims))
+    return normalize(vectors)
+
+
+def percentile(latencies, p):
+    return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark recall and latency of the IVF-PQ vector index.")
+    parser.add_argument('--size', type=int, default=1000000, help="number of vectors")
+    parser.add_argument('--dims', type=int, default=64)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--nprobe', type=int, nargs='+', default=[4, 8, 16, 32])
+    parser.add_argument('--rerank', type=int, default=256)
+    args = parser.parse_args(argv)
+
+    vectors = make_vectors(args.size, args.dims)
+    ids = np.arange(1, args.size + 1) * 7
+
+    start = time.perf_counter()
+    index = IVFPQIndex.build(ids, vectors)
+    build = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'vectors.phann')
+        index.save(path)
+        del index
+        start = time.perf_counter()
+        index = IVFPQIndex.load(path)
+        load = time.perf_counter() - start
+        print(f"{args.size} vectors x {args.dims} dims: build {build:.1f}s, "
+              f"load {load * 1000:.1f}ms, file {os.path.getsize(path) / 2 ** 20:.0f} MiB")
+
+        rng = np.random.default_rng(1)
+        queries = vectors[rng.choice(args.size, args.queries, replace=False)]
+        queries = normalize(queries + 0.3 * rng.standard_normal(queries.shape).astype(np.float32) / np.sqrt(args.dims))
+        exact = [set(index.search_exact(query, args.k)[0].tolist()) for query in queries]
+
+        for nprobe in args.nprobe:
+            latencies = []
+            hits = 0
+            for query, expected in zip(queries, exact):
+                begin = time.perf_counter()
+                found, _ = index.search(query, args.k, nprobe=nprobe, rerank=args.rerank)
+                latencies.append(time.perf_counter() - begin)
+                hits += len(expected.intersection(found.tolist()))
+            latencies.sort()
+            print(f"nprobe {nprobe:>3}  recall@{args.k} {hits / (args.k * len(queries)):.3f}  "
+                  f"p50 {percentile(latencies, 0.5):.2f}ms p99 {percentile(latencies, 0.99):.2f}ms")
+        del index
+
+
+if __name__ == "__main__":
+    main()
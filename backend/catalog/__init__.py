@@ -0,0 +1,87 @@
+"""
+PopcornHub movie catalog.
+
+`CATALOG` is the process-wide store every serving stack reads from. When
+POPCORNHUB_CATALOG points at a columnar catalog file (see columnar.py) the
+store is backed by a read-only memory map of it, so worker startup does not
+depend on catalog size. Otherwise it is seeded from data/movies.json.
+
+`SEARCH` is the BM25 full-text index over `CATALOG` (see search.py), made
+typo tolerant by the `SPELLING` dictionary (see spelling.py). `AUTOCOMPLETE`
+is the title prefix index (see autocomplete.py), `TRIGRAMS` the substring
+index behind `GET /movies?q=` (see trigram.py), `FACETS` the bitmap index
+behind the browse filters and facet counts (see facets.py) and `RATINGS` the
+rating-ordered index (see ranking.py). `SCORES` ranks the whole catalog by a
+weighted blend of rating, year, popularity and genre taste in one vectorized
+pass (see scoring.py) and fills recommendations and chat suggestions for
+users with a watchlist.
+
+`RELATED` is the precomputed content-similarity neighbor table behind each
+movie's relatedMovies (see related.py), mapped from the file named by
+POPCORNHUB_RELATED; without one, and for titles it has no neighbors for,
+the related ids the records were loaded with are served (see graph.py).
+"""
+
+import json
+import os
+
+from .autocomplete import AutocompleteIndex
+from .facets import FacetIndex
+from .ranking import RatingIndex
+from .scoring import ScoreIndex
+from .search import SearchIndex
+from .spelling import SpellingIndex
+from .store import CatalogStore, normalize
+from .trigram import TrigramIndex
+
+CATALOG_DIR = os.path.dirname(os.path.abspath(__file__))
+SEED_PATH = os.path.join(CATALOG_DIR, 'data', 'movies.json')
+
+
+def load_seed(path=SEED_PATH):
+    """Read the seed catalog (a JSON array of movie records)."""
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def open_catalog(path=None):
+    """Build the catalog store, from a columnar file if one is configured."""
+    path = path or os.environ.get('POPCORNHUB_CATALOG')
+    if path:
+        from .columnar import ColumnarCatalog
+        return CatalogStore(base=ColumnarCatalog(path))
+    return CatalogStore(load_seed())
+
+
+def open_related(path=None):
+    """Map the related movies table, if one is configured."""
+    path = path or os.environ.get('POPCORNHUB_RELATED')
+    if path:
+        from .related import RelatedTable
+        return RelatedTable(path)
+    return None
+
+
+CATALOG = open_catalog()
+
+# Full-text search over CATALOG; built on first query, then kept in sync
+SPELLING = SpellingIndex(CATALOG)
+SEARCH = SearchIndex(CATALOG, spelling=SPELLING)
+
+# Title prefix completion over CATALOG, maintained the same way
+AUTOCOMPLETE = AutocompleteIndex(CATALOG)
+
+# Substring filter over CATALOG, answering exactly like CATALOG.matches
+TRIGRAMS = TrigramIndex(CATALOG)
+
+# Filters and facet counts over CATALOG for browsing
+FACETS = FacetIndex(CATALOG)
+
+# Rating-ordered views of CATALOG for recommendations
+RATINGS = RatingIndex(CATALOG)
+
+# Weighted scores of every title in CATALOG, for personalized rankings
+SCORES = ScoreIndex(CATALOG)
+
+# Content-based neighbors of each title, computed offline
+RELATED = open_related()
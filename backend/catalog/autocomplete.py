@@ -0,0 +1,218 @@
+"""
+Catalog Autocomplete
+
+Prefix completion over normalized movie titles.
+
+Each title is indexed under its normalized form and under every later word
+start ("the shawshank redemption", "shawshank redemption", "redemption"),
+all in one sorted array, so the completions for a prefix are a contiguous
+range found by bisection. That array is an implicit trie: prefixes whose
+range is large (its heavy nodes) get their top-k by rating precomputed, and
+small ranges are ranked on the fly, so a lookup touches at most `threshold`
+entries.
+
+Catalog changes repair the cached top-k lists in place: a re-rated title is
+re-sorted into (or offered to) the lists of its prefixes. Only a list that
+may have lost its k-th title, because that title was removed or fell to last
+place, is dropped; the next lookup rebuilds it from its children's lists, so
+the work follows one path down the trie instead of the prefix's whole
+range. Adding, removing or renaming a title also inserts into or deletes
+from the sorted array, which is O(n) per key: cheap next to a request for
+single edits, while bulk loads are sorted once by _build.
+"""
+
+import heapq
+import re
+import unicodedata
+from bisect import bisect_left, bisect_right
+
+from .index import CatalogIndex
+
+DEFAULT_K = 10
+HEAVY_THRESHOLD = 64
+
+# Sorts after every character, so prefix + MAX_CHAR bounds a prefix's range
+MAX_CHAR = '\U0010ffff'
+
+NON_WORD = re.compile(r'[\W_]+')
+
+
+def normalize_title(text):
+    """Lowercase, strip accents and punctuation, and collapse whitespace."""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return NON_WORD.sub(' ', text.lower()).strip()
+
+
+def title_keys(title):
+    """Return the keys a title is found under: itself and each word start."""
+    words = normalize_title(title).split()
+    return list(dict.fromkeys(' '.join(words[i:]) for i in range(len(words))))
+
+
+class AutocompleteIndex(CatalogIndex):
+    def __init__(self, store=None, k=DEFAULT_K, threshold=HEAVY_THRESHOLD):
+        super().__init__(store)
+        self.k = k
+        self.threshold = threshold
+
+        # Sorted keys and the id each key belongs to
+        self._keys = []
+        self._key_ids = []
+        # id -> (title, year, rating, keys)
+        self._entries = {}
+        # prefix -> best ids, for heavy prefixes
+        self._top = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _rank(self, movie_id):
+        # Best rated first; unrated titles last; ties by id
+        rating = self._entries[movie_id][2]
+        return (-rating if rating is not None else 1.0, movie_id)
+
+    def _best(self, movie_ids):
+        return heapq.nsmallest(self.k, set(movie_ids), key=self._rank)
+
+    def _entry(self, movie):
+        title = movie.get('title') or ''
+        return title, movie.get('releaseYear'), movie.get('rating'), title_keys(title)
+
+    def _build(self, movies):
+        pairs = []
+        self._entries = {}
+        for movie in movies:
+            entry = self._entry(movie)
+            self._entries[movie['id']] = entry
+            pairs.extend((key, movie['id']) for key in entry[3])
+        pairs.sort()
+        self._keys = [key for key, _ in pairs]
+        self._key_ids = [movie_id for _, movie_id in pairs]
+        self._top = {}
+        self._node('', 0, len(pairs))
+
+    def _node(self, prefix, lo, hi):
+        """Return the top-k of the keys in [lo, hi), which all start with
+        `prefix`. Light ranges are ranked on the fly; a heavy node keeps its
+        top-k, computed when missing from its children's (and cached)."""
+        if hi - lo <= self.threshold:
+            return self._best(self._key_ids[lo:hi])
+        top = self._top.get(prefix)
+        if top is not None:
+            return top
+
+        keys = self._keys
+        depth = len(prefix)
+        candidates = []
+        i = lo
+        if len(keys[i]) == depth:
+            # Keys that are the prefix itself sort first
+            i = bisect_right(keys, prefix, i, hi)
+            candidates.extend(self._key_ids[lo:i])
+        while i < hi:
+            child = keys[i][:depth + 1]
+            j = bisect_right(keys, child + MAX_CHAR, i, hi)
+            candidates.extend(self._node(child, i, j))
+            i = j
+
+        top = self._best(candidates)
+        self._top[prefix] = top
+        return top
+
+    @staticmethod
+    def _prefixes(keys):
+        return {key[:end] for key in keys for end in range(len(key) + 1)}
+
+    def _apply(self, old, new):
+        if old is not None and (new is None or new['id'] != old['id']):
+            self._remove(old['id'])
+        if new is not None:
+            self._add(new)
+
+    def _add(self, movie):
+        movie_id = movie['id']
+        entry = self._entry(movie)
+        current = self._entries.get(movie_id)
+        if current is not None:
+            if current[3] == entry[3]:
+                # Same title keys: only the rank can have changed
+                self._rerank(movie_id, entry)
+                return
+            self._remove(movie_id)
+        self._entries[movie_id] = entry
+
+        for key in entry[3]:
+            # O(n) list moves per key; bulk loads go through _build instead
+            i = bisect_right(self._keys, key)
+            self._keys.insert(i, key)
+            self._key_ids.insert(i, movie_id)
+        rank = self._rank(movie_id)
+        for prefix in self._prefixes(entry[3]):
+            top = self._top.get(prefix)
+            if top is not None and movie_id not in top:
+                self._offer(top, movie_id, rank)
+
+    def _offer(self, top, movie_id, rank):
+        """Put an id into a top-k that does not hold it, if it ranks there."""
+        if len(top) < self.k or rank < self._rank(top[-1]):
+            top.append(movie_id)
+            top.sort(key=self._rank)
+            del top[self.k:]
+
+    def _rerank(self, movie_id, entry):
+        """Repair the cached top-k lists after a title's rank changed."""
+        before = self._rank(movie_id)
+        self._entries[movie_id] = entry
+        rank = self._rank(movie_id)
+        for prefix in self._prefixes(entry[3]):
+            top = self._top.get(prefix)
+            if top is None:
+                continue
+            if movie_id not in top:
+                self._offer(top, movie_id, rank)
+                continue
+            top.sort(key=self._rank)
+            if top[-1] == movie_id and len(top) == self.k and rank > before:
+                # A title outside the list may now outrank it: recomputed
+                # from the children's lists on the next lookup
+                del self._top[prefix]
+
+    def _remove(self, movie_id):
+        entry = self._entries.get(movie_id)
+        if entry is None:
+            return
+        for key in entry[3]:
+            i = bisect_left(self._keys, key)
+            while self._key_ids[i] != movie_id:
+                i += 1
+            del self._keys[i]
+            del self._key_ids[i]
+        for prefix in self._prefixes(entry[3]):
+            top = self._top.get(prefix)
+            if top is None or movie_id not in top:
+                continue
+            if len(top) < self.k:
+                # Held the whole range, so still does
+                top.remove(movie_id)
+            else:
+                # Short of its k-th title: recomputed on the next lookup
+                del self._top[prefix]
+        del self._entries[movie_id]
+
+    def complete(self, prefix, limit=None):
+        """Return [(id, title, year)] for titles matching a prefix."""
+        self._ensure_built()
+        prefix = normalize_title(prefix)
+        if not prefix:
+            return []
+        limit = min(limit or self.k, self.k)
+
+        with self._lock:
+            top = self._top.get(prefix)
+            if top is None:
+                lo = bisect_left(self._keys, prefix)
+                hi = bisect_right(self._keys, prefix + MAX_CHAR, lo)
+                top = self._node(prefix, lo, hi)
+            entries = self._entries
+            return [(movie_id, entries[movie_id][0], entries[movie_id][1]) for movie_id in top[:limit]]
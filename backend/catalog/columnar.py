@@ -0,0 +1,493 @@
+"""
+Columnar Catalog File
+
+A binary, memory-mapped catalog format. Numeric fields are fixed-width
+arrays and strings live in offset/blob tables, so opening a catalog only
+parses a small header: every worker maps the same file and shares its pages,
+and startup cost does not grow with the number of titles.
+
+Layout (native byte order, recorded in the header):
+
+    header     magic, byte order, column count, row count
+    directory  one entry per column: name, typecode, byte offset, item count
+    columns    8-byte aligned arrays
+
+Scalar fields map to one column each (`duration` is kept as minutes). String
+columns are stored as a `<name>.offsets` array of n + 1 uint64 offsets into a
+`<name>.blob` of UTF-8 bytes, and a `nulls` byte per row flags the string
+fields a record has no value for (bit i for STRING_FIELDS[i]) so they are
+read back as missing rather than ''. Nested fields (genre, cast, awards),
+fields that are present but null and durations not in "<n> min" form are
+kept as one JSON document per row in the `extra` string column. relatedMovies are
+stored as ids only, in CSR form (see graph.py): `related.offsets` per row
+into `related.targets`, int32 positions into the sorted `related.labels`.
+Lowercase title/description and a genre -> rows posting table are written
+alongside so readers never have to compute them.
+
+Usage:
+    python -m catalog.columnar movies.json catalog.phcat
+"""
+
+import bisect
+import json
+import math
+import mmap
+import os
+import re
+import shutil
+import struct
+import sys
+import tempfile
+from array import array
+from itertools import accumulate, islice
+
+from .graph import related_ids
+
+MAGIC = b'PHCAT001'
+HEADER = struct.Struct('=8s1sxxxIQ')
+ENTRY = struct.Struct('=24s4sQQ')
+ALIGN = 8
+
+SCALAR_FIELDS = ['id', 'rating', 'releaseYear', 'duration']
+STRING_FIELDS = ['title', 'description', 'director', 'poster', 'trailerUrl']
+NESTED_FIELDS = ['genre', 'cast', 'awards']
+# Stored as columns of their own
+RELATED_FIELD = 'relatedMovies'
+
+DURATION_PATTERN = re.compile(r'^\s*(\d+)\s*min\s*$')
+
+
+def parse_duration(duration):
+    """Return the minutes in a duration such as "148 min", or None."""
+    match = DURATION_PATTERN.match(duration or '')
+    return int(match.group(1)) if match else None
+
+
+def format_duration(minutes):
+    return f"{minutes} min"
+
+
+def _pad(length):
+    return (-length) % ALIGN
+
+
+STRING_COLUMNS = STRING_FIELDS + ['extra', 'title_lc', 'description_lc']
+
+
+class EncodedRows:
+    """A batch of records already converted to column data.
+
+    Encoding is the expensive part of writing a catalog, so it is done
+    separately (see encode_rows) and can run in worker processes; appending
+    an encoded batch to a ColumnarWriter is then a handful of bulk copies.
+    """
+
+    def __init__(self):
+        self.ids = array('q')
+        self.ratings = array('d')
+        self.years = array('i')
+        self.durations = array('i')
+        # per-row bitmask of the STRING_FIELDS a record has no value for
+        self.nulls = array('B')
+        # column name -> (per-row byte lengths, concatenated bytes)
+        self.strings = {name: (array('Q'), bytearray()) for name in STRING_COLUMNS}
+        # per-row tuple of lowercase genres
+        self.genres = []
+        # per-row related id counts, and the ids
+        self.related_counts = array('Q')
+        self.related_ids = array('q')
+
+    def __len__(self):
+        return len(self.ids)
+
+    def select(self, rows):
+        """Return a new batch holding only the given row positions."""
+        selected = EncodedRows()
+        for name in ('ids', 'ratings', 'years', 'durations', 'nulls'):
+            column = getattr(self, name)
+            getattr(selected, name).extend(column[row] for row in rows)
+        for name, (lengths, data) in self.strings.items():
+            starts = list(accumulate(lengths, initial=0))
+            out_lengths, out_data = selected.strings[name]
+            for row in rows:
+                out_lengths.append(lengths[row])
+                out_data += data[starts[row]:starts[row + 1]]
+        selected.genres = [self.genres[row] for row in rows]
+        starts = list(accumulate(self.related_counts, initial=0))
+        for row in rows:
+            selected.related_counts.append(self.related_counts[row])
+            selected.related_ids.extend(self.related_ids[starts[row]:starts[row + 1]])
+        return selected
+
+
+def encode_rows(movies):
+    """Encode movie records (JSON shape) into an EncodedRows batch."""
+    encoded = EncodedRows()
+    strings = encoded.strings
+    for movie in movies:
+        encoded.ids.append(movie['id'])
+        rating = movie.get('rating')
+        encoded.ratings.append(rating if rating is not None else math.nan)
+        year = movie.get('releaseYear')
+        encoded.years.append(year if year is not None else -1)
+        minutes = parse_duration(movie.get('duration'))
+        encoded.durations.append(minutes if minutes is not None else -1)
+
+        related = related_ids(movie)
+        encoded.related_counts.append(len(related))
+        encoded.related_ids.extend(related)
+
+        extra = {k: movie[k] for k in NESTED_FIELDS if k in movie}
+        if minutes is None and 'duration' in movie:
+            # Keep durations that are not in "<n> min" form (or null) verbatim
+            extra['duration'] = movie['duration']
+        for key, value in movie.items():
+            if (key not in SCALAR_FIELDS and key not in STRING_FIELDS and key not in NESTED_FIELDS
+                    and key != RELATED_FIELD):
+                extra[key] = value
+
+        values = [movie.get(field) for field in STRING_FIELDS]
+        nulls = 0
+        for bit, (field, value) in enumerate(zip(STRING_FIELDS, values)):
+            if value is None:
+                nulls |= 1 << bit
+                if field in movie:
+                    extra[field] = None
+        encoded.nulls.append(nulls)
+
+        values.append(json.dumps(extra, separators=(',', ':')))
+        values.append((movie.get('title') or '').lower())
+        values.append((movie.get('description') or '').lower())
+        for name, value in zip(STRING_COLUMNS, values):
+            lengths, blob = strings[name]
+            data = (value or '').encode('utf-8')
+            lengths.append(len(data))
+            blob += data
+
+        encoded.genres.append(tuple(dict.fromkeys(g.lower() for g in movie.get('genre') or ())))
+    return encoded
+
+
+class _StringColumn:
+    """An offsets array plus a UTF-8 blob spooled to a temporary file."""
+
+    def __init__(self):
+        self.offsets = array('Q', [0])
+        self.blob = tempfile.TemporaryFile()
+        self.size = 0
+
+    def append(self, value):
+        data = (value or '').encode('utf-8')
+        self.blob.write(data)
+        self.size += len(data)
+        self.offsets.append(self.size)
+
+    def extend(self, lengths, data):
+        self.blob.write(data)
+        self.offsets.extend(islice(accumulate(lengths, initial=self.size), 1, None))
+        self.size += len(data)
+
+
+class ColumnarWriter:
+    """Stream movie records (JSON shape) into a columnar catalog file.
+
+    Fixed-width columns are kept in compact arrays and string data is spooled
+    to temporary files, so memory stays small however many rows are written.
+    The file is assembled on close() and atomically moved into place.
+    """
+
+    chunk_size = 10000
+
+    def __init__(self, path):
+        self.path = path
+        self._ids = array('q')
+        self._ratings = array('d')
+        self._years = array('i')
+        self._durations = array('i')
+        self._nulls = array('B')
+        self._strings = {name: _StringColumn() for name in STRING_COLUMNS}
+        # lowercase genre -> rows
+        self._postings = {}
+        self._related_offsets = array('Q', [0])
+        self._related_ids = array('q')
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._discard()
+
+    def append(self, movie):
+        self.append_encoded(encode_rows([movie]))
+
+    def extend(self, movies):
+        movies = iter(movies)
+        while True:
+            chunk = list(islice(movies, self.chunk_size))
+            if not chunk:
+                break
+            self.append_encoded(encode_rows(chunk))
+
+    def append_encoded(self, encoded):
+        """Append a batch produced by encode_rows."""
+        first = len(self._ids)
+        self._ids.extend(encoded.ids)
+        self._ratings.extend(encoded.ratings)
+        self._years.extend(encoded.years)
+        self._durations.extend(encoded.durations)
+        self._nulls.extend(encoded.nulls)
+        for name, (lengths, data) in encoded.strings.items():
+            self._strings[name].extend(lengths, data)
+        self._related_offsets.extend(
+            islice(accumulate(encoded.related_counts, initial=self._related_offsets[-1]), 1, None))
+        self._related_ids.extend(encoded.related_ids)
+
+        postings = self._postings
+        for row, genres in enumerate(encoded.genres, first):
+            for genre in genres:
+                rows = postings.get(genre)
+                if rows is None:
+                    rows = postings[genre] = array('Q')
+                rows.append(row)
+
+    def close(self):
+        """Assemble the catalog file from the buffered columns."""
+        columns = [
+            ('id', 'q', self._ids),
+            ('rating', 'd', self._ratings),
+            ('releaseYear', 'i', self._years),
+            ('duration', 'i', self._durations),
+            ('nulls', 'B', self._nulls),
+        ]
+        for name, column in self._strings.items():
+            columns.append((name + '.offsets', 'Q', column.offsets))
+            columns.append((name + '.blob', 'B', column))
+
+        # Sorted id -> row table for O(log n) lookups without building a dict
+        ids = self._ids
+        order = sorted(range(len(ids)), key=ids.__getitem__)
+        columns.append(('sorted.ids', 'q', array('q', (ids[row] for row in order))))
+        columns.append(('sorted.rows', 'Q', array('Q', order)))
+        del order
+
+        # Genre posting table: names, offsets into the row list, and rows
+        names = _StringColumn()
+        genre_offsets = array('Q', [0])
+        genre_rows = array('Q')
+        for genre, rows in self._postings.items():
+            names.append(genre)
+            genre_rows.extend(rows)
+            genre_offsets.append(len(genre_rows))
+        columns.append(('genre.names.offsets', 'Q', names.offsets))
+        columns.append(('genre.names.blob', 'B', names))
+        columns.append(('genre.offsets', 'Q', genre_offsets))
+        columns.append(('genre.rows', 'Q', genre_rows))
+
+        # Related ids as positions into their sorted distinct values
+        labels = array('q', sorted(set(self._related_ids)))
+        position = {movie_id: i for i, movie_id in enumerate(labels)}
+        columns.append(('related.offsets', 'Q', self._related_offsets))
+        columns.append(('related.targets', 'i', array('i', map(position.__getitem__, self._related_ids))))
+        columns.append(('related.labels', 'q', labels))
+        del position
+
+        offset = HEADER.size + ENTRY.size * len(columns)
+        offset += _pad(offset)
+        directory = []
+        for name, typecode, values in columns:
+            if isinstance(values, _StringColumn):
+                count = size = values.size
+            else:
+                count, size = len(values), len(values) * values.itemsize
+            directory.append((name, typecode, offset, count, values))
+            offset += size + _pad(size)
+
+        byteorder = b'<' if sys.byteorder == 'little' else b'>'
+        partial = self.path + '.partial'
+        with open(partial, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, byteorder, len(columns), len(ids)))
+            for name, typecode, start, count, _ in directory:
+                f.write(ENTRY.pack(name.encode('ascii'), typecode.encode('ascii'), start, count))
+            f.write(b'\0' * _pad(f.tell()))
+            for _, _, start, _, values in directory:
+                if isinstance(values, _StringColumn):
+                    values.blob.seek(0)
+                    shutil.copyfileobj(values.blob, f)
+                else:
+                    values.tofile(f)
+                f.write(b'\0' * _pad(f.tell()))
+        names.blob.close()
+        self._discard()
+        # Replacing (not rewriting) the file keeps existing maps of it valid
+        os.replace(partial, self.path)
+
+    def _discard(self):
+        for column in self._strings.values():
+            column.blob.close()
+
+
+def write_catalog(path, movies):
+    """Write movie records (JSON shape) to a columnar catalog file."""
+    with ColumnarWriter(path) as writer:
+        writer.extend(movies)
+
+
+class ColumnarCatalog:
+    """Read-only view over a columnar catalog file.
+
+    Records are materialized on access as dicts in the same JSON shape the
+    handlers already serve, so they drop in wherever a catalog record does.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mm)
+
+        magic, byteorder, ncols, nrows = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a PopcornHub catalog file")
+        native = b'<' if sys.byteorder == 'little' else b'>'
+        if byteorder != native:
+            raise ValueError(f"{path} was written with a different byte order")
+
+        self._columns = {}
+        for i in range(ncols):
+            name, typecode, start, count = ENTRY.unpack_from(self._mm, HEADER.size + i * ENTRY.size)
+            name = name.rstrip(b'\0').decode('ascii')
+            typecode = typecode.rstrip(b'\0').decode('ascii')
+            size = struct.calcsize(typecode)
+            self._columns[name] = view[start:start + count * size].cast(typecode)
+        self._rows = nrows
+
+        self._ids = self._columns['id']
+        self._sorted_ids = self._columns['sorted.ids']
+        self._sorted_rows = self._columns['sorted.rows']
+        self._genre_names = {
+            self._string('genre.names', i): i
+            for i in range(len(self._columns['genre.offsets']) - 1)
+        }
+
+    def __len__(self):
+        return self._rows
+
+    def __contains__(self, movie_id):
+        return self.row_of(movie_id) >= 0
+
+    def close(self):
+        self._columns.clear()
+        self._ids = self._sorted_ids = self._sorted_rows = None
+        self._mm.close()
+
+    def _string(self, name, row):
+        offsets = self._columns[name + '.offsets']
+        return str(self._columns[name + '.blob'][offsets[row]:offsets[row + 1]], 'utf-8')
+
+    def row_of(self, movie_id):
+        """Return the row holding an id, or -1."""
+        i = bisect.bisect_left(self._sorted_ids, movie_id)
+        if i < self._rows and self._sorted_ids[i] == movie_id:
+            return self._sorted_rows[i]
+        return -1
+
+    def id_at(self, row):
+        return self._ids[row]
+
+    def ids(self):
+        """Return all ids in file order."""
+        return self._ids.tolist()
+
+    def iter_ids(self):
+        """Iterate over ids in file order without copying the column."""
+        return iter(self._ids)
+
+    def related_ids(self, row):
+        """Return the ids of the relatedMovies stored for a row."""
+        offsets = self._columns.get('related.offsets')
+        if offsets is None:
+            # Files written before the related columns embed the records
+            return related_ids(json.loads(self._string('extra', row)))
+        labels = self._columns['related.labels']
+        return [labels[i] for i in self._columns['related.targets'][offsets[row]:offsets[row + 1]]]
+
+    def record(self, row):
+        """Materialize the record stored at a row (without relatedMovies,
+        which are served from related_ids)."""
+        extra = json.loads(self._string('extra', row))
+        extra.pop(RELATED_FIELD, None)
+        rating = self._columns['rating'][row]
+        year = self._columns['releaseYear'][row]
+        minutes = self._columns['duration'][row]
+        # Files written before the null flags have a value for every field
+        nulls = self._columns['nulls'][row] if 'nulls' in self._columns else 0
+
+        movie = {
+            'id': self._ids[row],
+            'title': self._string('title', row),
+            'description': self._string('description', row),
+            'genre': extra.pop('genre', []),
+            'rating': None if math.isnan(rating) else rating,
+            'releaseYear': None if year < 0 else year,
+            'director': self._string('director', row),
+            'cast': extra.pop('cast', []),
+            'poster': self._string('poster', row),
+            'trailerUrl': self._string('trailerUrl', row),
+        }
+        for bit, field in enumerate(STRING_FIELDS):
+            if nulls >> bit & 1:
+                del movie[field]
+        if minutes >= 0:
+            movie['duration'] = format_duration(minutes)
+        # Null fields and durations not in "<n> min" form
+        movie.update(extra)
+        return movie
+
+    def get(self, movie_id):
+        """Return the record for an id, or None."""
+        row = self.row_of(movie_id)
+        return self.record(row) if row >= 0 else None
+
+    def genres(self):
+        """Return the lowercase genre names in the file."""
+        return list(self._genre_names)
+
+    def genre_rows(self, genre):
+        """Return the rows tagged with a lowercase genre name."""
+        i = self._genre_names.get(genre)
+        if i is None:
+            return []
+        offsets = self._columns['genre.offsets']
+        return self._columns['genre.rows'][offsets[i]:offsets[i + 1]].tolist()
+
+    def text(self, row):
+        """Return the stored lowercase (title, description) for a row."""
+        return self._string('title_lc', row), self._string('description_lc', row)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 2:
+        print("Usage: python -m catalog.columnar <movies.json|movies.jsonl> <output.phcat>")
+        return 1
+
+    source, output = argv
+    with open(source, 'r') as f:
+        if source.endswith('.jsonl'):
+            movies = [json.loads(line) for line in f if line.strip()]
+        else:
+            movies = json.load(f)
+    write_catalog(output, movies)
+
+    print(f"Wrote {len(movies)} movies to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,41 @@
+"""
+Catalog Cursors
+
+Opaque page tokens for keyset pagination of catalog listings.
+
+A cursor holds the catalog position of the last record on the previous page,
+the newest position that existed when the listing started, and the catalog
+version it was issued at. The next page seeks past the first position rather
+than skipping `offset` records, so every page costs the same as the first.
+Records added after the listing started sort after the second position and
+are left out, so pages do not shift while a client scrolls.
+
+Positions are only meaningful to the process that issued them; a cursor
+from a newer catalog version than the current one (for example from before a
+restart) is rejected.
+"""
+
+import base64
+import struct
+
+# version, last position returned, newest position at the first page
+_FORMAT = '>qqq'
+
+
+def encode_cursor(version, after, until):
+    """Return the token for the page following position `after`."""
+    raw = struct.pack(_FORMAT, version, after, until)
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode('ascii')
+
+
+def decode_cursor(token, version):
+    """Return (after, until) for a token, checked against the current catalog
+    version. Raises ValueError for a malformed or unusable cursor."""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        issued, after, until = struct.unpack(_FORMAT, raw)
+    except (ValueError, struct.error):
+        raise ValueError("invalid cursor")
+    if issued > version or after > until:
+        raise ValueError("cursor has expired")
+    return after, until
@@ -0,0 +1,306 @@
+"""
+Catalog Facets
+
+Bitmap-backed filtering and facet counts for the browse page.
+
+Each record occupies a slot in a set of NumPy columns (release year,
+rating, runtime, director code), and each genre keeps a boolean bitmap over
+the slots. A combined filter (genres with AND/OR, year and runtime ranges,
+minimum rating, director) is evaluated as vectorized comparisons and
+bitwise intersections of those columns, and facet counts for the matching
+set come from the same mask: a popcount per genre bitmap and a bincount
+per column.
+
+Slots are reused after a record is removed; the catalog position of each
+slot is kept alongside so results come back in catalog order, and so a page
+can start right after the last position of the previous one (see
+cursor.py).
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+from .cursor import decode_cursor, encode_cursor
+from .index import CatalogIndex
+from .store import normalize
+
+INITIAL_CAPACITY = 1024
+# Directors listed in the facet counts, most frequent first
+DIRECTOR_FACETS = 20
+
+MATCH_ANY = 'any'
+MATCH_ALL = 'all'
+
+# Query parameter, select() keyword and type of each filter
+FILTER_PARAMS = [
+    ('genres', 'genres', list),
+    ('genreMatch', 'genre_match', str),
+    ('yearFrom', 'year_from', int),
+    ('yearTo', 'year_to', int),
+    ('minRating', 'min_rating', float),
+    ('minRuntime', 'min_runtime', int),
+    ('maxRuntime', 'max_runtime', int),
+    ('director', 'director', str),
+]
+
+# A page of matching ids, the number of matches, their facet counts (or
+# None) and the cursor of the following page (or None)
+Selection = namedtuple('Selection', 'ids total facets next_cursor')
+
+COLUMNS = {
+    'id': (np.int64, 0),
+    'order': (np.int64, 0),
+    'live': (np.bool_, False),
+    'year': (np.int32, -1),
+    'rating': (np.float64, np.nan),
+    'runtime': (np.int32, -1),
+    'director': (np.int32, -1),
+}
+
+
+def _runtime(movie):
+    # Imported here so `python -m catalog.columnar` does not find the module
+    # already loaded through the package
+    from .columnar import parse_duration
+
+    minutes = parse_duration(movie.get('duration'))
+    return minutes if minutes is not None else -1
+
+
+def parse_filters(args):
+    """Read the filters present in request query args (a MultiDict).
+    Raises ValueError naming the parameter whose value is not a number."""
+    filters = {}
+    for param, name, kind in FILTER_PARAMS:
+        if kind is list:
+            values = args.getlist(param)
+            if values:
+                filters[name] = values
+        else:
+            value = args.get(param)
+            if value:
+                try:
+                    filters[name] = kind(value)
+                except ValueError:
+                    expected = 'an integer' if kind is int else 'a number'
+                    raise ValueError(f"Query parameter '{param}' must be {expected}") from None
+    return filters
+
+
+class FacetIndex(CatalogIndex):
+    def __init__(self, store=None):
+        super().__init__(store)
+
+        self._columns = {name: np.full(0, fill, dtype) for name, (dtype, fill) in COLUMNS.items()}
+        # lowercase genre -> bitmap over slots, and its display name
+        self._genres = {}
+        self._genre_names = {}
+        # lowercase director -> code, and code -> display name
+        self._director_codes = {}
+        self._director_names = []
+
+        # id -> slot; slot -> its lowercase genres
+        self._slots = {}
+        self._slot_genres = {}
+        self._free = []
+        self._size = 0
+
+    def __len__(self):
+        return len(self._slots)
+
+    def _grow(self):
+        capacity = max(INITIAL_CAPACITY, 2 * len(self._columns['id']))
+        for name, (dtype, fill) in COLUMNS.items():
+            column = np.full(capacity, fill, dtype)
+            column[:self._size] = self._columns[name][:self._size]
+            self._columns[name] = column
+        for genre, bitmap in self._genres.items():
+            grown = np.zeros(capacity, np.bool_)
+            grown[:self._size] = bitmap[:self._size]
+            self._genres[genre] = grown
+
+    def _apply(self, old, new):
+        if old is not None and (new is None or new['id'] != old['id']):
+            self._remove(old['id'])
+        if new is not None:
+            self._set(new)
+
+    def _set(self, movie):
+        movie_id = movie['id']
+        columns = self._columns
+        slot = self._slots.get(movie_id)
+        if slot is None:
+            if self._free:
+                slot = self._free.pop()
+            else:
+                if self._size == len(columns['id']):
+                    self._grow()
+                slot = self._size
+                self._size += 1
+            self._slots[movie_id] = slot
+            columns['id'][slot] = movie_id
+            columns['order'][slot] = self._position(movie_id)
+            columns['live'][slot] = True
+        else:
+            self._clear_genres(slot)
+
+        year = movie.get('releaseYear')
+        rating = movie.get('rating')
+        columns['year'][slot] = year if year is not None else -1
+        columns['rating'][slot] = rating if rating is not None else np.nan
+        columns['runtime'][slot] = _runtime(movie)
+        columns['director'][slot] = self._director_code(movie.get('director'))
+
+        genres = []
+        for name in movie.get('genre') or ():
+            genre = normalize(name)
+            bitmap = self._genres.get(genre)
+            if bitmap is None:
+                bitmap = self._genres[genre] = np.zeros(len(columns['id']), np.bool_)
+                self._genre_names[genre] = name
+            bitmap[slot] = True
+            genres.append(genre)
+        self._slot_genres[slot] = genres
+
+    def _remove(self, movie_id):
+        slot = self._slots.pop(movie_id, None)
+        if slot is None:
+            return
+        self._clear_genres(slot)
+        del self._slot_genres[slot]
+        for name, (_, fill) in COLUMNS.items():
+            self._columns[name][slot] = fill
+        self._free.append(slot)
+
+    def _clear_genres(self, slot):
+        for genre in self._slot_genres.get(slot, ()):
+            self._genres[genre][slot] = False
+
+    def _director_code(self, director):
+        if not director:
+            return -1
+        key = normalize(director)
+        code = self._director_codes.get(key)
+        if code is None:
+            code = self._director_codes[key] = len(self._director_names)
+            self._director_names.append(director)
+        return code
+
+    def _genre_bitmap(self, genre):
+        bitmap = self._genres.get(normalize(genre))
+        if bitmap is None:
+            return np.zeros(self._size, np.bool_)
+        return bitmap[:self._size]
+
+    def _mask(self, within=None, genre=None, genres=None, genre_match=MATCH_ANY,
+              year_from=None, year_to=None, min_rating=None,
+              min_runtime=None, max_runtime=None, director=None):
+        size = self._size
+        columns = {name: column[:size] for name, column in self._columns.items()}
+        mask = columns['live'].copy()
+
+        if genre:
+            mask &= self._genre_bitmap(genre)
+        if genres:
+            bitmaps = [self._genre_bitmap(name) for name in genres]
+            if genre_match == MATCH_ALL:
+                mask &= np.logical_and.reduce(bitmaps)
+            else:
+                mask &= np.logical_or.reduce(bitmaps)
+        # Unknown years and runtimes are stored as -1, unknown ratings as NaN,
+        # so they never satisfy a bound
+        if year_from is not None:
+            mask &= columns['year'] >= year_from
+        if year_to is not None:
+            mask &= (columns['year'] <= year_to) & (columns['year'] >= 0)
+        if min_rating is not None:
+            mask &= columns['rating'] >= min_rating
+        if min_runtime is not None:
+            mask &= columns['runtime'] >= min_runtime
+        if max_runtime is not None:
+            mask &= (columns['runtime'] <= max_runtime) & (columns['runtime'] >= 0)
+        if director:
+            code = self._director_codes.get(normalize(director), -2)
+            mask &= columns['director'] == code
+        if within is not None:
+            allowed = np.zeros(size, np.bool_)
+            slots = self._slots
+            allowed[[slots[i] for i in within if i in slots]] = True
+            mask &= allowed
+        return mask
+
+    def _facets(self, mask):
+        columns = {name: column[:self._size][mask] for name, column in self._columns.items()
+                   if name in ('year', 'rating', 'director')}
+
+        genres = {}
+        for genre, bitmap in self._genres.items():
+            count = int(np.count_nonzero(bitmap[:self._size] & mask))
+            if count:
+                genres[self._genre_names[genre]] = count
+
+        years = columns['year'][columns['year'] >= 0]
+        values, counts = np.unique(years, return_counts=True)
+
+        ratings = columns['rating'][~np.isnan(columns['rating'])]
+        buckets = np.bincount(np.floor(ratings).astype(np.int64), minlength=0) if len(ratings) else []
+
+        directors = columns['director'][columns['director'] >= 0]
+        director_counts = np.bincount(directors) if len(directors) else np.zeros(0, np.int64)
+        top = np.argsort(-director_counts, kind='stable')[:DIRECTOR_FACETS]
+
+        return {
+            'genre': dict(sorted(genres.items(), key=lambda item: (-item[1], item[0]))),
+            'releaseYear': {str(year): int(count) for year, count in zip(values, counts)},
+            'rating': {str(bucket): int(count) for bucket, count in enumerate(buckets) if count},
+            'director': {self._director_names[code]: int(director_counts[code])
+                         for code in top if director_counts[code]},
+        }
+
+    def select(self, within=None, facets=False, limit=None, offset=0, cursor=None, **filters):
+        """Return a Selection of the records matching the filters.
+
+        Ids are in catalog order; `within` optionally restricts the result
+        to a set of ids (e.g. text matches). Facet counts describe the whole
+        matching set and are None unless `facets` is set.
+
+        Up to `limit` ids are returned, starting after the page a `cursor`
+        (see cursor.py) points past, or else after skipping `offset`
+        matches. `next_cursor` is set when more matches follow the page.
+        Raises ValueError for an invalid cursor, a `limit` below 1 or a
+        negative `offset`.
+        """
+        if limit is not None and limit < 1:
+            raise ValueError("limit must be at least 1")
+        if offset < 0:
+            raise ValueError("offset must not be negative")
+        self._ensure_built()
+        version = self._store.version if self._store is not None else 0
+        after, until = decode_cursor(cursor, version) if cursor else (None, None)
+        if cursor:
+            offset = 0
+
+        with self._lock:
+            if until is None:
+                until = self._high_water()
+            mask = self._mask(within, **filters)
+            order = self._columns['order'][:self._size]
+            mask &= order <= until
+            total = int(np.count_nonzero(mask))
+            counts = self._facets(mask) if facets else None
+
+            if after is not None:
+                mask &= order > after
+            slots = np.flatnonzero(mask)
+            keys = order[slots]
+            stop = offset + limit if limit is not None else None
+            more = stop is not None and stop < len(slots)
+            if more:
+                # Only the first `stop` positions need sorting
+                first = np.argpartition(keys, stop - 1)[:stop]
+                slots, keys = slots[first], keys[first]
+            ranked = np.argsort(keys, kind='stable')[offset:]
+            ids = self._columns['id'][slots[ranked]].tolist()
+            next_cursor = encode_cursor(version, int(keys[ranked[-1]]), until) if more and ids else None
+        return Selection(ids, total, counts, next_cursor)
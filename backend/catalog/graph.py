@@ -0,0 +1,115 @@
+"""
+Catalog Related Graph
+
+Each record's relatedMovies as ids only, in a compressed sparse row (CSR)
+adjacency list instead of embedded copies of the related titles.
+
+Copies of the title, poster and rating of every related movie duplicate
+those fields across the catalog and go stale as soon as the related title
+changes. The graph keeps just the edges: the source ids (sorted int64), an
+int64 offset per source into the edge list, and the edges themselves as
+int32 positions into a sorted table of the distinct target ids. Handlers
+hydrate the targets from the store with one multi-get when a movie is
+served (see related.related_movies), so updating a title's rating touches
+that one record and nothing that links to it.
+
+Changes go to an overlay, which is merged into the arrays by compact():
+once per bulk load, and by maybe_compact() after single changes once the
+overlay grows past a fraction of the graph.
+"""
+
+import threading
+
+import numpy as np
+
+# Overlay entries tolerated before maybe_compact() merges them
+MIN_COMPACT = 1024
+COMPACT_FRACTION = 0.125
+
+
+def related_ids(movie):
+    """Return the ids of a record's relatedMovies, in order."""
+    return [related['id'] for related in movie.get('relatedMovies') or ()]
+
+
+class RelatedGraph:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (source ids, offsets into targets, targets, target ids), replaced
+        # as a whole so readers never see a half-merged graph
+        self._csr = (np.empty(0, np.int64), np.zeros(1, np.int64),
+                     np.empty(0, np.int32), np.empty(0, np.int64))
+        # id -> tuple of related ids (None if removed) since the last compact
+        self._changes = {}
+
+    @property
+    def nbytes(self):
+        """Bytes held by the compacted arrays."""
+        return sum(array.nbytes for array in self._csr)
+
+    def get(self, movie_id):
+        """Return the related ids of a movie, in order ([] if it has none)."""
+        changed = self._changes.get(movie_id, self)
+        if changed is not self:
+            return list(changed or ())
+        sources, offsets, targets, labels = self._csr
+        i = int(np.searchsorted(sources, movie_id))
+        if i < len(sources) and sources[i] == movie_id:
+            return labels[targets[offsets[i]:offsets[i + 1]]].tolist()
+        return []
+
+    def set(self, movie_id, ids):
+        """Replace the related ids of a movie."""
+        with self._lock:
+            self._changes[movie_id] = tuple(ids)
+
+    def discard(self, movie_id):
+        """Forget a movie's related ids."""
+        with self._lock:
+            self._changes[movie_id] = None
+
+    def maybe_compact(self):
+        """Compact if the overlay has outgrown its share of the graph."""
+        with self._lock:
+            if len(self._changes) > max(MIN_COMPACT, COMPACT_FRACTION * len(self._csr[0])):
+                self._compact()
+
+    def compact(self):
+        """Merge the pending changes into the CSR arrays."""
+        with self._lock:
+            self._compact()
+
+    def _compact(self):
+        changes = self._changes
+        if not changes:
+            return
+        sources, offsets, targets, labels = self._csr
+
+        # Edges of the sources no change touches
+        counts = np.diff(offsets)
+        changed = np.fromiter(changes, np.int64, len(changes))
+        kept = ~np.isin(sources, changed)
+        owners = np.repeat(np.arange(len(sources)), counts)
+        kept_targets = labels[targets[kept[owners]]]
+
+        # Plus the changed sources that still have a list
+        present = [(movie_id, ids) for movie_id, ids in changes.items() if ids is not None]
+        new_sources = np.array([movie_id for movie_id, _ in present], np.int64)
+        new_counts = np.array([len(ids) for _, ids in present], np.int64)
+        new_targets = np.fromiter((i for _, ids in present for i in ids), np.int64, int(new_counts.sum()))
+
+        all_sources = np.concatenate([sources[kept], new_sources])
+        all_counts = np.concatenate([counts[kept], new_counts])
+        all_targets = np.concatenate([kept_targets, new_targets])
+        starts = np.concatenate([[0], np.cumsum(all_counts)[:-1]]).astype(np.int64)
+
+        # Reorder whole segments by source id
+        order = np.argsort(all_sources, kind='stable')
+        all_sources, all_counts, starts = all_sources[order], all_counts[order], starts[order]
+        offsets = np.zeros(len(all_sources) + 1, np.int64)
+        np.cumsum(all_counts, out=offsets[1:])
+        edges = np.repeat(starts - offsets[:-1], all_counts) + np.arange(offsets[-1])
+        labels, targets = np.unique(all_targets[edges], return_inverse=True)
+
+        self._csr = (all_sources, offsets, targets.astype(np.int32), labels)
+        self._changes = {}
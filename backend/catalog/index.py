@@ -0,0 +1,83 @@
+"""
+Catalog Index
+
+Base class for the derived indexes kept next to a CatalogStore (search,
+autocomplete, ...). An index is built lazily on first use from a snapshot of
+the store, then follows the store's change events so it never goes stale.
+"""
+
+import threading
+
+# Catalog positions of records not in a columnar base start here
+OVERLAY = 1 << 40
+
+
+class CatalogIndex:
+    def __init__(self, store=None):
+        self._lock = threading.RLock()
+        self._build_lock = threading.Lock()
+
+        self._store = store
+        self._built = store is None
+        # id -> record (or None once removed) collected while building
+        self._pending = None
+        self._next_position = 0
+
+    def _ensure_built(self):
+        """Index the store on first use and follow its changes after that."""
+        if self._built:
+            return
+        with self._build_lock:
+            if self._built:
+                return
+            with self._lock:
+                self._pending = {}
+            # Replayed records and any changes racing with the build land in
+            # _pending; the bulk build then sees each record exactly once
+            self._store.subscribe(self.update, replay=True)
+            with self._lock:
+                movies = [movie for movie in self._pending.values() if movie is not None]
+                self._pending = None
+                self._build(movies)
+                self._built = True
+
+    def update(self, old, new):
+        """Apply a catalog change: `old` is unindexed, `new` is indexed."""
+        with self._lock:
+            if self._pending is not None:
+                if old is not None:
+                    self._pending[old['id']] = None
+                if new is not None:
+                    self._pending[new['id']] = new
+                return
+            self._apply(old, new)
+
+    def add(self, movie):
+        self.update(None, movie)
+
+    def remove(self, movie):
+        self.update(movie, None)
+
+    def _position(self, movie_id):
+        """Return a sort key for a newly indexed id that follows the store's
+        catalog order: rows of the columnar base first, then other records in
+        the order they were added."""
+        row = self._store.base_row(movie_id) if self._store is not None else -1
+        if row >= 0:
+            return row
+        self._next_position += 1
+        return OVERLAY + self._next_position
+
+    def _high_water(self):
+        """Return the newest position handed out so far; every record
+        indexed from now on sorts after it (base rows re-added after a
+        removal excepted)."""
+        return OVERLAY + self._next_position
+
+    def _build(self, movies):
+        """Index a full snapshot of the catalog. Override for bulk builds."""
+        for movie in movies:
+            self._apply(None, movie)
+
+    def _apply(self, old, new):
+        raise NotImplementedError
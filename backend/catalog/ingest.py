@@ -0,0 +1,357 @@
+"""
+Catalog Ingest
+
+Bulk-load movie records from CSV or JSONL into a columnar catalog file (or
+into a CatalogStore when called from Python).
+
+The source is streamed in fixed-size chunks. Each chunk is parsed and
+validated against the Movie / CastMember / RelatedMovie models in a process
+pool, and only a bounded number of chunks are in flight at once, so memory
+use does not grow with the size of the input. Rows that fail validation are
+reported (and optionally written to a rejects file) without stopping the
+load.
+
+CSV columns use the API's JSON field names. List-of-string fields (genre,
+awards) are separated by "|", and cast / relatedMovies hold JSON arrays.
+
+Usage:
+    python -m catalog.ingest movies.csv catalog.phcat
+    python -m catalog.ingest movies.jsonl catalog.phcat --workers 8 --rejects rejects.jsonl
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from .columnar import ColumnarWriter, encode_rows, parse_duration
+
+# The generated API models (models.*) import `popcornhub_api` from here
+GENERATED_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'generated')
+if GENERATED_DIR not in sys.path:
+    sys.path.append(GENERATED_DIR)
+
+DEFAULT_CHUNK_SIZE = 5000
+PROGRESS_INTERVAL = 2.0
+LIST_SEPARATOR = '|'
+
+# Ranges of the columnar file's fixed-width columns (see columnar.py)
+INT64_MIN, INT64_MAX = -2 ** 63, 2 ** 63 - 1
+INT32_MAX = 2 ** 31 - 1
+
+# Populated on first use in each worker process
+_SCHEMAS = {}
+_VALIDATORS = {}
+
+
+class _Invalid(ValueError):
+    def __init__(self, message, path=''):
+        super().__init__(message)
+        self.message = message
+        self.path = path
+
+
+def _schema(klass):
+    """Return {json key: (attribute, type)} for a generated model class."""
+    schema = _SCHEMAS.get(klass)
+    if schema is None:
+        model = klass()
+        schema = {
+            model.attribute_map[attr]: (attr, kind)
+            for attr, kind in model.openapi_types.items()
+        }
+        _SCHEMAS[klass] = schema
+    return schema
+
+
+def _is_list(kind):
+    return getattr(kind, '__origin__', None) is list
+
+
+def _validator(kind):
+    """Compile (once) a function validating a JSON value against a type.
+
+    The generated models describe their fields in `openapi_types`; turning
+    that into nested closures up front keeps per-row validation to plain
+    type checks. Paths for error messages are only built on failure.
+    """
+    check = _VALIDATORS.get(kind)
+    if check is not None:
+        return check
+
+    if kind is float:
+        def check(value):
+            if type(value) is float:
+                return value
+            if type(value) is int:
+                return float(value)
+            raise _Invalid("expected a number")
+    elif kind in (int, str):
+        expected = "an integer" if kind is int else "a string"
+
+        def check(value):
+            if type(value) is not kind:
+                raise _Invalid(f"expected {expected}")
+            return value
+    elif _is_list(kind):
+        item = _validator(kind.__args__[0])
+
+        def check(value):
+            if type(value) is not list:
+                raise _Invalid("expected a list")
+            result = []
+            for i, element in enumerate(value):
+                try:
+                    result.append(item(element))
+                except _Invalid as e:
+                    e.path = f"[{i}]{e.path}"
+                    raise
+            return result
+    else:
+        fields = {}
+
+        def check(value):
+            if type(value) is not dict:
+                raise _Invalid("expected an object")
+            record = {}
+            for key, element in value.items():
+                field = fields.get(key)
+                if field is None:
+                    raise _Invalid("unknown field", f".{key}")
+                if element is not None:
+                    try:
+                        record[key] = field(element)
+                    except _Invalid as e:
+                        e.path = f".{key}{e.path}"
+                        raise
+            return record
+
+        # Registered before compiling fields so recursive models terminate
+        _VALIDATORS[kind] = check
+        fields.update((key, _validator(field_kind)) for key, (_, field_kind) in _schema(kind).items())
+
+    _VALIDATORS[kind] = check
+    return check
+
+
+def validate_movie(record):
+    """Validate a movie record (JSON shape); returns it normalized.
+
+    Raises ValueError describing the first problem found.
+    """
+    from models.movie import Movie
+
+    try:
+        movie = _validator(Movie)(record)
+    except _Invalid as e:
+        raise ValueError(f"movie{e.path}: {e.message}")
+    if 'id' not in movie:
+        raise ValueError("movie.id: required")
+    if not movie.get('title'):
+        raise ValueError("movie.title: required")
+    if not INT64_MIN <= movie['id'] <= INT64_MAX:
+        raise ValueError("movie.id: out of range")
+    for i, related in enumerate(movie.get('relatedMovies') or ()):
+        if 'id' not in related:
+            raise ValueError(f"movie.relatedMovies[{i}].id: required")
+        if not INT64_MIN <= related['id'] <= INT64_MAX:
+            raise ValueError(f"movie.relatedMovies[{i}].id: out of range")
+    rating = movie.get('rating')
+    if rating is not None and not 0 <= rating <= 10:
+        raise ValueError("movie.rating: must be between 0 and 10")
+    year = movie.get('releaseYear')
+    if year is not None and not 0 <= year <= INT32_MAX:
+        raise ValueError("movie.releaseYear: out of range")
+    minutes = parse_duration(movie.get('duration'))
+    if minutes is not None and minutes > INT32_MAX:
+        raise ValueError("movie.duration: out of range")
+    return movie
+
+
+def _coerce_csv(row):
+    """Convert a CSV row (all strings) into a JSON-shaped record."""
+    from models.movie import Movie
+
+    schema = _schema(Movie)
+    record = {}
+    for key, text in row.items():
+        if text is None or text == '':
+            continue
+        kind = schema[key][1] if key in schema else str
+        try:
+            if kind is int:
+                record[key] = int(text)
+            elif kind is float:
+                record[key] = float(text)
+            elif _is_list(kind) and kind.__args__[0] is str:
+                record[key] = [part.strip() for part in text.split(LIST_SEPARATOR) if part.strip()]
+            elif _is_list(kind):
+                record[key] = json.loads(text)
+            else:
+                record[key] = text
+        except ValueError:
+            raise ValueError(f"movie.{key}: cannot parse {text!r}")
+    return record
+
+
+def _process_chunk(fmt, header, first, rows, encode):
+    """Parse and validate one chunk; runs in a worker process.
+
+    Returns (valid rows, their row numbers, [(row number, error), ...]).
+    Valid rows are an EncodedRows batch when `encode` is set, else a list of
+    records.
+    """
+    valid = []
+    numbers = []
+    rejects = []
+    for number, row in enumerate(rows, first):
+        try:
+            if fmt == 'jsonl':
+                record = json.loads(row)
+            else:
+                if len(row) != len(header):
+                    raise ValueError(f"expected {len(header)} columns, got {len(row)}")
+                record = _coerce_csv(dict(zip(header, row)))
+            valid.append(validate_movie(record))
+            numbers.append(number)
+        except ValueError as e:
+            rejects.append((number, str(e)))
+    return (encode_rows(valid) if encode else valid), numbers, rejects
+
+
+def _read_chunks(path, fmt, chunk_size):
+    """Yield (header, first row number, rows) chunks from a source file."""
+    with open(path, 'r', newline='', encoding='utf-8') as f:
+        if fmt == 'jsonl':
+            header = None
+            lines = (line for line in f if line.strip())
+        else:
+            lines = csv.reader(f)
+            header = next(lines, None) or []
+        first = 1
+        while True:
+            rows = list(islice(lines, chunk_size))
+            if not rows:
+                break
+            yield header, first, rows
+            first += len(rows)
+
+
+def _detect_format(path):
+    return 'csv' if path.lower().endswith('.csv') else 'jsonl'
+
+
+def ingest(source, output=None, store=None, fmt=None, workers=None,
+           chunk_size=DEFAULT_CHUNK_SIZE, rejects=None, progress=None):
+    """Load `source` into a columnar file at `output` and/or a CatalogStore.
+
+    `rejects` may be a path; each rejected row is written to it as a JSON
+    line. `progress`, if given, is called with the running stats dict.
+    Returns the final stats dict.
+    """
+    if output is None and store is None:
+        raise ValueError("ingest needs an output path or a store")
+    fmt = fmt or _detect_format(source)
+    workers = workers or os.cpu_count() or 1
+    encode = store is None
+
+    writer = ColumnarWriter(output) if output else None
+    rejects_file = open(rejects, 'w') if rejects else None
+    seen = set()
+    stats = {'rows': 0, 'accepted': 0, 'rejected': 0, 'seconds': 0.0, 'rows_per_second': 0.0}
+    started = last_report = time.perf_counter()
+
+    def collect(future):
+        nonlocal last_report
+        valid, numbers, bad = future.result()
+        ids = valid.ids if encode else [m['id'] for m in valid]
+
+        # Ids must be unique across the whole load, which only this process sees
+        keep = []
+        for i, movie_id in enumerate(ids):
+            if movie_id in seen:
+                bad.append((numbers[i], f"movie.id: duplicate id {movie_id}"))
+            else:
+                seen.add(movie_id)
+                keep.append(i)
+        if len(keep) != len(ids):
+            valid = valid.select(keep) if encode else [valid[i] for i in keep]
+
+        if writer is not None:
+            if encode:
+                writer.append_encoded(valid)
+            else:
+                writer.extend(valid)
+        if store is not None:
+            store.load(valid)
+
+        stats['accepted'] += len(valid)
+        stats['rejected'] += len(bad)
+        if rejects_file:
+            for number, error in bad:
+                rejects_file.write(json.dumps({'row': number, 'error': error}) + '\n')
+
+        now = time.perf_counter()
+        stats['rows'] = stats['accepted'] + stats['rejected']
+        stats['seconds'] = now - started
+        stats['rows_per_second'] = stats['rows'] / stats['seconds'] if stats['seconds'] else 0.0
+        if progress and now - last_report >= PROGRESS_INTERVAL:
+            last_report = now
+            progress(stats)
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            for header, first, rows in _read_chunks(source, fmt, chunk_size):
+                pending.append(pool.submit(_process_chunk, fmt, header, first, rows, encode))
+                # Bound the number of chunks held in memory at once
+                while len(pending) >= workers * 2:
+                    collect(pending.popleft())
+            while pending:
+                collect(pending.popleft())
+        if writer is not None:
+            writer.close()
+    except BaseException:
+        if writer is not None:
+            writer._discard()
+        raise
+    finally:
+        if rejects_file:
+            rejects_file.close()
+
+    stats['seconds'] = time.perf_counter() - started
+    stats['rows_per_second'] = stats['rows'] / stats['seconds'] if stats['seconds'] else 0.0
+    return stats
+
+
+def _report(stats):
+    print(f"{stats['rows']} rows ({stats['rejected']} rejected), "
+          f"{stats['rows_per_second']:.0f} rows/s", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk-load movies into a columnar catalog file.")
+    parser.add_argument('source', help="CSV or JSONL file of movie records")
+    parser.add_argument('output', help="columnar catalog file to write")
+    parser.add_argument('--format', choices=['csv', 'jsonl'], help="source format (default: from extension)")
+    parser.add_argument('--workers', type=int, help="worker processes (default: CPU count)")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="rows per chunk")
+    parser.add_argument('--rejects', help="write rejected rows to this JSONL file")
+    args = parser.parse_args(argv)
+
+    stats = ingest(args.source, output=args.output, fmt=args.format, workers=args.workers,
+                   chunk_size=args.chunk_size, rejects=args.rejects, progress=_report)
+
+    print(f"Ingested {stats['accepted']} movies into {args.output} "
+          f"({stats['rejected']} rejected) in {stats['seconds']:.1f}s, "
+          f"{stats['rows_per_second']:.0f} rows/s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+"""
+Catalog Ranking
+
+Rating-ordered views of the catalog: the global leaderboard and one per
+genre.
+
+Two orderings are kept sorted as records are added, re-rated or removed:
+by raw rating, and by a vote-weighted (Bayesian) rating that pulls titles
+with few votes towards the catalog mean:
+
+    weighted = (votes * rating + min_votes * mean) / (votes + min_votes)
+
+Each genre keeps both orderings of its own titles too, so a top-N request,
+for the whole catalog or one genre, is a slice of an already sorted list
+whatever the catalog size. The mean used for the weighted keys is frozen
+when they are computed and only refreshed (with a full re-sort) once the
+live mean has drifted by more than MEAN_TOLERANCE, rather than on every
+change.
+"""
+
+import math
+from bisect import bisect_left, insort
+
+from .index import CatalogIndex
+from .store import normalize
+
+DEFAULT_MIN_VOTES = 1000
+MEAN_TOLERANCE = 0.01
+
+
+def _rating_key(rating, movie_id):
+    # Highest rated first; unrated titles last; ties by id
+    return (-rating if rating is not None else math.inf, movie_id)
+
+
+class RatingIndex(CatalogIndex):
+    def __init__(self, store=None, min_votes=DEFAULT_MIN_VOTES):
+        super().__init__(store)
+        self.min_votes = min_votes
+
+        # id -> (rating, votes, lowercase genres)
+        self._ratings = {}
+        # Sorted (key, id) lists, best first
+        self._by_rating = []
+        self._by_weighted = []
+        # lowercase genre -> its sorted lists, and its display name
+        self._genre_by_rating = {}
+        self._genre_by_weighted = {}
+        self._genre_names = {}
+
+        # Running totals for the catalog mean, and the mean the weighted
+        # keys were computed with
+        self._rating_sum = 0.0
+        self._rated = 0
+        self._mean = 0.0
+
+    def __len__(self):
+        return len(self._ratings)
+
+    @property
+    def mean(self):
+        """The mean rating over all rated titles."""
+        return self._rating_sum / self._rated if self._rated else 0.0
+
+    def _weighted_key(self, movie_id, rating, votes):
+        if rating is None:
+            return (math.inf, movie_id)
+        weighted = (votes * rating + self.min_votes * self._mean) / (votes + self.min_votes or 1)
+        return (-weighted, movie_id)
+
+    def _entry(self, movie):
+        genres = []
+        for name in movie.get('genre') or ():
+            genre = normalize(name)
+            self._genre_names.setdefault(genre, name)
+            if genre not in genres:
+                genres.append(genre)
+        return movie.get('rating'), movie.get('votes') or 0, tuple(genres)
+
+    def _build(self, movies):
+        self._ratings = {movie['id']: self._entry(movie) for movie in movies}
+        rated = [rating for rating, _, _ in self._ratings.values() if rating is not None]
+        self._rating_sum = float(sum(rated))
+        self._rated = len(rated)
+        self._by_rating = sorted(
+            _rating_key(rating, movie_id) for movie_id, (rating, _, _) in self._ratings.items())
+        self._genre_by_rating = {}
+        for key in self._by_rating:
+            for genre in self._ratings[key[1]][2]:
+                # Appending in global order keeps each genre list sorted
+                self._genre_by_rating.setdefault(genre, []).append(key)
+        self._reweight()
+
+    def _reweight(self):
+        """Recompute the weighted orderings against the current mean."""
+        self._mean = self.mean
+        self._by_weighted = sorted(
+            self._weighted_key(movie_id, rating, votes)
+            for movie_id, (rating, votes, _) in self._ratings.items())
+        self._genre_by_weighted = {}
+        for key in self._by_weighted:
+            for genre in self._ratings[key[1]][2]:
+                self._genre_by_weighted.setdefault(genre, []).append(key)
+
+    def _apply(self, old, new):
+        if old is not None and new is not None and old['id'] == new['id']:
+            if self._ratings.get(new['id']) == self._entry(new):
+                # Edits that keep the rating, votes and genres do not move
+                # the title
+                return
+        if old is not None:
+            self._remove(old['id'])
+        if new is not None:
+            self._add(new)
+        if abs(self.mean - self._mean) > MEAN_TOLERANCE:
+            self._reweight()
+
+    def _add(self, movie):
+        movie_id = movie['id']
+        if movie_id in self._ratings:
+            self._remove(movie_id)
+        rating, votes, genres = self._ratings[movie_id] = self._entry(movie)
+        if rating is not None:
+            self._rating_sum += rating
+            self._rated += 1
+        for entries, key in self._orderings(movie_id, rating, votes, genres):
+            insort(entries, key)
+
+    def _remove(self, movie_id):
+        entry = self._ratings.pop(movie_id, None)
+        if entry is None:
+            return
+        rating, votes, genres = entry
+        if rating is not None:
+            self._rating_sum -= rating
+            self._rated -= 1
+        for entries, key in self._orderings(movie_id, rating, votes, genres):
+            del entries[bisect_left(entries, key)]
+        for genre in genres:
+            if not self._genre_by_rating[genre]:
+                del self._genre_by_rating[genre]
+                del self._genre_by_weighted[genre]
+
+    def _orderings(self, movie_id, rating, votes, genres):
+        """Yield (sorted list, key) for every list a title belongs in."""
+        key = _rating_key(rating, movie_id)
+        weighted_key = self._weighted_key(movie_id, rating, votes)
+        yield self._by_rating, key
+        yield self._by_weighted, weighted_key
+        for genre in genres:
+            yield self._genre_by_rating.setdefault(genre, []), key
+            yield self._genre_by_weighted.setdefault(genre, []), weighted_key
+
+    def top(self, limit=None, offset=0, weighted=False, genre=None):
+        """Return the ids of the best rated titles, best first, optionally
+        within a genre (case-insensitive)."""
+        self._ensure_built()
+        stop = offset + limit if limit is not None else None
+        with self._lock:
+            if genre is None:
+                entries = self._by_weighted if weighted else self._by_rating
+            else:
+                lists = self._genre_by_weighted if weighted else self._genre_by_rating
+                entries = lists.get(normalize(genre), ())
+            return [movie_id for _, movie_id in entries[offset:stop]]
+
+    def genres(self):
+        """Return [(genre, number of titles)], most titles first, then by
+        name; genres keep the spelling they were first seen with."""
+        self._ensure_built()
+        with self._lock:
+            counts = [(self._genre_names[genre], len(entries))
+                      for genre, entries in self._genre_by_rating.items()]
+        return sorted(counts, key=lambda item: (-item[1], item[0].lower()))
@@ -0,0 +1,319 @@
+"""
+Catalog Related Movies
+
+Content-based "related movies", computed offline into a neighbor table.
+
+Every title is described by TF-IDF vectors over its description words and
+its director and cast names, weighted by DESCRIPTION_WEIGHT / PEOPLE_WEIGHT
+and L2-normalized, plus a separate TF-IDF vector over its genres. Neighbors
+are found by multiplying blocks of rows against the whole (sparse) matrix,
+so memory is bounded by the block size rather than by the square of the
+catalog, and blocks are spread over a process pool. Genres are shared by a
+large part of any catalog and would make those products dense, so they are
+left out of the search and only re-rank each title's best CANDIDATES:
+
+    score = (1 - GENRE_WEIGHT) * content cosine + GENRE_WEIGHT * genre cosine
+
+The result is a compact table: ids sorted ascending, then for each id the
+rows (int32, -1 padded) and scores (float32) of its best `neighbors`. It is
+written to a memory-mapped file read by RelatedTable.
+
+Usage:
+    python -m catalog.related catalog/data/movies.json related.phrel
+    python -m catalog.related catalog.phcat related.phrel --neighbors 10 --workers 8
+"""
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+MAGIC = b'PHREL001'
+HEADER = struct.Struct('=8s1sxxxIQ')
+ALIGN = 8
+
+DEFAULT_NEIGHBORS = 10
+DEFAULT_BLOCK_SIZE = 1024
+# Content matches kept per title before genres re-rank them
+CANDIDATES = 4 * DEFAULT_NEIGHBORS
+
+DESCRIPTION_WEIGHT = 1.0
+PEOPLE_WEIGHT = 0.5
+GENRE_WEIGHT = 0.25
+# Description words used by more than this share of the catalog say nothing
+MAX_DOCUMENT_FREQUENCY = 0.5
+
+# Set in each worker process by _init_worker
+_MATRICES = None
+
+
+def _tokens(values):
+    return values
+
+
+def _tfidf(documents, **options):
+    """Return the TF-IDF matrix of some documents (no columns if nothing
+    survives the vocabulary pruning)."""
+    from scipy import sparse
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    try:
+        return TfidfVectorizer(dtype=np.float32, **options).fit_transform(documents)
+    except ValueError:
+        # Empty vocabulary
+        return sparse.csr_matrix((len(documents), 0), dtype=np.float32)
+
+
+def vectorize(movies):
+    """Return the content matrix (sparse) and the genre matrix (dense, as
+    genres are few), with one L2-normalized row per movie."""
+    from scipy import sparse
+    from sklearn.preprocessing import normalize
+
+    descriptions = [movie.get('description') or '' for movie in movies]
+    people = [
+        [name for name in [movie.get('director')] + [member.get('name') for member in movie.get('cast') or ()]
+         if name]
+        for movie in movies
+    ]
+    genres = [[genre.lower() for genre in movie.get('genre') or ()] for movie in movies]
+
+    max_df = MAX_DOCUMENT_FREQUENCY if len(movies) > 2 else 1.0
+    content = sparse.hstack([
+        DESCRIPTION_WEIGHT * _tfidf(descriptions, stop_words='english', sublinear_tf=True, max_df=max_df),
+        PEOPLE_WEIGHT * _tfidf(people, analyzer=_tokens, lowercase=False),
+    ], format='csr', dtype=np.float32)
+    genre = _tfidf(genres, analyzer=_tokens, lowercase=False)
+    return normalize(content), normalize(genre).toarray()
+
+
+def _init_worker(content, genre):
+    global _MATRICES
+    _MATRICES = (content, content.T.tocsr(), genre)
+
+
+def _neighbor_block(start, stop, neighbors):
+    """Return (start, rows, scores) of the best neighbors for rows
+    start..stop."""
+    content, transposed, genre = _MATRICES
+    products = (content[start:stop] @ transposed).tocsr()
+
+    # Best content matches of each row of the block
+    candidates = max(CANDIDATES, neighbors)
+    owners, others, similarity = [], [], []
+    for i in range(stop - start):
+        lo, hi = products.indptr[i], products.indptr[i + 1]
+        row_others = products.indices[lo:hi]
+        row_similarity = products.data[lo:hi]
+        keep = row_others != start + i
+        row_others, row_similarity = row_others[keep], row_similarity[keep]
+        if len(row_others) > candidates:
+            best = np.argpartition(-row_similarity, candidates - 1)[:candidates]
+            row_others, row_similarity = row_others[best], row_similarity[best]
+        owners.append(np.full(len(row_others), i, np.int64))
+        others.append(row_others)
+        similarity.append(row_similarity)
+    owners = np.concatenate(owners) if owners else np.empty(0, np.int64)
+    others = np.concatenate(others) if others else np.empty(0, np.int32)
+    similarity = np.concatenate(similarity) if similarity else np.empty(0, np.float32)
+
+    # Re-rank them all at once with the genre cosine (genre rows are dense)
+    shared = np.einsum('ij,ij->i', genre[owners + start], genre[others])
+    combined = (1 - GENRE_WEIGHT) * similarity + GENRE_WEIGHT * shared
+    order = np.lexsort((others, -combined, owners))
+    owners, others, combined = owners[order], others[order], combined[order]
+    rank = np.arange(len(owners)) - np.searchsorted(owners, owners)
+    keep = rank < neighbors
+
+    rows = np.full((stop - start, neighbors), -1, np.int32)
+    scores = np.zeros((stop - start, neighbors), np.float32)
+    rows[owners[keep], rank[keep]] = others[keep]
+    scores[owners[keep], rank[keep]] = combined[keep]
+    return start, rows, scores
+
+
+def build_related(movies, neighbors=DEFAULT_NEIGHBORS, block_size=DEFAULT_BLOCK_SIZE,
+                  workers=None, progress=None):
+    """Compute the neighbor table of a list of movie records.
+
+    Returns (ids, rows, scores): ids sorted ascending, and for each the
+    (len(ids), neighbors) arrays of neighbor rows (-1 padded) and scores.
+    `progress`, if given, is called with the number of rows done.
+    """
+    movies = sorted(movies, key=lambda movie: movie['id'])
+    ids = np.array([movie['id'] for movie in movies], dtype=np.int64)
+    content, genre = vectorize(movies)
+    del movies
+
+    size = len(ids)
+    rows = np.full((size, neighbors), -1, np.int32)
+    scores = np.zeros((size, neighbors), np.float32)
+    blocks = [(start, min(start + block_size, size)) for start in range(0, size, block_size)]
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(blocks) <= 1:
+        _init_worker(content, genre)
+        results = (_neighbor_block(start, stop, neighbors) for start, stop in blocks)
+        pool = None
+    else:
+        # With the fork start method the matrices are inherited, not pickled
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                   initargs=(content, genre))
+        results = pool.map(_neighbor_block, *zip(*blocks), [neighbors] * len(blocks))
+    try:
+        done = 0
+        for start, block_rows, block_scores in results:
+            rows[start:start + len(block_rows)] = block_rows
+            scores[start:start + len(block_rows)] = block_scores
+            done += len(block_rows)
+            if progress:
+                progress(done)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return ids, rows, scores
+
+
+def _pad(length):
+    return (-length) % ALIGN
+
+
+def write_related(path, ids, rows, scores):
+    """Write a neighbor table file, atomically replacing `path`."""
+    neighbors = rows.shape[1] if rows.ndim == 2 else 0
+    byteorder = b'<' if sys.byteorder == 'little' else b'>'
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, byteorder, neighbors, len(ids)))
+            f.write(b'\0' * _pad(HEADER.size))
+            for column in (np.ascontiguousarray(ids, np.int64),
+                           np.ascontiguousarray(rows, np.int32),
+                           np.ascontiguousarray(scores, np.float32)):
+                data = column.tobytes()
+                f.write(data)
+                f.write(b'\0' * _pad(len(data)))
+        os.replace(temp, path)
+    except BaseException:
+        os.unlink(temp)
+        raise
+
+
+class RelatedTable:
+    """Read-only view over a neighbor table file (see write_related)."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, byteorder, neighbors, size = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a PopcornHub related movies file")
+        native = b'<' if sys.byteorder == 'little' else b'>'
+        if byteorder != native:
+            raise ValueError(f"{path} was written with a different byte order")
+
+        offset = HEADER.size + _pad(HEADER.size)
+        self._ids = np.frombuffer(self._mm, np.int64, size, offset)
+        offset += self._ids.nbytes + _pad(self._ids.nbytes)
+        self._rows = np.frombuffer(self._mm, np.int32, size * neighbors, offset).reshape(size, neighbors)
+        offset += self._rows.nbytes + _pad(self._rows.nbytes)
+        self._scores = np.frombuffer(self._mm, np.float32, size * neighbors, offset).reshape(size, neighbors)
+        self.neighbors = neighbors
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __contains__(self, movie_id):
+        return self._row_of(movie_id) >= 0
+
+    def _row_of(self, movie_id):
+        row = int(np.searchsorted(self._ids, movie_id))
+        if row < len(self._ids) and self._ids[row] == movie_id:
+            return row
+        return -1
+
+    def related(self, movie_id, limit=None):
+        """Return the ids of the titles most similar to a movie, most
+        similar first (None if the table does not know the movie)."""
+        row = self._row_of(movie_id)
+        if row < 0:
+            return None
+        rows = self._rows[row][:limit]
+        return self._ids[rows[rows >= 0]].tolist()
+
+    def scores(self, movie_id):
+        """Return [(id, score)] for the neighbors of a movie."""
+        row = self._row_of(movie_id)
+        if row < 0:
+            return []
+        rows = self._rows[row]
+        kept = rows >= 0
+        return list(zip(self._ids[rows[kept]].tolist(), self._scores[row][kept].tolist()))
+
+
+def related_movies(store, movie, table=None, limit=None):
+    """Return the relatedMovies entries for a record, hydrated from the
+    store with one multi-get: from the neighbor table when there is one that
+    lists neighbors for the movie, otherwise from the store's related graph
+    (the curated lists the records were loaded with). Unknown ids are
+    dropped."""
+    ids = table.related(movie['id'], limit) if table is not None else None
+    if not ids:
+        ids = store.related_ids(movie['id'])[:limit]
+    return [
+        {'id': other['id'], 'title': other.get('title'), 'poster': other.get('poster'),
+         'rating': other.get('rating')}
+        for other in store.get_many(ids)
+    ]
+
+
+def load_movies(source):
+    """Read movie records from a JSON, JSONL or columnar catalog file."""
+    if source.endswith('.phcat'):
+        from .columnar import ColumnarCatalog
+
+        catalog = ColumnarCatalog(source)
+        return [catalog.record(row) for row in range(len(catalog))]
+    with open(source, 'r') as f:
+        if source.endswith('.jsonl'):
+            return [json.loads(line) for line in f if line.strip()]
+        return json.load(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precompute content-based related movies.")
+    parser.add_argument('source', help="movies (JSON, JSONL or a columnar .phcat catalog)")
+    parser.add_argument('output', help="neighbor table file to write")
+    parser.add_argument('--neighbors', type=int, default=DEFAULT_NEIGHBORS, help="related movies per title")
+    parser.add_argument('--block-size', type=int, default=DEFAULT_BLOCK_SIZE, help="rows per product block")
+    parser.add_argument('--workers', type=int, help="worker processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    movies = load_movies(args.source)
+    total = len(movies)
+
+    def report(done):
+        print(f"{done}/{total} movies", file=sys.stderr)
+
+    ids, rows, scores = build_related(movies, args.neighbors, args.block_size, args.workers,
+                                      progress=report if total > args.block_size else None)
+    write_related(args.output, ids, rows, scores)
+
+    print(f"Wrote {int(np.count_nonzero(rows >= 0))} related movies for {len(ids)} titles "
+          f"(up to {args.neighbors} each) to {args.output} in {time.perf_counter() - started:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
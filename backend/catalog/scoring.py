@@ -0,0 +1,276 @@
+"""
+Catalog Scoring
+
+Weighted ranking of the whole catalog in one vectorized pass.
+
+Each record occupies a row of a float32 feature matrix, every feature scaled
+to about [0, 1]:
+
+    rating      rating / 10
+    weighted    vote-weighted (Bayesian) rating / 10, as in ranking.py
+    year        release year between YEAR_FLOOR and YEAR_CEILING
+    popularity  log10(1 + votes) / POPULARITY_SCALE
+    genres      one column per genre, 1 where the title has it
+
+A ranking is a weight per feature, so the scores of every title come from a
+single matrix-vector product, and the top k from an argpartition of those
+rather than a sort. Genre weights are usually a taste profile: the share of
+a watchlist's titles in each genre.
+
+Rows are reused after a record is removed, like the slots of facets.py.
+The weighted column is computed against a frozen catalog mean and refreshed
+in one vectorized pass once the live mean drifts by more than
+MEAN_TOLERANCE.
+"""
+
+import numpy as np
+
+from .index import CatalogIndex
+from .ranking import DEFAULT_MIN_VOTES, MEAN_TOLERANCE
+from .store import normalize
+
+INITIAL_CAPACITY = 1024
+INITIAL_GENRES = 32
+
+YEAR_FLOOR = 1900
+YEAR_CEILING = 2030
+# log10 of the vote count that scores a full 1.0 of popularity
+POPULARITY_SCALE = 7.0
+
+# Default weight of each feature; `genre` scales the taste profile
+DEFAULT_WEIGHTS = {
+    'rating': 1.0,
+    'year': 0.0,
+    'popularity': 0.1,
+    'genre': 0.5,
+}
+
+RATING, WEIGHTED, YEAR, POPULARITY = range(4)
+FEATURES = 4
+
+
+class ScoreIndex(CatalogIndex):
+    def __init__(self, store=None, weights=None, min_votes=DEFAULT_MIN_VOTES):
+        super().__init__(store)
+        self.weights = dict(DEFAULT_WEIGHTS, **(weights or {}))
+        self.min_votes = min_votes
+
+        # Rows of features (fixed columns, then genres); raw rating (NaN when
+        # unrated) and votes per row for the weighted column
+        self._features = np.zeros((0, FEATURES + INITIAL_GENRES), np.float32)
+        self._ratings = np.full(0, np.nan)
+        self._votes = np.zeros(0)
+        self._ids = np.zeros(0, np.int64)
+        self._live = np.zeros(0, np.bool_)
+
+        # lowercase genre -> column
+        self._genre_columns = {}
+        # id -> row
+        self._rows = {}
+        self._free = []
+        self._size = 0
+
+        # Running totals for the catalog mean, and the mean the weighted
+        # column was computed with
+        self._rating_sum = 0.0
+        self._rated = 0
+        self._mean = 0.0
+
+    def __len__(self):
+        return len(self._rows)
+
+    @property
+    def mean(self):
+        """The mean rating over all rated titles."""
+        return self._rating_sum / self._rated if self._rated else 0.0
+
+    def _grow(self):
+        capacity = max(INITIAL_CAPACITY, 2 * len(self._ids))
+        features = np.zeros((capacity, self._features.shape[1]), np.float32)
+        features[:self._size] = self._features[:self._size]
+        self._features = features
+        for name, fill in (('_ratings', np.nan), ('_votes', 0), ('_ids', 0), ('_live', False)):
+            column = getattr(self, name)
+            grown = np.full(capacity, fill, column.dtype)
+            grown[:self._size] = column[:self._size]
+            setattr(self, name, grown)
+
+    def _genre_column(self, name):
+        genre = normalize(name)
+        column = self._genre_columns.get(genre)
+        if column is None:
+            column = self._genre_columns[genre] = FEATURES + len(self._genre_columns)
+            if column == self._features.shape[1]:
+                features = np.zeros((len(self._features), 2 * column - FEATURES), np.float32)
+                features[:, :column] = self._features
+                self._features = features
+        return column
+
+    def _weighted(self, ratings, votes):
+        weighted = (votes * ratings + self.min_votes * self._mean) / np.maximum(votes + self.min_votes, 1)
+        return np.where(np.isnan(ratings), 0, weighted) / 10
+
+    def _reweight(self):
+        """Recompute the weighted column against the current mean."""
+        self._mean = self.mean
+        size = self._size
+        self._features[:size, WEIGHTED] = self._weighted(self._ratings[:size], self._votes[:size])
+
+    def _build(self, movies):
+        size = len(movies)
+        while len(self._ids) < size:
+            self._grow()
+        self._size = size
+        self._rows = {movie['id']: row for row, movie in enumerate(movies)}
+        self._ids[:size] = [movie['id'] for movie in movies]
+        self._live[:size] = True
+
+        ratings = np.array([movie.get('rating') for movie in movies], np.float64)
+        votes = np.array([movie.get('votes') or 0 for movie in movies], np.float64)
+        years = np.array([movie.get('releaseYear') for movie in movies], np.float64)
+        self._ratings[:size] = ratings
+        self._votes[:size] = votes
+        rated = ~np.isnan(ratings)
+        self._rating_sum = float(ratings[rated].sum())
+        self._rated = int(rated.sum())
+
+        rows, columns = [], []
+        for row, movie in enumerate(movies):
+            for name in movie.get('genre') or ():
+                rows.append(row)
+                columns.append(self._genre_column(name))
+
+        features = self._features
+        features[:size, RATING] = np.where(rated, ratings, 0) / 10
+        features[:size, YEAR] = np.where(
+            np.isnan(years), 0, np.clip((years - YEAR_FLOOR) / (YEAR_CEILING - YEAR_FLOOR), 0, 1))
+        features[:size, POPULARITY] = np.minimum(np.log10(1 + votes) / POPULARITY_SCALE, 1)
+        features[rows, columns] = 1
+        self._reweight()
+
+    def _apply(self, old, new):
+        if old is not None and (new is None or new['id'] != old['id']):
+            self._remove(old['id'])
+        if new is not None:
+            self._set(new)
+        if abs(self.mean - self._mean) > MEAN_TOLERANCE:
+            self._reweight()
+
+    def _set(self, movie):
+        movie_id = movie['id']
+        row = self._rows.get(movie_id)
+        if row is None:
+            if self._free:
+                row = self._free.pop()
+            else:
+                if self._size == len(self._ids):
+                    self._grow()
+                row = self._size
+                self._size += 1
+            self._rows[movie_id] = row
+            self._ids[row] = movie_id
+            self._live[row] = True
+        else:
+            self._unrate(row)
+
+        rating = movie.get('rating')
+        votes = movie.get('votes') or 0
+        year = movie.get('releaseYear')
+        self._ratings[row] = rating if rating is not None else np.nan
+        self._votes[row] = votes
+        if rating is not None:
+            self._rating_sum += rating
+            self._rated += 1
+
+        features = self._features[row]
+        features[:] = 0
+        features[RATING] = rating / 10 if rating is not None else 0
+        features[WEIGHTED] = self._weighted(np.float64(self._ratings[row]), votes)
+        if year is not None:
+            features[YEAR] = min(max(year - YEAR_FLOOR, 0) / (YEAR_CEILING - YEAR_FLOOR), 1)
+        features[POPULARITY] = min(np.log10(1 + votes) / POPULARITY_SCALE, 1)
+        for name in movie.get('genre') or ():
+            column = self._genre_column(name)
+            # The matrix may have been widened
+            self._features[row, column] = 1
+
+    def _unrate(self, row):
+        if not np.isnan(self._ratings[row]):
+            self._rating_sum -= self._ratings[row]
+            self._rated -= 1
+
+    def _remove(self, movie_id):
+        row = self._rows.pop(movie_id, None)
+        if row is None:
+            return
+        self._unrate(row)
+        self._features[row] = 0
+        self._ratings[row] = np.nan
+        self._votes[row] = 0
+        self._live[row] = False
+        self._free.append(row)
+
+    def _rows_of(self, movie_ids):
+        rows = [self._rows.get(movie_id) for movie_id in movie_ids]
+        return np.array([row for row in rows if row is not None], np.int64)
+
+    def taste(self, movie_ids):
+        """Return the genre profile of some titles: the share of them in
+        each genre, as weights over the genre columns."""
+        self._ensure_built()
+        with self._lock:
+            rows = self._rows_of(movie_ids)
+            if not len(rows):
+                return np.zeros(0, np.float32)
+            return self._features[rows, FEATURES:FEATURES + len(self._genre_columns)].mean(axis=0)
+
+    def scores(self, weighted=False, taste=None, genres=None, exclude=(), **weights):
+        """Return (ids, scores) of every row under the given weights; rows
+        of removed or excluded titles score -inf.
+
+        `taste` is a genre profile (see taste()); `genres` maps genre names
+        to extra weights. Other keywords override DEFAULT_WEIGHTS.
+        """
+        self._ensure_built()
+        weights = dict(self.weights, **weights)
+        with self._lock:
+            size = self._size
+            vector = np.zeros(self._features.shape[1], np.float32)
+            vector[WEIGHTED if weighted else RATING] = weights['rating']
+            vector[YEAR] = weights['year']
+            vector[POPULARITY] = weights['popularity']
+            if taste is not None and len(taste):
+                vector[FEATURES:FEATURES + len(taste)] += weights['genre'] * taste
+            for name, weight in (genres or {}).items():
+                column = self._genre_columns.get(normalize(name))
+                if column is not None:
+                    vector[column] += weight
+
+            scores = self._features[:size] @ vector
+            scores[~self._live[:size]] = -np.inf
+            scores[self._rows_of(exclude)] = -np.inf
+            return self._ids[:size].copy(), scores
+
+    def top(self, limit=None, weighted=False, taste=(), genres=None, **weights):
+        """Return the ids of the best scoring titles, best first.
+
+        `taste` is a list of movie ids (e.g. a watchlist): titles in their
+        genres score higher, and the titles themselves are left out.
+        """
+        taste = list(taste)
+        profile = self.taste(taste) if taste else None
+        ids, scores = self.scores(weighted, profile, genres, exclude=taste, **weights)
+
+        live = np.isfinite(scores)
+        available = int(live.sum())
+        if limit is not None and limit < available:
+            if not limit:
+                return []
+            # Every title tied with the k-th, so ties are cut by id below
+            cutoff = scores[np.argpartition(-scores, limit - 1)[limit - 1]]
+            best = np.flatnonzero(scores >= cutoff)
+        else:
+            best = np.flatnonzero(live)
+        # Best first, ties by id
+        best = best[np.lexsort((ids[best], -scores[best]))][:limit]
+        return ids[best].tolist()
@@ -0,0 +1,258 @@
+"""
+Catalog Search
+
+A tokenized inverted index over the catalog, scored with BM25.
+
+Title, description, director and cast names are indexed as separate fields
+with their own length normalization and boost. Query terms are processed
+rarest first; once the top-k is settled enough that the remaining (common)
+terms cannot lift a new document into it, those terms only rescore existing
+candidates instead of walking their full posting lists. The top-k itself
+comes from a heap rather than sorting every match, and recent results are
+cached until the next catalog change.
+
+Query terms the index has never seen are treated as typos: with a
+SpellingIndex attached, they are replaced by the nearest title words (see
+spelling.py), scored at a discount per edit, so fuzzy matches merge into the
+same ranking below equally good exact ones. An unknown last term is first
+read as a word still being typed: it stands for the (most common) indexed
+words it is a prefix of, so `incep` finds Inception as the substring filter
+it replaced did.
+
+The index subscribes to a CatalogStore, so it stays consistent as records
+are added, replaced or removed.
+"""
+
+import bisect
+import heapq
+import math
+import re
+from collections import Counter, OrderedDict
+
+from .index import CatalogIndex
+
+TOKEN_PATTERN = re.compile(r'[^\W_]+')
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+CACHE_SIZE = 256
+
+# Score multiplier per edit for spelling corrections, and how many unknown
+# terms of one query are corrected
+FUZZY_WEIGHT = 0.5
+MAX_FUZZY_TERMS = 4
+
+# An unknown last term at least this long is expanded to up to
+# MAX_PREFIX_TERMS indexed words starting with it
+MIN_PREFIX_LENGTH = 3
+MAX_PREFIX_TERMS = 20
+
+FIELD_BOOSTS = {
+    'title': 3.0,
+    'director': 2.0,
+    'cast': 2.0,
+    'description': 1.0,
+}
+
+
+def tokenize(text):
+    """Split text into lowercase word tokens."""
+    return TOKEN_PATTERN.findall((text or '').lower())
+
+
+def movie_fields(movie):
+    """Return {field: tokens} for the searchable fields of a record."""
+    cast = ' '.join(member.get('name') or '' for member in movie.get('cast') or ())
+    return {
+        'title': tokenize(movie.get('title')),
+        'director': tokenize(movie.get('director')),
+        'cast': tokenize(cast),
+        'description': tokenize(movie.get('description')),
+    }
+
+
+class SearchIndex(CatalogIndex):
+    def __init__(self, store=None, boosts=None, spelling=None):
+        super().__init__(store)
+        self.boosts = dict(boosts or FIELD_BOOSTS)
+        # Corrects query terms missing from the index
+        self.spelling = spelling
+
+        # field -> term -> {id: term frequency}
+        self._postings = {field: {} for field in self.boosts}
+        # field -> {id: field length in tokens}
+        self._lengths = {field: {} for field in self.boosts}
+        # field -> total tokens, for the average field length
+        self._total_lengths = dict.fromkeys(self.boosts, 0)
+        # term -> number of documents containing it in any field
+        self._df = Counter()
+        self._docs = 0
+        # Sorted terms of _df for prefix lookups, rebuilt after new terms
+        self._vocabulary = None
+
+        # Recent results, dropped whenever the index changes
+        self._cache = OrderedDict()
+
+    def __len__(self):
+        return self._docs
+
+    def _apply(self, old, new):
+        self._cache.clear()
+        if old is not None:
+            self._remove(old)
+        if new is not None:
+            self._add(new)
+
+    def _add(self, movie):
+        movie_id = movie['id']
+        if movie_id in self._lengths['title']:
+            return
+        terms = set()
+        for field, tokens in movie_fields(movie).items():
+            postings = self._postings[field]
+            for term, tf in Counter(tokens).items():
+                postings.setdefault(term, {})[movie_id] = tf
+                terms.add(term)
+            self._lengths[field][movie_id] = len(tokens)
+            self._total_lengths[field] += len(tokens)
+        if self._vocabulary is not None and not terms <= self._df.keys():
+            self._vocabulary = None
+        self._df.update(terms)
+        self._docs += 1
+
+    def _remove(self, movie):
+        movie_id = movie['id']
+        if movie_id not in self._lengths['title']:
+            return
+        terms = set()
+        for field, tokens in movie_fields(movie).items():
+            postings = self._postings[field]
+            self._total_lengths[field] -= self._lengths[field].pop(movie_id)
+            for term in set(tokens):
+                posting = postings.get(term)
+                if posting is not None and posting.pop(movie_id, None) is not None:
+                    terms.add(term)
+                    if not posting:
+                        del postings[term]
+        for term in terms:
+            self._df[term] -= 1
+            if self._df[term] <= 0:
+                del self._df[term]
+                self._vocabulary = None
+        self._docs -= 1
+
+    def _idf(self, term):
+        df = self._df.get(term, 0)
+        # The "+1" keeps idf positive for terms found in most documents
+        return math.log((self._docs - df + 0.5) / (df + 0.5) + 1.0)
+
+    def completions(self, prefix):
+        """Return the indexed terms starting with `prefix`, at most
+        MAX_PREFIX_TERMS of them: the most common first, then by term."""
+        with self._lock:
+            if self._vocabulary is None:
+                self._vocabulary = sorted(self._df)
+            vocabulary = self._vocabulary
+            start = bisect.bisect_left(vocabulary, prefix)
+            stop = bisect.bisect_left(vocabulary, prefix + '\U0010ffff', start)
+            df = self._df
+            return heapq.nsmallest(MAX_PREFIX_TERMS, vocabulary[start:stop], key=lambda term: (-df[term], term))
+
+    def _expand(self, terms):
+        """Return {term: weight}, replacing an unknown last term by the
+        words it begins and other unknown terms by corrections."""
+        weights = {}
+        fuzzy = 0
+        last = terms[-1]
+        if last not in self._df and len(last) >= MIN_PREFIX_LENGTH:
+            completions = self.completions(last)
+            if completions:
+                terms = terms[:-1]
+                weights.update(dict.fromkeys(completions, 1.0))
+        for term in terms:
+            if term in self._df or self.spelling is None or fuzzy >= MAX_FUZZY_TERMS:
+                weights[term] = 1.0
+                continue
+            fuzzy += 1
+            for correction, distance in self.spelling.suggest(term):
+                weight = FUZZY_WEIGHT ** distance
+                if weight > weights.get(correction, 0.0):
+                    weights[correction] = weight
+        return weights
+
+    def _score_term(self, term, idf, scores, candidates_only):
+        for field, boost in self.boosts.items():
+            posting = self._postings[field].get(term)
+            if not posting:
+                continue
+            lengths = self._lengths[field]
+            average = self._total_lengths[field] / self._docs or 1.0
+            weight = boost * idf * (K1 + 1)
+            norm = K1 * (1 - B)
+            scale = K1 * B / average
+            if candidates_only:
+                for movie_id in scores:
+                    tf = posting.get(movie_id)
+                    if tf:
+                        scores[movie_id] += weight * tf / (tf + norm + scale * lengths[movie_id])
+            else:
+                for movie_id, tf in posting.items():
+                    score = weight * tf / (tf + norm + scale * lengths[movie_id])
+                    scores[movie_id] = scores.get(movie_id, 0.0) + score
+
+    def search(self, query, limit=None):
+        """Return [(id, score)] for the best matches, best first (at most
+        `limit`, which is at least 1, when given)."""
+        self._ensure_built()
+        if limit is not None:
+            limit = max(limit, 1)
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        # Outside the index lock: the spelling index takes the store lock
+        weights = self._expand(terms)
+
+        with self._lock:
+            key = (tuple(weights.items()), limit)
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return list(cached)
+            if not self._docs:
+                return []
+            idfs = {term: self._idf(term) * weight for term, weight in weights.items() if term in self._df}
+            # Rarest (highest idf) terms first
+            terms = sorted(idfs, key=idfs.get, reverse=True)
+            # A term can add at most boost * idf * (k1 + 1) per field it occurs in
+            bounds = [
+                idfs[term] * (K1 + 1) * sum(
+                    boost for field, boost in self.boosts.items() if term in self._postings[field])
+                for term in terms
+            ]
+
+            scores = {}
+            candidates_only = False
+            for i, term in enumerate(terms):
+                if limit and not candidates_only and len(scores) >= limit:
+                    # No unseen document can beat the current k-th score if
+                    # every remaining term together scores below it
+                    kth = heapq.nlargest(limit, scores.values())[-1]
+                    candidates_only = sum(bounds[i:]) < kth
+                self._score_term(term, idfs[term], scores, candidates_only)
+
+            if limit:
+                results = heapq.nsmallest(limit, scores.items(), key=_rank)
+            else:
+                results = sorted(scores.items(), key=_rank)
+
+            self._cache[key] = results
+            if len(self._cache) > CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return list(results)
+
+
+def _rank(item):
+    # Highest score first; ties broken by id for stable results
+    return -item[1], item[0]
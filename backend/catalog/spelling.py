@@ -0,0 +1,162 @@
+"""
+Catalog Spelling
+
+Typo-tolerant lookup of title words, using a symmetric-delete (SymSpell)
+dictionary.
+
+Every word of every title is stored under each string obtained by deleting
+up to MAX_DISTANCE characters from its first PREFIX_LENGTH characters. A
+misspelled word generates the same deletes of its own prefix, so candidate
+corrections are a handful of dictionary hits rather than an edit-distance
+comparison against the whole vocabulary. Candidates are then checked with a
+bounded edit distance on the full words.
+
+The cost of a lookup is bounded by the prefix length (which caps the number
+of deletes) and by MAX_CANDIDATES (which caps the number of verifications),
+independent of the size of the catalog.
+"""
+
+from collections import Counter
+from itertools import combinations
+
+from .index import CatalogIndex
+from .search import tokenize
+
+MAX_DISTANCE = 2
+PREFIX_LENGTH = 7
+MAX_CANDIDATES = 300
+MAX_SUGGESTIONS = 3
+
+# Words shorter than this are never corrected; up to SHORT_WORD characters
+# only one edit is allowed
+MIN_LENGTH = 3
+SHORT_WORD = 4
+MAX_LENGTH = 40
+
+
+def deletes(word, distance=MAX_DISTANCE):
+    """Return `word` and every string made by deleting up to `distance`
+    characters from it."""
+    results = {word}
+    for n in range(1, min(distance, len(word)) + 1):
+        for positions in combinations(range(len(word)), n):
+            results.add(''.join(c for i, c in enumerate(word) if i not in positions))
+    return results
+
+
+def edit_distance(a, b, limit=MAX_DISTANCE):
+    """Optimal string alignment distance (Levenshtein plus transpositions),
+    or limit + 1 as soon as it is known to exceed `limit`."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    if a == b:
+        return 0
+
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        row_min = i
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if (previous2 is not None and j > 1
+                    and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]):
+                value = min(value, previous2[j - 2] + 1)
+            current[j] = value
+            row_min = min(row_min, value)
+        if row_min > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return min(previous[-1], limit + 1)
+
+
+def max_distance(word):
+    """Return how many edits a query word of this length may contain."""
+    if len(word) < MIN_LENGTH or len(word) > MAX_LENGTH:
+        return 0
+    return 1 if len(word) <= SHORT_WORD else MAX_DISTANCE
+
+
+class SpellingIndex(CatalogIndex):
+    def __init__(self, store=None):
+        super().__init__(store)
+
+        # word -> number of titles containing it
+        self._counts = Counter()
+        # delete of a word's prefix -> words producing it
+        self._deletes = {}
+
+    def __len__(self):
+        return len(self._counts)
+
+    def __contains__(self, word):
+        return word in self._counts
+
+    @staticmethod
+    def _words(movie):
+        return set(tokenize(movie.get('title')))
+
+    def _build(self, movies):
+        counts = Counter()
+        for movie in movies:
+            counts.update(self._words(movie))
+        self._counts = counts
+        self._deletes = {}
+        for word in counts:
+            self._index(word)
+
+    def _apply(self, old, new):
+        before = self._words(old) if old is not None else set()
+        after = self._words(new) if new is not None else set()
+        for word in before - after:
+            self._counts[word] -= 1
+            if self._counts[word] <= 0:
+                del self._counts[word]
+                self._unindex(word)
+        for word in after - before:
+            self._counts[word] += 1
+            if self._counts[word] == 1:
+                self._index(word)
+
+    def _index(self, word):
+        for key in deletes(word[:PREFIX_LENGTH]):
+            self._deletes.setdefault(key, set()).add(word)
+
+    def _unindex(self, word):
+        for key in deletes(word[:PREFIX_LENGTH]):
+            bucket = self._deletes.get(key)
+            if bucket is not None:
+                bucket.discard(word)
+                if not bucket:
+                    del self._deletes[key]
+
+    def suggest(self, word, limit=MAX_SUGGESTIONS):
+        """Return up to `limit` [(title word, distance)] closest to a word,
+        nearest (then most common) first."""
+        self._ensure_built()
+        word = word.lower()
+        if word in self._counts:
+            return [(word, 0)]
+        distance = max_distance(word)
+        if not distance:
+            return []
+
+        with self._lock:
+            seen = set()
+            found = []
+            # Longest keys (fewest deletes, so the closest words) first
+            for key in sorted(deletes(word[:PREFIX_LENGTH], distance), key=lambda key: (-len(key), key)):
+                for candidate in self._deletes.get(key, ()):
+                    if candidate in seen:
+                        continue
+                    seen.add(candidate)
+                    d = edit_distance(word, candidate, distance)
+                    if d <= distance:
+                        found.append((d, -self._counts[candidate], candidate))
+                    if len(seen) >= MAX_CANDIDATES:
+                        break
+                if len(seen) >= MAX_CANDIDATES:
+                    break
+        found.sort()
+        return [(candidate, d) for d, _, candidate in found[:limit]]
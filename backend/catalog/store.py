@@ -0,0 +1,276 @@
+"""
+Catalog Store
+
+An indexed, in-memory movie catalog shared by every serving stack.
+
+Records are kept in their JSON shape (camelCase keys, as returned by the
+API). Lookups by id are a hash-map hit, genre filters walk a per-genre
+posting list, and the lowercase title/description used by text filters are
+computed once when a record is loaded instead of on every request.
+
+relatedMovies are not kept on the records. Their ids go into a CSR graph
+(see graph.py) and are hydrated from the current records when a movie is
+served, so no record holds a copy of another.
+
+A store can also sit on top of a read-only, memory-mapped `ColumnarCatalog`
+(see columnar.py). Records written to the store then act as an overlay: they
+replace or extend the file's records without touching the file itself.
+"""
+
+import threading
+from itertools import islice
+
+from .graph import RelatedGraph, related_ids
+
+
+def normalize(text):
+    """Lowercase a string for case-insensitive matching."""
+    return (text or '').lower()
+
+
+class CatalogStore:
+    def __init__(self, movies=None, base=None):
+        self._lock = threading.RLock()
+
+        # Read-only columnar catalog underneath the in-memory records
+        self._base = base
+        # Base ids that were replaced or removed through this store
+        self._shadowed = set()
+
+        # id -> record, in catalog order
+        self._movies = {}
+        # lowercase genre -> {id: None}, an insertion-ordered posting list
+        self._genres = {}
+        # id -> (lowercase title, lowercase description)
+        self._text = {}
+        # id -> related ids of the in-memory records
+        self._related = RelatedGraph()
+
+        # Bumped on every mutation so callers can detect a changed catalog
+        self.version = 0
+        # Callables notified with (old record, new record) on every change
+        self._listeners = []
+
+        if movies:
+            self.load(movies)
+
+    def __len__(self):
+        base = len(self._base) - len(self._shadowed) if self._base is not None else 0
+        return base + len(self._movies)
+
+    def __iter__(self):
+        return iter(self.slice())
+
+    def __contains__(self, movie_id):
+        return movie_id in self._movies or self._base_row(movie_id) >= 0
+
+    def subscribe(self, listener, replay=False):
+        """Call `listener(old, new)` after every change to the catalog.
+
+        `old` is None for an added record and `new` is None for a removed
+        one. With `replay`, the listener is first called with (None, record)
+        for every current record. Both happen under the store lock, so a
+        derived index built this way sees every change exactly once.
+        """
+        with self._lock:
+            if replay:
+                for movie_id in list(self._iter_ids()):
+                    listener(None, self.get(movie_id))
+            self._listeners.append(listener)
+
+    def unsubscribe(self, listener):
+        with self._lock:
+            self._listeners.remove(listener)
+
+    def load(self, movies):
+        """Add or replace many records at once."""
+        with self._lock:
+            for movie in movies:
+                self._put(movie)
+            self._related.compact()
+            self.version += 1
+
+    def put(self, movie):
+        """Add a record, or replace the record with the same id (keeping
+        its related ids unless the new record lists relatedMovies)."""
+        with self._lock:
+            self._put(movie)
+            self._related.maybe_compact()
+            self.version += 1
+
+    def remove(self, movie_id):
+        """Remove a record; returns it, or None if the id is unknown."""
+        with self._lock:
+            movie = self._movies.pop(movie_id, None)
+            if movie is not None:
+                self._unindex(movie)
+                self._related.discard(movie_id)
+                self._related.maybe_compact()
+            else:
+                row = self._base_row(movie_id)
+                if row < 0:
+                    return None
+                movie = self._base.record(row)
+                self._shadowed.add(movie_id)
+            self.version += 1
+            for listener in self._listeners:
+                listener(movie, None)
+            return movie
+
+    def get(self, movie_id):
+        """Return the record for an id, or None."""
+        movie = self._movies.get(movie_id)
+        if movie is None and self._base is not None:
+            row = self._base_row(movie_id)
+            if row >= 0:
+                movie = self._base.record(row)
+        return movie
+
+    def get_many(self, movie_ids):
+        """Return the records for the given ids, skipping unknown ones."""
+        if self._base is None:
+            movies = self._movies
+            return [movies[i] for i in movie_ids if i in movies]
+        results = []
+        for movie_id in movie_ids:
+            movie = self.get(movie_id)
+            if movie is not None:
+                results.append(movie)
+        return results
+
+    def related_ids(self, movie_id):
+        """Return the ids of a movie's relatedMovies, in order."""
+        if movie_id in self._movies:
+            return self._related.get(movie_id)
+        row = self._base_row(movie_id)
+        return self._base.related_ids(row) if row >= 0 else []
+
+    def slice(self, offset=0, limit=None):
+        """Return records in catalog order, skipping `offset` of them."""
+        with self._lock:
+            stop = offset + limit if limit is not None else None
+            if self._base is None:
+                return list(islice(self._movies.values(), offset, stop))
+            return self.get_many(list(islice(self._iter_ids(), offset, stop)))
+
+    def ids(self):
+        """Return all ids in catalog order."""
+        with self._lock:
+            return list(self._iter_ids())
+
+    def base_row(self, movie_id):
+        """Return an id's row in the columnar base, or -1 if it has none.
+
+        Records from the base keep that position in catalog order even
+        after being replaced (or removed and added back) through the store.
+        """
+        return self._base.row_of(movie_id) if self._base is not None else -1
+
+    def genres(self):
+        """Return the lowercase genre names present in the catalog."""
+        genres = dict.fromkeys(self._base.genres()) if self._base is not None else {}
+        genres.update(dict.fromkeys(self._genres))
+        return list(genres)
+
+    def genre_ids(self, genre):
+        """Return the ids tagged with a genre (case-insensitive)."""
+        genre = normalize(genre)
+        ids = []
+        if self._base is not None:
+            shadowed = self._shadowed
+            ids = [i for i in map(self._base.id_at, self._base.genre_rows(genre)) if i not in shadowed]
+        ids.extend(self._genres.get(genre, ()))
+        return ids
+
+    def by_genre(self, genre):
+        """Return the records tagged with a genre (case-insensitive)."""
+        if self._base is None:
+            return self.get_many(self._genres.get(normalize(genre), ()))
+        return self.get_many(self.genre_ids(genre))
+
+    def text(self, movie_id):
+        """Return the precomputed (title, description) in lowercase."""
+        text = self._text.get(movie_id)
+        if text is None:
+            row = self._base_row(movie_id)
+            text = self._base.text(row) if row >= 0 else ('', '')
+        return text
+
+    def matches(self, query, movies=None):
+        """Return records whose title or description contains the query."""
+        query = normalize(query)
+        if movies is None:
+            if self._base is not None:
+                ids = [i for i in self.ids() if self._contains(query, self.text(i))]
+                return self.get_many(ids)
+            movies = self._movies.values()
+        text = self._text
+        results = []
+        for movie in movies:
+            movie_id = movie['id']
+            if self._contains(query, text[movie_id] if movie_id in text else self.text(movie_id)):
+                results.append(movie)
+        return results
+
+    @staticmethod
+    def _contains(query, text):
+        title, description = text
+        return query in title or query in description
+
+    def _base_row(self, movie_id):
+        if self._base is None or movie_id in self._shadowed:
+            return -1
+        return self._base.row_of(movie_id)
+
+    def _iter_ids(self):
+        if self._base is not None:
+            shadowed = self._shadowed
+            movies = self._movies
+            for movie_id in self._base.iter_ids():
+                if movie_id not in shadowed or movie_id in movies:
+                    yield movie_id
+            for movie_id in movies:
+                if movie_id not in shadowed:
+                    yield movie_id
+        else:
+            yield from self._movies
+
+    def _put(self, movie):
+        movie_id = movie['id']
+        # A replacement without relatedMovies keeps the current ones
+        related = related_ids(movie) if 'relatedMovies' in movie else None
+        if related is not None:
+            movie = dict(movie)
+            del movie['relatedMovies']
+        previous = self._movies.get(movie_id)
+        if previous is not None:
+            self._unindex(previous)
+        else:
+            row = self._base_row(movie_id)
+            if row >= 0:
+                if self._listeners:
+                    previous = self._base.record(row)
+                self._shadowed.add(movie_id)
+                if related is None:
+                    related = self._base.related_ids(row)
+        if related is not None:
+            self._related.set(movie_id, related)
+
+        self._movies[movie_id] = movie
+        for genre in movie.get('genre') or ():
+            self._genres.setdefault(normalize(genre), {})[movie_id] = None
+        self._text[movie_id] = (normalize(movie.get('title')), normalize(movie.get('description')))
+
+        for listener in self._listeners:
+            listener(previous, movie)
+
+    def _unindex(self, movie):
+        movie_id = movie['id']
+        for genre in movie.get('genre') or ():
+            key = normalize(genre)
+            posting = self._genres.get(key)
+            if posting is not None:
+                posting.pop(movie_id, None)
+                if not posting:
+                    del self._genres[key]
+        self._text.pop(movie_id, None)
@@ -0,0 +1,213 @@
+"""
+Catalog Trigram Index
+
+Serves the "substring anywhere in title or description" filter of
+`GET /movies?q=` without scanning the catalog.
+
+Every lowercase title and description is split into its overlapping
+3-character grams, and each gram keeps a posting list of the documents that
+contain it. A query of three or more characters can only match documents
+holding all of its grams, so the posting lists are intersected to get the
+candidates and only those are checked against the full strings, keeping
+the exact semantics of `CatalogStore.matches`. When even the rarest gram
+occurs in most of the catalog the index cannot narrow anything down, and
+the store is scanned instead.
+
+Texts are padded with two NUL characters before they are split, so every
+substring of one or two characters is the prefix of some gram. Shorter
+queries therefore use the sorted gram keys as a prefix index: the grams
+starting with the query are found by bisection and their postings unioned.
+
+Posting lists are compact int32 arrays of document slots. A record gets a
+new slot each time it is (re)indexed, so slots only ever grow and every
+posting list stays sorted; slots of replaced or removed records are left
+behind and filtered out, and are purged once they outnumber live ones.
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right, insort
+
+import numpy as np
+
+from .index import CatalogIndex
+from .store import normalize
+
+GRAM = 3
+PAD = '\x00' * (GRAM - 1)
+MAX_CHAR = '\U0010ffff'
+
+# Past this share of the catalog, verifying candidates costs more than a scan
+SCAN_FRACTION = 0.5
+
+
+def grams(text):
+    """Return the set of trigrams of a (lowercase) text."""
+    return {text[i:i + GRAM] for i in range(len(text) - GRAM + 1)}
+
+
+class TrigramIndex(CatalogIndex):
+    def __init__(self, store=None):
+        super().__init__(store)
+
+        # gram -> sorted slots (array of int32)
+        self._postings = {}
+        # Sorted gram keys, for queries shorter than a gram
+        self._keys = []
+        # slot -> movie id (-1 once stale), and the record's catalog position
+        self._slot_ids = array('q')
+        self._slot_order = array('q')
+        # id -> (current slot, catalog position)
+        self._slots = {}
+        self._stale = 0
+
+    def __len__(self):
+        return len(self._slots)
+
+    def _build(self, movies):
+        postings = {}
+        for movie in movies:
+            slot = self._assign(movie['id'])
+            for gram in self._grams(movie):
+                posting = postings.get(gram)
+                if posting is None:
+                    posting = postings[gram] = array('i')
+                posting.append(slot)
+        self._postings = postings
+        self._keys = sorted(postings)
+
+    def _apply(self, old, new):
+        if old is not None and (new is None or new['id'] != old['id']):
+            self._retire(old['id'])
+        if new is not None:
+            slot = self._assign(new['id'])
+            for gram in self._grams(new):
+                posting = self._postings.get(gram)
+                if posting is None:
+                    posting = self._postings[gram] = array('i')
+                    insort(self._keys, gram)
+                posting.append(slot)
+        if self._stale > len(self._slots):
+            self._purge()
+
+    @staticmethod
+    def _grams(movie):
+        return grams(normalize(movie.get('title')) + PAD) | grams(normalize(movie.get('description')) + PAD)
+
+    def _assign(self, movie_id):
+        """Give a record a fresh slot, keeping its catalog position."""
+        current = self._slots.get(movie_id)
+        if current is not None:
+            self._slot_ids[current[0]] = -1
+            self._stale += 1
+            order = current[1]
+        else:
+            order = self._position(movie_id)
+        slot = len(self._slot_ids)
+        self._slot_ids.append(movie_id)
+        self._slot_order.append(order)
+        self._slots[movie_id] = (slot, order)
+        return slot
+
+    def _retire(self, movie_id):
+        current = self._slots.pop(movie_id, None)
+        if current is not None:
+            self._slot_ids[current[0]] = -1
+            self._stale += 1
+
+    def _purge(self):
+        """Drop stale slots from every posting list."""
+        live = np.frombuffer(self._slot_ids, dtype=np.int64) >= 0
+        for gram, posting in list(self._postings.items()):
+            slots = np.frombuffer(posting, dtype=np.int32)
+            kept = slots[live[slots]]
+            if len(kept) == len(slots):
+                continue
+            if len(kept):
+                self._postings[gram] = array('i', kept.tobytes())
+            else:
+                del self._postings[gram]
+                del self._keys[bisect_left(self._keys, gram)]
+        self._stale = 0
+
+    def _candidates(self, query):
+        """Return the slots that may contain the query, sorted (None if
+        even the rarest gram is too common to narrow the search)."""
+        if len(query) >= GRAM:
+            postings = []
+            for gram in grams(query):
+                posting = self._postings.get(gram)
+                if posting is None:
+                    return np.empty(0, dtype=np.int32)
+                postings.append(posting)
+            # Rarest gram first, so each step searches the fewest slots
+            postings.sort(key=len)
+            if len(postings[0]) > len(self._slot_ids) * SCAN_FRACTION:
+                return None
+            slots = np.frombuffer(postings[0], dtype=np.int32).copy()
+            for posting in postings[1:]:
+                other = np.frombuffer(posting, dtype=np.int32)
+                found = np.searchsorted(other, slots)
+                found[found == len(other)] = 0
+                slots = slots[other[found] == slots]
+                if not len(slots):
+                    break
+            return slots
+
+        lo = bisect_left(self._keys, query)
+        hi = bisect_right(self._keys, query + MAX_CHAR, lo)
+        hit = np.zeros(len(self._slot_ids), dtype=bool)
+        for gram in self._keys[lo:hi]:
+            hit[np.frombuffer(self._postings[gram], dtype=np.int32)] = True
+        return np.flatnonzero(hit)
+
+    def _lookup(self, query):
+        """Return the matching ids in catalog order, or None when so many
+        records are candidates that scanning the store is cheaper."""
+        self._ensure_built()
+
+        with self._lock:
+            slots = self._candidates(query)
+            if slots is None:
+                return None
+            ids = np.frombuffer(self._slot_ids, dtype=np.int64)[slots]
+            live = ids >= 0
+            slots, ids = slots[live], ids[live]
+            if len(query) > GRAM and len(ids) > len(self._slots) * SCAN_FRACTION:
+                return None
+            order = np.frombuffer(self._slot_order, dtype=np.int64)[slots]
+            ids = ids[np.argsort(order, kind='stable')].tolist()
+
+        if len(query) <= GRAM:
+            # Sharing a gram (or a gram prefix) is already a match
+            return ids
+        text = self._store.text
+        return [i for i in ids if _contains(query, text(i))]
+
+    def match_ids(self, query):
+        """Return the ids whose title or description contains the query,
+        in catalog order."""
+        query = normalize(query)
+        # Padded grams would match NULs that are not in any text
+        ids = self._lookup(query) if query and PAD[0] not in query else None
+        if ids is None:
+            ids = [movie['id'] for movie in self._store.matches(query)]
+        return ids
+
+    def matches(self, query, movies=None):
+        """Return records whose title or description contains the query.
+
+        Same results, in the same order, as `CatalogStore.matches`.
+        """
+        query = normalize(query)
+        ids = self._lookup(query) if query and PAD[0] not in query else None
+        if ids is None:
+            return self._store.matches(query, movies)
+        if movies is None:
+            return self._store.get_many(ids)
+        ids = set(ids)
+        return [movie for movie in movies if movie['id'] in ids]
+
+
+def _contains(query, text):
+    title, description = text
+    return query in title or query in description
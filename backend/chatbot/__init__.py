@@ -1 +1,56 @@
-from .chatbot import PopcornHubChatbot
\ No newline at end of file
+import os
+import threading
+
+from .batching import DEFAULT_MAX_BATCH, DEFAULT_WINDOW, MicroBatcher
+from .chatbot import CONFIDENCE_THRESHOLD, KB_INDEX_PATH, MEMORY_PATH, MODEL_PATH, PopcornHubChatbot
+
+# The process-wide chatbot and its micro-batcher, built on first use
+_CHATBOT = None
+_BATCHER = None
+_CHATBOT_LOCK = threading.Lock()
+
+
+def open_chatbot(model_path=None, memory_path=None, kb_index_path=None):
+    """Build a chatbot; the intent model, the memory file and the knowledge
+    base index can be moved with POPCORNHUB_CHAT_MODEL,
+    POPCORNHUB_CHAT_MEMORY and POPCORNHUB_CHAT_KB."""
+    return PopcornHubChatbot(
+        model_path=model_path or os.environ.get('POPCORNHUB_CHAT_MODEL') or MODEL_PATH,
+        memory_path=memory_path or os.environ.get('POPCORNHUB_CHAT_MEMORY') or MEMORY_PATH,
+        kb_index_path=kb_index_path or os.environ.get('POPCORNHUB_CHAT_KB') or KB_INDEX_PATH,
+    )
+
+
+def get_chatbot():
+    """Return the chatbot shared by every request in this process.
+
+    It is built on first use rather than at import, so each worker of a
+    forking server loads its own copy (and opens its own memory file).
+    """
+    global _CHATBOT
+    if _CHATBOT is None:
+        with _CHATBOT_LOCK:
+            if _CHATBOT is None:
+                _CHATBOT = open_chatbot()
+    return _CHATBOT
+
+
+def get_batcher():
+    """Return the micro-batcher in front of the shared chatbot.
+
+    POPCORNHUB_CHAT_BATCH_MS sets its window in milliseconds (0 disables
+    batching) and POPCORNHUB_CHAT_BATCH_SIZE its largest batch.
+    """
+    global _BATCHER
+    if _BATCHER is None:
+        bot = get_chatbot()
+        with _CHATBOT_LOCK:
+            if _BATCHER is None:
+                window = os.environ.get('POPCORNHUB_CHAT_BATCH_MS')
+                size = os.environ.get('POPCORNHUB_CHAT_BATCH_SIZE')
+                _BATCHER = MicroBatcher(
+                    bot,
+                    window=float(window) / 1000 if window else DEFAULT_WINDOW,
+                    max_batch=int(size) if size else DEFAULT_MAX_BATCH,
+                )
+    return _BATCHER
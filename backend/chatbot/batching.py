@@ -0,0 +1,93 @@
+"""
+Chat Micro-Batching
+
+Answers concurrent chat messages together. Each request hands its message
+to a MicroBatcher and waits; a background thread takes the first waiting
+message, gathers whatever else arrives within `window` seconds (up to
+`max_batch` messages), answers them all with one respond_batch call (one
+intent classification for the lot) and hands each request its own result.
+
+A request waits at most `window` longer than it would alone, plus the time
+to answer the rest of its batch. Under load the per-call overhead of the
+models is shared by the whole batch, which is where the extra throughput
+comes from. A window of 0 answers every message directly on the calling
+thread.
+
+If answering a batch raises, its messages are answered again one at a
+time, so a message the chatbot cannot handle fails only its own request.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+DEFAULT_WINDOW = 0.002
+DEFAULT_MAX_BATCH = 32
+
+
+class MicroBatcher:
+    def __init__(self, bot, window=DEFAULT_WINDOW, max_batch=DEFAULT_MAX_BATCH):
+        self.bot = bot
+        self.window = window
+        self.max_batch = max_batch
+
+        self._requests = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker = None
+
+        # Batches answered and the messages in them
+        self.batches = 0
+        self.messages = 0
+
+    def respond(self, message):
+        """Answer one message: (intent, entities, response)."""
+        if self.window <= 0 or self.max_batch <= 1:
+            return self.bot.respond_batch([message])[0]
+        future = Future()
+        self._requests.put((message, future))
+        if self._worker is None:
+            with self._lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._answer_forever, daemon=True)
+                    self._worker.start()
+        return future.result()
+
+    def _collect(self):
+        """Wait for a message, then gather the batch that forms behind it."""
+        batch = [self._requests.get()]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._requests.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _answer_forever(self):
+        while True:
+            batch = self._collect()
+            try:
+                self._answer(batch)
+            except Exception as e:
+                if len(batch) == 1:
+                    batch[0][1].set_exception(e)
+                    continue
+                # One bad message fails the whole call; answer each on its
+                # own so that only its request gets the error
+                for request in batch:
+                    try:
+                        self._answer([request])
+                    except Exception as e:
+                        request[1].set_exception(e)
+
+    def _answer(self, batch):
+        """Answer a batch of (message, future) with one respond_batch call."""
+        results = self.bot.respond_batch([message for message, _ in batch])
+        self.batches += 1
+        self.messages += len(batch)
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
@@ -3,42 +3,90 @@ PopcornHub Chatbot
 
 A chatbot for planning movie watch parties with intent recognition,
 entity extraction, and memory persistence.
+
+Loading the models and the knowledge base is the expensive part, so a
+server builds one instance per process (see get_chatbot in __init__.py) and
+shares it between requests. Answering a message only reads that state;
+memory writes are serialized by a lock.
+
+Every file is opened by an explicit path (the defaults below, next to this
+module), never relative to the working directory, so several threads can
+serve chat requests in one process.
+
+Serving needs NumPy but not scikit-learn: the intent model is the weights
+train_intent.py exports (see intent_model.py), and the knowledge base is an
+index built offline with the same NumPy TF-IDF (see kb_index.py).
 """
 
 import json
 import os
-import re
 import random
+import threading
 import uuid
+import warnings
 from datetime import datetime
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-import joblib
+import numpy as np
 import pytz
 from tinydb import TinyDB, Query
 
-class PopcornHubChatbot:
-    def __init__(self):
-        # Get the directory of this file
-        current_dir = os.path.dirname(os.path.abspath(__file__))
+try:
+    from .entities import EntityExtractor
+    from .intent_model import load_intent_model
+    from .kb_index import KB_INDEX_PATH, KB_PATH, KBIndex, read_sentences
+except ImportError:
+    # Run as a script (python chatbot.py)
+    from entities import EntityExtractor
+    from intent_model import load_intent_model
+    from kb_index import KB_INDEX_PATH, KB_PATH, KBIndex, read_sentences
+
+CHATBOT_DIR = os.path.dirname(os.path.abspath(__file__))
+MODEL_PATH = os.path.join(CHATBOT_DIR, 'models', 'intent_clf.npz')
+INTENTS_PATH = os.path.join(CHATBOT_DIR, 'data', 'intents.json')
+MEMORY_PATH = os.path.join(CHATBOT_DIR, 'chatbot_memory.json')
+
+# Below this confidence a message is answered as 'fallback'
+CONFIDENCE_THRESHOLD = 0.6
+# Least KB similarity for a fallback to quote the KB
+KB_THRESHOLD = 0.1
+# Intents get_response answers itself; any other goes to the KB
+RESPONSE_INTENTS = {
+    'suggest_movie', 'schedule_watch', 'start_watch_party', 'set_reminder', 'suggest_snacks',
+    'icebreaker', 'goodbye', 'greeting',
+}
 
-        # Load model
-        self.model = joblib.load(os.path.join(current_dir, 'models', 'intent_clf.pkl'))
+class PopcornHubChatbot:
+    def __init__(self, model_path=MODEL_PATH, intents_path=INTENTS_PATH, kb_path=KB_PATH,
+                 memory_path=MEMORY_PATH, kb_index_path=KB_INDEX_PATH):
+        # Load model (a pickled pipeline still loads, with scikit-learn)
+        self.model = load_intent_model(model_path)
 
         # Load intents
-        with open(os.path.join(current_dir, 'data', 'intents.json'), 'r') as f:
+        with open(intents_path, 'r') as f:
             self.intents = json.load(f)
         self.intent_responses = {intent['tag']: intent['responses'] for intent in self.intents}
 
-        # Load knowledge base
-        with open(os.path.join(current_dir, 'data', 'kb_sentences.txt'), 'r') as f:
-            self.kb_sentences = [line.strip() for line in f if line.strip()]
-        self.tfidf_vectorizer = TfidfVectorizer()
-        self.kb_vectors = self.tfidf_vectorizer.fit_transform(self.kb_sentences)
+        # Load knowledge base: the prebuilt index if there is one and it
+        # was built from the current sentences, else index them now
+        self.kb_index = None
+        if kb_index_path and os.path.exists(kb_index_path):
+            self.kb_index = KBIndex.open(kb_index_path)
+        if self.kb_index is None or os.path.exists(kb_path):
+            sentences = read_sentences(kb_path)
+            if self.kb_index is not None and not self.kb_index.built_from(sentences):
+                warnings.warn(f"{kb_index_path} was built from an older {kb_path}; indexing it in memory "
+                              f"instead (rebuild the index with kb_index.py)", RuntimeWarning)
+                self.kb_index = None
+            if self.kb_index is None:
+                self.kb_index = KBIndex.build(sentences)
+
+        # Entity keywords, matched in one pass over each message
+        self.entity_extractor = EntityExtractor()
 
         # Memory
-        self.db = TinyDB(os.path.join(current_dir, 'chatbot_memory.json'))
+        self.db = TinyDB(memory_path)
         self.user_query = Query()
+        # TinyDB is not safe for concurrent writers
+        self._memory_lock = threading.Lock()
 
         # Icebreakers
         self.icebreakers = [
@@ -58,51 +106,27 @@ class PopcornHubChatbot:
         intent = self.model.classes_[intent_idx]
         return intent, max_prob
 
-    def extract_entities(self, message):
-        """Extract entities using regex."""
-        entities = {}
+    def predict_intent_batch(self, messages):
+        """Predict (intent, confidence) for many messages at once.
 
-        # Date patterns
-        date_patterns = [
-            r'\b(tomorrow|today|next week|friday|saturday|sunday|monday|tuesday|wednesday|thursday)\b',
-            r'\b(\d{1,2}/\d{1,2}(/\d{2,4})?)\b'
-        ]
-        for pattern in date_patterns:
-            match = re.search(pattern, message, re.IGNORECASE)
-            if match:
-                entities['date'] = match.group()
-                break
+        The whole batch goes through one TF-IDF transform and one
+        classifier product, instead of one call (and its fixed overhead)
+        per message.
+        """
+        if not messages:
+            return []
+        probs = self.model.predict_proba([message.lower() for message in messages])
+        best = probs.argmax(axis=1)
+        confidences = probs[np.arange(len(best)), best]
+        return list(zip(self.model.classes_[best].tolist(), confidences.tolist()))
 
-        # Time patterns
-        time_patterns = [
-            r'\b(\d{1,2}(:\d{2})?\s*(am|pm|AM|PM))\b',
-            r'\b(\d{1,2})\s*(am|pm|AM|PM)\b'
-        ]
-        for pattern in time_patterns:
-            match = re.search(pattern, message, re.IGNORECASE)
-            if match:
-                entities['time'] = match.group()
-                break
-
-        # Genre
-        genre_pattern = r'\b(romance|comedy|horror|action|drama|thriller|animation)\b'
-        match = re.search(genre_pattern, message, re.IGNORECASE)
-        if match:
-            entities['genre'] = match.group().lower()
-
-        # Participants
-        participants_pattern = r'\b(me and my (girlfriend|boyfriend|partner|friends|family))\b'
-        match = re.search(participants_pattern, message, re.IGNORECASE)
-        if match:
-            entities['participants'] = match.group()
-
-        # Snack
-        snack_pattern = r'\b(popcorn|pizza|chips|chocolate|wine|soda|candy)\b'
-        match = re.search(snack_pattern, message, re.IGNORECASE)
-        if match:
-            entities['snack'] = match.group().lower()
+    def extract_entities(self, message):
+        """Extract date, time, genre, participants and snack entities."""
+        return self.entity_extractor.extract(message)
 
-        return entities
+    def extract_entities_batch(self, messages):
+        """Extract entities from many messages."""
+        return [self.extract_entities(message) for message in messages]
 
     def get_response(self, intent, entities, message):
         """Get response based on intent and entities."""
@@ -147,21 +171,45 @@ class PopcornHubChatbot:
 
     def fallback_response(self, message):
         """Fallback using TF-IDF similarity with KB."""
-        message_vec = self.tfidf_vectorizer.transform([message.lower()])
-        similarities = cosine_similarity(message_vec, self.kb_vectors)
-        best_idx = similarities.argmax()
-        if similarities[0][best_idx] > 0.1:  # Threshold
-            return self.kb_sentences[best_idx]
-        return random.choice(self.intent_responses['fallback'])
+        return self.fallback_response_batch([message])[0]
+
+    def fallback_response_batch(self, messages):
+        """Fallback responses for many messages, each the closest KB
+        sentence found through the KB index."""
+        responses = []
+        for message in messages:
+            best_idx, similarity = self.kb_index.best(message.lower())
+            if similarity > KB_THRESHOLD:
+                responses.append(self.kb_index.sentence(best_idx))
+            else:
+                responses.append(random.choice(self.intent_responses['fallback']))
+        return responses
+
+    def respond_batch(self, messages):
+        """Answer many messages: [(intent, entities, response)] in order.
+
+        Intents come from one classifier call and every message that falls
+        back to the KB is looked up in its index; memory is left to the caller.
+        """
+        intents = [intent if confidence >= CONFIDENCE_THRESHOLD else 'fallback'
+                   for intent, confidence in self.predict_intent_batch(messages)]
+        entities = self.extract_entities_batch(messages)
+        fallback = [i for i, intent in enumerate(intents) if intent not in RESPONSE_INTENTS]
+        replies = dict(zip(fallback, self.fallback_response_batch([messages[i] for i in fallback])))
+        return [
+            (intent, found, replies[i] if i in replies else self.get_response(intent, found, message))
+            for i, (intent, found, message) in enumerate(zip(intents, entities, messages))
+        ]
 
     def update_memory(self, user_id, intent, entities):
         """Update user memory."""
-        self.db.upsert({
-            'user_id': user_id,
-            'last_intent': intent,
-            'entities': entities,
-            'timestamp': str(datetime.now())
-        }, self.user_query.user_id == user_id)
+        with self._memory_lock:
+            self.db.upsert({
+                'user_id': user_id,
+                'last_intent': intent,
+                'entities': entities,
+                'timestamp': str(datetime.now())
+            }, self.user_query.user_id == user_id)
 
     def chat(self):
         """Main chat loop."""
@@ -176,7 +224,7 @@ class PopcornHubChatbot:
             intent, confidence = self.predict_intent(message)
             entities = self.extract_entities(message)
 
-            if confidence < 0.6:
+            if confidence < CONFIDENCE_THRESHOLD:
                 intent = 'fallback'
 
             response = self.get_response(intent, entities, message)
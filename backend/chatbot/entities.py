@@ -0,0 +1,138 @@
+"""
+Chatbot Entity Extraction
+
+Finds the keyword entities of a message (date words, genres, participants,
+snacks) in one pass, and dates and times written with digits with two
+compiled regexes.
+
+Keywords are matched on words, not characters: the message is split into
+`\\w+` tokens by one compiled regex, and the tokens are fed through an
+Aho-Corasick automaton built over the token sequences of every keyword of
+every entity. Each keyword starts and ends on a word character, so matching
+whole tokens gives the same word boundaries as `\\b...\\b`, and the text
+between the tokens of a multi-word keyword is compared afterwards. Cost
+grows with the length of the message, not with the number of keywords.
+
+Results are the ones the per-entity regexes gave: for each entity the
+leftmost match, the earlier keyword in its list on a tie, matched without
+regard to case; genres and snacks are lowercased, dates and participants
+keep the message's spelling. A keyword date takes precedence over a
+numeric one anywhere in the message.
+"""
+
+import re
+
+WORD = re.compile(r'\w+')
+NUMERIC_DATE = re.compile(r'\b(\d{1,2}/\d{1,2}(/\d{2,4})?)\b')
+# Also covers "8 pm" / "8pm" without minutes
+TIME = re.compile(r'\b(\d{1,2}(:\d{2})?\s*(am|pm|AM|PM))\b', re.IGNORECASE)
+
+# entity -> keywords, earlier ones winning ties
+KEYWORDS = {
+    'date': ['tomorrow', 'today', 'next week', 'friday', 'saturday', 'sunday', 'monday', 'tuesday',
+             'wednesday', 'thursday'],
+    'genre': ['romance', 'comedy', 'horror', 'action', 'drama', 'thriller', 'animation'],
+    'participants': ['me and my girlfriend', 'me and my boyfriend', 'me and my partner',
+                     'me and my friends', 'me and my family'],
+    'snack': ['popcorn', 'pizza', 'chips', 'chocolate', 'wine', 'soda', 'candy'],
+}
+# Entities reported in lowercase
+LOWERCASE = {'genre', 'snack'}
+
+
+class EntityExtractor:
+    def __init__(self, keywords=KEYWORDS):
+        # Automaton states: token -> next state, failure link, and the
+        # (entity, rank, token count, keyword) ending at the state
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+        for entity, terms in keywords.items():
+            for rank, term in enumerate(terms):
+                term = term.lower()
+                tokens = WORD.findall(term)
+                if not tokens or not WORD.match(term[0]) or not WORD.match(term[-1]):
+                    raise ValueError(f"Keyword {term!r} must start and end with a word character")
+                state = 0
+                for token in tokens:
+                    following = self._goto[state].get(token)
+                    if following is None:
+                        following = self._goto[state][token] = len(self._goto)
+                        self._goto.append({})
+                        self._fail.append(0)
+                        self._output.append([])
+                    state = following
+                self._output[state].append((entity, rank, len(tokens), term))
+        self._link()
+
+    def _link(self):
+        """Set the failure links breadth-first, merging the outputs of each
+        state's longest proper suffix into its own."""
+        goto, fail, output = self._goto, self._fail, self._output
+        # States one token deep fail to the root
+        frontier = list(goto[0].values())
+        while frontier:
+            following = []
+            for state in frontier:
+                for token, child in goto[state].items():
+                    link = fail[state]
+                    while link and token not in goto[link]:
+                        link = fail[link]
+                    fail[child] = goto[link].get(token, 0)
+                    output[child] = output[child] + output[fail[child]]
+                    following.append(child)
+            frontier = following
+
+    def keywords(self, message):
+        """Return {entity: (start, end)} of the best keyword match of each
+        entity in a message."""
+        goto, fail, output = self._goto, self._fail, self._output
+        best = {}
+        starts = []
+        state = 0
+        for match in WORD.finditer(message):
+            token = match.group().lower()
+            starts.append(match.start())
+            while state and token not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(token, 0)
+            for entity, rank, length, term in output[state]:
+                start = starts[-length]
+                end = match.end()
+                if length > 1 and message[start:end].lower() != term:
+                    # Same words, different text in between
+                    continue
+                found = best.get(entity)
+                if found is None or (start, rank) < found[0]:
+                    best[entity] = ((start, rank), end)
+        return {entity: (start, end) for entity, ((start, _), end) in best.items()}
+
+    def extract(self, message):
+        """Return the entities of a message, as extract_entities does."""
+        spans = self.keywords(message)
+        entities = {}
+
+        if 'date' in spans:
+            start, end = spans['date']
+            entities['date'] = message[start:end]
+        else:
+            match = NUMERIC_DATE.search(message)
+            if match:
+                entities['date'] = match.group()
+
+        match = TIME.search(message)
+        if match:
+            entities['time'] = match.group()
+
+        for entity in ('genre', 'participants', 'snack'):
+            if entity in spans:
+                start, end = spans[entity]
+                value = message[start:end]
+                entities[entity] = value.lower() if entity in LOWERCASE else value
+
+        # Entities beyond the built-in ones
+        for entity, (start, end) in spans.items():
+            if entity not in entities and entity != 'date':
+                value = message[start:end]
+                entities[entity] = value.lower() if entity in LOWERCASE else value
+        return entities
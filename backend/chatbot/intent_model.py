@@ -0,0 +1,180 @@
+"""
+Chatbot Intent Model Runtime
+
+Runs the intent classifier trained by train_intent.py (a TfidfVectorizer
+followed by a LogisticRegression) with NumPy alone, so a serving process
+does not import scikit-learn or unpickle the pipeline. train_intent.py
+exports what prediction needs to models/intent_clf.npz: the vocabulary,
+the idf weights, the coefficients, the intercepts and the class labels.
+
+The arithmetic is the one scikit-learn does, in the same order: term counts
+times idf, divided by the sequentially summed L2 norm; the products with the
+coefficients accumulated term by term in column order, as a CSR product
+does; then the same softmax. predict_proba returns the pipeline's
+probabilities bit for bit (one-vs-rest models only to the last bit of the
+logistic function).
+
+Only the vectorizer settings train_intent.py uses are supported: lowercase
+words of two or more characters, unigrams, smoothed idf, plain term counts
+and L2 normalization.
+"""
+
+import math
+import re
+
+import numpy as np
+
+# TfidfVectorizer's default token_pattern
+TOKEN_PATTERN = re.compile(r'(?u)\b\w\w+\b')
+
+# Vectorizer settings the runtime reproduces
+SUPPORTED_VECTORIZER = {
+    'analyzer': 'word', 'binary': False, 'lowercase': True, 'ngram_range': (1, 1), 'norm': 'l2',
+    'preprocessor': None, 'smooth_idf': True, 'stop_words': None, 'strip_accents': None,
+    'sublinear_tf': False, 'token_pattern': TOKEN_PATTERN.pattern, 'tokenizer': None, 'use_idf': True,
+}
+
+
+class Tfidf:
+    """TF-IDF document vectors over a fixed vocabulary."""
+
+    def __init__(self, terms, idf):
+        # terms[j] is the word of column j
+        self.terms = list(terms)
+        self.idf = np.asarray(idf, dtype=np.float64)
+        self.vocabulary = {term: column for column, term in enumerate(self.terms)}
+
+    @classmethod
+    def fit(cls, documents):
+        """Learn the vocabulary and idf of some documents, as
+        TfidfVectorizer().fit does."""
+        frequency = {}
+        for document in documents:
+            for term in set(TOKEN_PATTERN.findall(document.lower())):
+                frequency[term] = frequency.get(term, 0) + 1
+        terms = sorted(frequency)
+        df = np.array([frequency[term] for term in terms], dtype=np.float64) + 1.0
+        idf = np.full_like(df, len(documents) + 1)
+        idf /= df
+        np.log(idf, out=idf)
+        idf += 1.0
+        return cls(terms, idf)
+
+    def transform(self, documents):
+        """Return the L2-normalized TF-IDF rows of some documents as CSR
+        arrays (indptr, indices, data), columns ascending in each row."""
+        indptr = [0]
+        indices = []
+        data = []
+        vocabulary, idf = self.vocabulary, self.idf
+        for document in documents:
+            counts = {}
+            for token in TOKEN_PATTERN.findall(document.lower()):
+                column = vocabulary.get(token)
+                if column is not None:
+                    counts[column] = counts.get(column, 0) + 1
+            columns = sorted(counts)
+            values = [counts[column] * idf[column] for column in columns]
+            norm = 0.0
+            for value in values:
+                norm += value * value
+            if norm:
+                norm = math.sqrt(norm)
+                values = [value / norm for value in values]
+            indices.extend(columns)
+            data.extend(values)
+            indptr.append(len(indices))
+        return (np.array(indptr, dtype=np.int64), np.array(indices, dtype=np.int64),
+                np.array(data, dtype=np.float64))
+
+    def dot(self, documents, matrix):
+        """Return the TF-IDF rows of some documents times a dense
+        (n_terms, k) matrix, each row summed term by term in column order."""
+        indptr, indices, data = self.transform(documents)
+        product = np.zeros((len(documents), matrix.shape[1]))
+        lengths = np.diff(indptr)
+        # The k-th term of every row that has one, for all rows at once
+        for k in range(lengths.max(initial=0)):
+            rows = np.flatnonzero(lengths > k)
+            at = indptr[rows] + k
+            product[rows] += data[at, None] * matrix[indices[at]]
+        return product
+
+
+class IntentModel:
+    """The exported intent classifier; quacks like the pipeline where the
+    chatbot uses it (classes_ and predict_proba)."""
+
+    def __init__(self, tfidf, coef, intercept, classes, ovr=False):
+        self.tfidf = tfidf
+        # (n_terms, n_classes), or one column for a binary model
+        self.coef_t = np.ascontiguousarray(np.asarray(coef, dtype=np.float64).T)
+        self.intercept = np.asarray(intercept, dtype=np.float64)
+        self.classes_ = np.asarray(classes)
+        self.ovr = bool(ovr)
+
+    @classmethod
+    def from_pipeline(cls, pipeline):
+        """Take the weights of a fitted TfidfVectorizer + LogisticRegression
+        pipeline."""
+        vectorizer, classifier = pipeline.steps[0][1], pipeline.steps[-1][1]
+        params = vectorizer.get_params()
+        unsupported = sorted(name for name, value in SUPPORTED_VECTORIZER.items() if params.get(name) != value)
+        if unsupported or params.get('vocabulary') is not None:
+            raise ValueError(f"Unsupported vectorizer settings: {', '.join(unsupported) or 'vocabulary'}")
+        terms = vectorizer.get_feature_names_out()
+        # LogisticRegression.predict_proba's choice between the logistic
+        # function per class and the softmax
+        multi_class = getattr(classifier, 'multi_class', 'auto')
+        ovr = multi_class in ('ovr', 'warn') or (
+            multi_class in ('auto', 'deprecated')
+            and (len(classifier.classes_) <= 2 or classifier.solver == 'liblinear'))
+        return cls(Tfidf(terms, vectorizer.idf_), classifier.coef_, classifier.intercept_,
+                   classifier.classes_, ovr=ovr)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as arrays:
+            return cls(Tfidf(arrays['terms'].tolist(), arrays['idf']), arrays['coef'],
+                       arrays['intercept'], arrays['classes'], ovr=bool(arrays['ovr']))
+
+    def save(self, path):
+        np.savez(
+            path,
+            terms=np.array(self.tfidf.terms, dtype=str),
+            idf=self.tfidf.idf,
+            coef=self.coef_t.T,
+            intercept=self.intercept,
+            classes=self.classes_.astype(str),
+            ovr=np.array(self.ovr),
+        )
+
+    def decision_function(self, messages):
+        scores = self.tfidf.dot(messages, self.coef_t)
+        scores += self.intercept
+        return scores[:, 0] if scores.shape[1] == 1 else scores
+
+    def predict_proba(self, messages):
+        """Return the class probabilities of some messages (n, n_classes)."""
+        scores = self.decision_function(messages)
+        if self.ovr:
+            probs = 1.0 / (1.0 + np.exp(-scores))
+            if probs.ndim == 1:
+                return np.vstack([1 - probs, probs]).T
+            probs /= probs.sum(axis=1).reshape((probs.shape[0], -1))
+            return probs
+        if scores.ndim == 1:
+            scores = np.c_[-scores, scores]
+        scores -= scores.max(axis=1).reshape(-1, 1)
+        np.exp(scores, out=scores)
+        scores /= scores.sum(axis=1).reshape(-1, 1)
+        return scores
+
+
+def load_intent_model(path):
+    """Load an intent model: an exported .npz, or (importing scikit-learn)
+    a pickled pipeline."""
+    if str(path).endswith('.npz'):
+        return IntentModel.load(path)
+    import joblib
+    return joblib.load(path)
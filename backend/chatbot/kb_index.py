@@ -0,0 +1,295 @@
+"""
+Chatbot Knowledge Base Index
+
+The knowledge base the chatbot falls back to, vectorized offline and
+written to one memory-mapped file, so a chatbot neither refits a vectorizer
+nor scores every sentence per message:
+
+    header     magic, byte order, term count, sentence count, entry count, version,
+               SHA-256 of the sentences
+    terms      UTF-8 vocabulary of the fitted TF-IDF (offsets + blob), sorted
+    idf        float64 idf weight per term
+    matrix     the L2-normalized TF-IDF matrix, CSR: per-sentence offsets,
+               int32 term columns (ascending) and float64 weights
+    postings   the same entries by term, i.e. an inverted index: per-term
+               offsets, int32 sentence indexes and float64 weights, each
+               term's heaviest first (ties by sentence index)
+    sentences  UTF-8 sentences (offsets + blob)
+
+A query is vectorized with the stored vocabulary and idf (intent_model.Tfidf)
+and the postings of its terms are read heaviest first, a growing slice of
+each at a time. Every sentence met is scored exactly from its row of the
+matrix. A sentence not met yet has at most the weight where reading stopped
+of each term, and is unit length, which bounds its score (see bound): the
+terms that together cannot lift a sentence above the best score found are
+read no further (a sentence only they contain cannot win), and reading ends
+when the bound over all terms falls below it. The best sentence and its
+cosine similarity are the ones a dense product over the whole matrix gives
+(the same sums in the same order), the lower index winning ties.
+
+The digest of the sentences lets the chatbot tell an index built from an
+older knowledge base file (see built_from) and index the current one
+instead of serving stale answers.
+
+Usage (from backend/chatbot):
+    python kb_index.py
+    python kb_index.py data/kb_sentences.txt models/kb_index.phkb
+"""
+
+import argparse
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+try:
+    from .intent_model import Tfidf
+except ImportError:
+    # Run as a script (python kb_index.py)
+    from intent_model import Tfidf
+
+CHATBOT_DIR = os.path.dirname(os.path.abspath(__file__))
+KB_PATH = os.path.join(CHATBOT_DIR, 'data', 'kb_sentences.txt')
+KB_INDEX_PATH = os.path.join(CHATBOT_DIR, 'models', 'kb_index.phkb')
+
+MAGIC = b'PHKB0002'
+HEADER = struct.Struct('=8s1sxxxxxxxQQQQ32s')
+ALIGN = 8
+
+# Postings read per query term in the first round (doubling each round)
+FIRST_SLICE = 32
+
+
+def _pad(length):
+    return (-length) % ALIGN
+
+
+def bound(values, frontier):
+    """Return the most a unit-length sentence whose weights are at most
+    `frontier` can score against query `values`.
+
+    Summing values * frontier ignores that the sentence has length 1; when
+    the frontier itself is longer than that, the best such sentence follows
+    the query up to the frontier: min(frontier, scale * values), with the
+    scale that makes it unit length.
+    """
+    if frontier @ frontier <= 1.0:
+        return float(values @ frontier)
+    # Terms by the scale at which they reach their frontier
+    order = np.argsort(frontier / values)
+    values, frontier = values[order], frontier[order]
+    ratios = frontier / values
+    # With the first k terms capped: the length left, the query length in
+    # the rest, and the scale
+    capped = np.concatenate([[0.0], np.cumsum(frontier * frontier)[:-1]])
+    free = np.cumsum((values * values)[::-1])[::-1]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        scales = np.sqrt((1.0 - capped) / free)
+    fits = np.flatnonzero((capped < 1.0) & (scales <= ratios) & (np.concatenate([[0.0], ratios[:-1]]) <= scales))
+    if not len(fits):
+        # Rounding at a boundary; the plain sum still bounds it
+        return float(values @ frontier)
+    k = int(fits[0])
+    return float(values[:k] @ frontier[:k] + scales[k] * free[k])
+
+
+def _strings(values):
+    """Return UTF-8 offsets and blob of some strings."""
+    encoded = [value.encode('utf-8') for value in values]
+    offsets = np.zeros(len(encoded) + 1, np.uint64)
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    return offsets.tobytes(), b''.join(encoded)
+
+
+def read_sentences(path):
+    """Return the non-blank lines of a knowledge base text file."""
+    with open(path, 'r') as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def sentences_digest(sentences):
+    """Return the SHA-256 of some sentences, as stored in their index."""
+    digest = hashlib.sha256()
+    for sentence in sentences:
+        digest.update(sentence.encode('utf-8'))
+        digest.update(b'\n')
+    return digest.digest()
+
+
+def encode_kb_index(sentences, version=None):
+    """Vectorize some sentences and return the index file's bytes."""
+    version = int(time.time()) if version is None else version
+    tfidf = Tfidf.fit(sentences)
+    indptr, indices, data = tfidf.transform(sentences)
+
+    # Entries by term, heaviest first, then by sentence
+    rows = np.repeat(np.arange(len(sentences), dtype=np.int32), np.diff(indptr))
+    order = np.lexsort((rows, -data, indices))
+    offsets = np.zeros(len(tfidf.terms) + 1, np.uint64)
+    np.cumsum(np.bincount(indices, minlength=len(tfidf.terms)), out=offsets[1:])
+
+    byteorder = b'<' if sys.byteorder == 'little' else b'>'
+    parts = [HEADER.pack(MAGIC, byteorder, len(tfidf.terms), len(sentences), len(data), version,
+                         sentences_digest(sentences))]
+    for array in (*_strings(tfidf.terms), tfidf.idf.tobytes(),
+                  indptr.astype(np.uint64).tobytes(), indices.astype(np.int32).tobytes(), data.tobytes(),
+                  offsets.tobytes(), rows[order].tobytes(), data[order].tobytes(),
+                  *_strings(sentences)):
+        parts.append(array)
+        parts.append(b'\0' * _pad(len(array)))
+    return b''.join(parts)
+
+
+def write_kb_index(path, sentences, version=None):
+    """Write the index of some sentences, atomically replacing `path`."""
+    encoded = encode_kb_index(sentences, version)
+    fd, temp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(encoded)
+        os.replace(temp, path)
+    except BaseException:
+        os.unlink(temp)
+        raise
+
+
+class KBIndex:
+    """Read-only view over a knowledge base index (a file or its bytes)."""
+
+    def __init__(self, buffer, name='knowledge base index'):
+        self._buffer = buffer
+        magic, byteorder, terms, sentences, entries, version, digest = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{name} is not a PopcornHub knowledge base index")
+        native = b'<' if sys.byteorder == 'little' else b'>'
+        if byteorder != native:
+            raise ValueError(f"{name} was written with a different byte order")
+        self.version = version
+        self.digest = digest
+        self._sentences = sentences
+
+        offset = HEADER.size
+
+        def take(dtype, count):
+            nonlocal offset
+            array = np.frombuffer(buffer, dtype, count, offset)
+            offset += array.nbytes + _pad(array.nbytes)
+            return array
+
+        term_offsets = take(np.uint64, terms + 1)
+        term_blob = take(np.uint8, int(term_offsets[-1])).tobytes()
+        idf = take(np.float64, terms)
+        self._indptr = take(np.uint64, sentences + 1).astype(np.int64)
+        self._columns = take(np.int32, entries)
+        self._data = take(np.float64, entries)
+        self._offsets = take(np.uint64, terms + 1).astype(np.int64)
+        self._rows = take(np.int32, entries)
+        self._weights = take(np.float64, entries)
+        self._sentence_offsets = take(np.uint64, sentences + 1)
+        self._sentence_blob = take(np.uint8, int(self._sentence_offsets[-1]))
+
+        # Query terms are looked up in a dict; postings and sentences stay
+        # in the buffer
+        bounds = term_offsets.tolist()
+        self.tfidf = Tfidf([term_blob[start:stop].decode('utf-8') for start, stop in zip(bounds, bounds[1:])],
+                           idf)
+
+    @classmethod
+    def open(cls, path):
+        with open(path, 'rb') as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ), path)
+
+    @classmethod
+    def build(cls, sentences):
+        """Index some sentences in memory."""
+        return cls(encode_kb_index(sentences))
+
+    def __len__(self):
+        return self._sentences
+
+    def built_from(self, sentences):
+        """Whether the index was built from exactly these sentences."""
+        return self.digest == sentences_digest(sentences)
+
+    def sentence(self, index):
+        start, stop = int(self._sentence_offsets[index]), int(self._sentence_offsets[index + 1])
+        return self._sentence_blob[start:stop].tobytes().decode('utf-8')
+
+    def scores(self, rows, query):
+        """Return the exact similarity of some sentences to a query given as
+        a dense vector over the terms."""
+        starts, stops = self._indptr[rows], self._indptr[rows + 1]
+        lengths = stops - starts
+        # Every entry of every row, in order
+        entries = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        return np.bincount(np.repeat(np.arange(len(rows)), lengths),
+                           weights=query[self._columns[entries]] * self._data[entries], minlength=len(rows))
+
+    def best(self, message, first=FIRST_SLICE):
+        """Return (index, cosine similarity) of the sentence most similar to
+        a message, or (-1, 0.0) if none shares a term with it."""
+        _, columns, values = self.tfidf.transform([message])
+        if not len(columns):
+            return -1, 0.0
+        starts = self._offsets[columns]
+        stops = self._offsets[columns + 1]
+        query = np.zeros(len(self.tfidf.terms))
+        query[columns] = values
+        read = starts.copy()
+        # Terms whose postings are still read
+        reading = np.ones(len(columns), bool)
+        best, best_score = -1, 0.0
+        size = first
+        while reading.any():
+            ends = np.where(reading, np.minimum(read + size, stops), read)
+            rows = np.unique(np.concatenate([self._rows[start:end] for start, end in
+                                             zip(read[reading], ends[reading])]))
+            scores = self.scores(rows, query)
+            top = int(scores.argmax())
+            if scores[top] > best_score or (scores[top] == best_score and rows[top] < best):
+                best, best_score = int(rows[top]), float(scores[top])
+            read = ends
+            # The weight of each term's next posting bounds what a sentence
+            # not met yet has of it
+            left = read < stops
+            frontier = np.zeros(len(columns))
+            frontier[left] = self._weights[read[left]]
+            if bound(values[left], frontier[left]) < best_score:
+                break
+            # A sentence found only in the terms of smallest bounds, together
+            # bounded below the best score, cannot win: stop reading those
+            order = np.argsort(values * frontier, kind='stable')
+            order = order[left[order]]
+            low, high = 0, len(order)
+            while low < high:
+                middle = (low + high + 1) // 2
+                if bound(values[order[:middle]], frontier[order[:middle]]) < best_score:
+                    low = middle
+                else:
+                    high = middle - 1
+            reading = np.zeros(len(columns), bool)
+            reading[order[low:]] = True
+            size *= 2
+        return best, best_score
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the chatbot's knowledge base index.")
+    parser.add_argument('sentences', nargs='?', default=KB_PATH, help="knowledge base, one sentence per line")
+    parser.add_argument('output', nargs='?', default=KB_INDEX_PATH, help="index file to write")
+    parser.add_argument('--version', type=int, help="version stored in the file (default: build time)")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    sentences = read_sentences(args.sentences)
+    write_kb_index(args.output, sentences, args.version)
+    print(f"Indexed {len(sentences)} sentences into {args.output} in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
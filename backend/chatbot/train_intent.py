@@ -2,7 +2,9 @@
 Train Intent Classifier
 
 This script trains a TF-IDF + Logistic Regression model for intent recognition
-using the patterns from intents.json and saves the model to models/intent_clf.pkl.
+using the patterns from intents.json and saves the model to models/intent_clf.pkl,
+and its weights to models/intent_clf.npz for the NumPy runtime the chatbot
+serves with (intent_model.py).
 """
 
 import json
@@ -12,9 +14,18 @@ from sklearn.linear_model import LogisticRegression
 from sklearn.pipeline import Pipeline
 import joblib
 
+try:
+    from .intent_model import IntentModel
+except ImportError:
+    # Run as a script (python train_intent.py)
+    from intent_model import IntentModel
+
+# Paths are resolved from this file, wherever the script is run from
+CHATBOT_DIR = os.path.dirname(os.path.abspath(__file__))
+
 def train_intent_model():
     # Load intents data
-    intents_path = os.path.join('data', 'intents.json')
+    intents_path = os.path.join(CHATBOT_DIR, 'data', 'intents.json')
     with open(intents_path, 'r') as f:
         intents = json.load(f)
 
@@ -35,10 +46,14 @@ def train_intent_model():
     pipeline.fit(patterns, tags)
 
     # Save the model
-    model_path = os.path.join('models', 'intent_clf.pkl')
+    model_path = os.path.join(CHATBOT_DIR, 'models', 'intent_clf.pkl')
     joblib.dump(pipeline, model_path)
 
-    print(f"Model trained and saved to {model_path}")
+    # Export the weights for serving without scikit-learn
+    export_path = os.path.join(CHATBOT_DIR, 'models', 'intent_clf.npz')
+    IntentModel.from_pipeline(pipeline).save(export_path)
+
+    print(f"Model trained and saved to {model_path} (exported to {export_path})")
 
 if __name__ == "__main__":
     train_intent_model()
\ No newline at end of file
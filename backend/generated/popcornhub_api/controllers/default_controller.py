@@ -3,11 +3,16 @@ from typing import Dict
 from typing import Tuple
 from typing import Union
 
+from popcornhub_api.models.ai_chat_batch_post_request import AiChatBatchPostRequest  # noqa: E501
 from popcornhub_api.models.ai_chat_post_request import AiChatPostRequest  # noqa: E501
+from popcornhub_api.models.chat_analysis import ChatAnalysis  # noqa: E501
 from popcornhub_api.models.chat_response import ChatResponse  # noqa: E501
 from popcornhub_api.models.error import Error  # noqa: E501
+from popcornhub_api.models.genre import Genre  # noqa: E501
 from popcornhub_api.models.health_get200_response import HealthGet200Response  # noqa: E501
 from popcornhub_api.models.movie import Movie  # noqa: E501
+from popcornhub_api.models.movie_completion import MovieCompletion  # noqa: E501
+from popcornhub_api.models.movie_page import MoviePage  # noqa: E501
 from popcornhub_api.models.movie_suggestion import MovieSuggestion  # noqa: E501
 from popcornhub_api.models.watchlist_delete200_response import WatchlistDelete200Response  # noqa: E501
 from popcornhub_api.models.watchlist_post200_response import WatchlistPost200Response  # noqa: E501
@@ -15,6 +20,22 @@ from popcornhub_api.models.watchlist_request import WatchlistRequest  # noqa: E5
 from popcornhub_api import util
 
 
+def ai_chat_batch_post(body):  # noqa: E501
+    """Batch chat analysis
+
+    Classify the intent and extract the entities of many chat messages in one call, without replying to them or updating chat memory # noqa: E501
+
+    :param ai_chat_batch_post_request: 
+    :type ai_chat_batch_post_request: dict | bytes
+
+    :rtype: Union[List[ChatAnalysis], Tuple[List[ChatAnalysis], int], Tuple[List[ChatAnalysis], int, Dict[str, str]]
+    """
+    ai_chat_batch_post_request = body
+    if connexion.request.is_json:
+        ai_chat_batch_post_request = AiChatBatchPostRequest.from_dict(connexion.request.get_json())  # noqa: E501
+    return 'do some magic!'
+
+
 def ai_chat_post(body):  # noqa: E501
     """AI movie chat
 
@@ -31,6 +52,34 @@ def ai_chat_post(body):  # noqa: E501
     return 'do some magic!'
 
 
+def genres_genre_top_get(genre, limit=None, weighted=None):  # noqa: E501
+    """Get a genre leaderboard
+
+    Get the best rated titles of a genre (case-insensitive) # noqa: E501
+
+    :param genre: Genre name
+    :type genre: str
+    :param limit: Maximum number of movies to return
+    :type limit: int
+    :param weighted: Rank by vote-weighted (Bayesian) rating instead of raw rating
+    :type weighted: bool
+
+    :rtype: Union[List[Movie], Tuple[List[Movie], int], Tuple[List[Movie], int, Dict[str, str]]
+    """
+    return 'do some magic!'
+
+
+def genres_get():  # noqa: E501
+    """List genres
+
+    List the genres in the catalog with the number of titles in each, most titles first # noqa: E501
+
+
+    :rtype: Union[List[Genre], Tuple[List[Genre], int], Tuple[List[Genre], int, Dict[str, str]]
+    """
+    return 'do some magic!'
+
+
 def health_get():  # noqa: E501
     """Health check
 
@@ -42,7 +91,59 @@ def health_get():  # noqa: E501
     return 'do some magic!'
 
 
-def movies_get(q=None, genre=None, limit=None, offset=None):  # noqa: E501
+def movies_autocomplete_get(prefix, limit=None):  # noqa: E501
+    """Autocomplete movie titles
+
+    Suggest titles starting with a prefix (or with a word starting with it), best rated first # noqa: E501
+
+    :param prefix: Title prefix typed so far
+    :type prefix: str
+    :param limit: Maximum number of completions to return
+    :type limit: int
+
+    :rtype: Union[List[MovieCompletion], Tuple[List[MovieCompletion], int], Tuple[List[MovieCompletion], int, Dict[str, str]]
+    """
+    return 'do some magic!'
+
+
+def movies_browse_get(q=None, genre=None, genres=None, genre_match=None, year_from=None, year_to=None, min_rating=None, min_runtime=None, max_runtime=None, director=None, limit=None, offset=None, cursor=None):  # noqa: E501
+    """Browse movies
+
+    Filter movies and get facet counts for the matching set in one call # noqa: E501
+
+    :param q: Search query for movie title or description
+    :type q: str
+    :param genre: Filter by genre
+    :type genre: str
+    :param genres: Filter by several genres, combined as set by genreMatch
+    :type genres: List[str]
+    :param genre_match: Whether movies must have any or all of the given genres
+    :type genre_match: str
+    :param year_from: Earliest release year
+    :type year_from: int
+    :param year_to: Latest release year
+    :type year_to: int
+    :param min_rating: Minimum rating
+    :type min_rating: float
+    :param min_runtime: Minimum runtime in minutes
+    :type min_runtime: int
+    :param max_runtime: Maximum runtime in minutes
+    :type max_runtime: int
+    :param director: Filter by director (case-insensitive)
+    :type director: str
+    :param limit: Maximum number of movies to return
+    :type limit: int
+    :param offset: Number of movies to skip (ignored when a cursor is given)
+    :type offset: int
+    :param cursor: Opaque cursor from a previous page, to fetch the page after it
+    :type cursor: str
+
+    :rtype: Union[MoviePage, Tuple[MoviePage, int], Tuple[MoviePage, int, Dict[str, str]]
+    """
+    return 'do some magic!'
+
+
+def movies_get(q=None, genre=None, genres=None, genre_match=None, year_from=None, year_to=None, min_rating=None, min_runtime=None, max_runtime=None, director=None, limit=None, offset=None, cursor=None):  # noqa: E501
     """Get movies
 
     Retrieve a list of movies with optional filtering # noqa: E501
@@ -51,10 +152,28 @@ def movies_get(q=None, genre=None, limit=None, offset=None):  # noqa: E501
     :type q: str
     :param genre: Filter by genre
     :type genre: str
+    :param genres: Filter by several genres, combined as set by genreMatch
+    :type genres: List[str]
+    :param genre_match: Whether movies must have any or all of the given genres
+    :type genre_match: str
+    :param year_from: Earliest release year
+    :type year_from: int
+    :param year_to: Latest release year
+    :type year_to: int
+    :param min_rating: Minimum rating
+    :type min_rating: float
+    :param min_runtime: Minimum runtime in minutes
+    :type min_runtime: int
+    :param max_runtime: Maximum runtime in minutes
+    :type max_runtime: int
+    :param director: Filter by director (case-insensitive)
+    :type director: str
     :param limit: Maximum number of movies to return
     :type limit: int
-    :param offset: Number of movies to skip
+    :param offset: Number of movies to skip (ignored when a cursor is given)
     :type offset: int
+    :param cursor: Opaque cursor from a previous page, to fetch the page after it
+    :type cursor: str
 
     :rtype: Union[List[Movie], Tuple[List[Movie], int], Tuple[List[Movie], int, Dict[str, str]]
     """
@@ -74,13 +193,15 @@ def movies_movie_id_get(movie_id):  # noqa: E501
     return 'do some magic!'
 
 
-def movies_recommendations_get(limit=None):  # noqa: E501
+def movies_recommendations_get(limit=None, weighted=None):  # noqa: E501
     """Get movie recommendations
 
     Retrieve personalized movie recommendations # noqa: E501
 
     :param limit: Maximum number of recommendations to return
     :type limit: int
+    :param weighted: Rank by vote-weighted (Bayesian) rating instead of raw rating
+    :type weighted: bool
 
     :rtype: Union[List[Movie], Tuple[List[Movie], int], Tuple[List[Movie], int, Dict[str, str]]
     """
@@ -1,11 +1,17 @@
 # flake8: noqa
 # import models into model package
+from popcornhub_api.models.ai_chat_batch_post_request import AiChatBatchPostRequest
 from popcornhub_api.models.ai_chat_post_request import AiChatPostRequest
 from popcornhub_api.models.cast_member import CastMember
+from popcornhub_api.models.chat_analysis import ChatAnalysis
 from popcornhub_api.models.chat_response import ChatResponse
 from popcornhub_api.models.error import Error
+from popcornhub_api.models.genre import Genre
 from popcornhub_api.models.health_get200_response import HealthGet200Response
 from popcornhub_api.models.movie import Movie
+from popcornhub_api.models.movie_completion import MovieCompletion
+from popcornhub_api.models.movie_facets import MovieFacets
+from popcornhub_api.models.movie_page import MoviePage
 from popcornhub_api.models.movie_suggestion import MovieSuggestion
 from popcornhub_api.models.related_movie import RelatedMovie
 from popcornhub_api.models.watchlist_delete200_response import WatchlistDelete200Response
@@ -0,0 +1,67 @@
+from datetime import date, datetime  # noqa: F401
+
+from typing import List, Dict  # noqa: F401
+
+from popcornhub_api.models.base_model import Model
+from popcornhub_api import util
+
+
+class AiChatBatchPostRequest(Model):
+    """NOTE: This class is auto generated by OpenAPI Generator (https://openapi-generator.tech).
+
+    Do not edit the class manually.
+    """
+
+    def __init__(self, messages=None):  # noqa: E501
+        """AiChatBatchPostRequest - a model defined in OpenAPI
+
+        :param messages: The messages of this AiChatBatchPostRequest.  # noqa: E501
+        :type messages: List[str]
+        """
+        self.openapi_types = {
+            'messages': List[str]
+        }
+
+        self.attribute_map = {
+            'messages': 'messages'
+        }
+
+        self._messages = messages
+
+    @classmethod
+    def from_dict(cls, dikt) -> 'AiChatBatchPostRequest':
+        """Returns the dict as a model
+
+        :param dikt: A dict.
+        :type: dict
+        :return: The AiChatBatchPostRequest of this AiChatBatchPostRequest.  # noqa: E501
+        :rtype: AiChatBatchPostRequest
+        """
+        return util.deserialize_model(dikt, cls)
+
+    @property
+    def messages(self) -> List[str]:
+        """Gets the messages of this AiChatBatchPostRequest.
+
+
+        :return: The messages of this AiChatBatchPostRequest.
+        :rtype: List[str]
+        """
+        return self._messages
+
+    @messages.setter
+    def messages(self, messages: List[str]):
+        """Sets the messages of this AiChatBatchPostRequest.
+
+
+        :param messages: The messages of this AiChatBatchPostRequest.
+        :type messages: List[str]
+        """
+        if messages is None:
+            raise ValueError("Invalid value for `messages`, must not be `None`")  # noqa: E501
+        if messages is not None and len(messages) > 1000:
+            raise ValueError("Invalid value for `messages`, number of items must be less than or equal to `1000`")  # noqa: E501
+        if messages is not None and len(messages) < 1:
+            raise ValueError("Invalid value for `messages`, number of items must be greater than or equal to `1`")  # noqa: E501
+
+        self._messages = messages
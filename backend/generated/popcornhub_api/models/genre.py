@@ -0,0 +1,87 @@
+from datetime import date, datetime  # noqa: F401
+
+from typing import List, Dict  # noqa: F401
+
+from popcornhub_api.models.base_model import Model
+from popcornhub_api import util
+
+
+class Genre(Model):
+    """NOTE: This class is auto generated by OpenAPI Generator (https://openapi-generator.tech).
+
+    Do not edit the class manually.
+    """
+
+    def __init__(self, name=None, count=None):  # noqa: E501
+        """Genre - a model defined in OpenAPI
+
+        :param name: The name of this Genre.  # noqa: E501
+        :type name: str
+        :param count: The count of this Genre.  # noqa: E501
+        :type count: int
+        """
+        self.openapi_types = {
+            'name': str,
+            'count': int
+        }
+
+        self.attribute_map = {
+            'name': 'name',
+            'count': 'count'
+        }
+
+        self._name = name
+        self._count = count
+
+    @classmethod
+    def from_dict(cls, dikt) -> 'Genre':
+        """Returns the dict as a model
+
+        :param dikt: A dict.
+        :type: dict
+        :return: The Genre of this Genre.  # noqa: E501
+        :rtype: Genre
+        """
+        return util.deserialize_model(dikt, cls)
+
+    @property
+    def name(self) -> str:
+        """Gets the name of this Genre.
+
+
+        :return: The name of this Genre.
+        :rtype: str
+        """
+        return self._name
+
+    @name.setter
+    def name(self, name: str):
+        """Sets the name of this Genre.
+
+
+        :param name: The name of this Genre.
+        :type name: str
+        """
+
+        self._name = name
+
+    @property
+    def count(self) -> int:
+        """Gets the count of this Genre.
+
+
+        :return: The count of this Genre.
+        :rtype: int
+        """
+        return self._count
+
+    @count.setter
+    def count(self, count: int):
+        """Sets the count of this Genre.
+
+
+        :param count: The count of this Genre.
+        :type count: int
+        """
+
+        self._count = count
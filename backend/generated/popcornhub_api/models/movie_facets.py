@@ -0,0 +1,139 @@
+from datetime import date, datetime  # noqa: F401
+
+from typing import List, Dict  # noqa: F401
+
+from popcornhub_api.models.base_model import Model
+from popcornhub_api import util
+
+
+class MovieFacets(Model):
+    """NOTE: This class is auto generated by OpenAPI Generator (https://openapi-generator.tech).
+
+    Do not edit the class manually.
+    """
+
+    def __init__(self, genre=None, release_year=None, rating=None, director=None):  # noqa: E501
+        """MovieFacets - a model defined in OpenAPI
+
+        :param genre: The genre of this MovieFacets.  # noqa: E501
+        :type genre: Dict[str, int]
+        :param release_year: The release_year of this MovieFacets.  # noqa: E501
+        :type release_year: Dict[str, int]
+        :param rating: The rating of this MovieFacets.  # noqa: E501
+        :type rating: Dict[str, int]
+        :param director: The director of this MovieFacets.  # noqa: E501
+        :type director: Dict[str, int]
+        """
+        self.openapi_types = {
+            'genre': Dict[str, int],
+            'release_year': Dict[str, int],
+            'rating': Dict[str, int],
+            'director': Dict[str, int]
+        }
+
+        self.attribute_map = {
+            'genre': 'genre',
+            'release_year': 'releaseYear',
+            'rating': 'rating',
+            'director': 'director'
+        }
+
+        self._genre = genre
+        self._release_year = release_year
+        self._rating = rating
+        self._director = director
+
+    @classmethod
+    def from_dict(cls, dikt) -> 'MovieFacets':
+        """Returns the dict as a model
+
+        :param dikt: A dict.
+        :type: dict
+        :return: The MovieFacets of this MovieFacets.  # noqa: E501
+        :rtype: MovieFacets
+        """
+        return util.deserialize_model(dikt, cls)
+
+    @property
+    def genre(self) -> Dict[str, int]:
+        """Gets the genre of this MovieFacets.
+
+
+        :return: The genre of this MovieFacets.
+        :rtype: Dict[str, int]
+        """
+        return self._genre
+
+    @genre.setter
+    def genre(self, genre: Dict[str, int]):
+        """Sets the genre of this MovieFacets.
+
+
+        :param genre: The genre of this MovieFacets.
+        :type genre: Dict[str, int]
+        """
+
+        self._genre = genre
+
+    @property
+    def release_year(self) -> Dict[str, int]:
+        """Gets the release_year of this MovieFacets.
+
+
+        :return: The release_year of this MovieFacets.
+        :rtype: Dict[str, int]
+        """
+        return self._release_year
+
+    @release_year.setter
+    def release_year(self, release_year: Dict[str, int]):
+        """Sets the release_year of this MovieFacets.
+
+
+        :param release_year: The release_year of this MovieFacets.
+        :type release_year: Dict[str, int]
+        """
+
+        self._release_year = release_year
+
+    @property
+    def rating(self) -> Dict[str, int]:
+        """Gets the rating of this MovieFacets.
+
+
+        :return: The rating of this MovieFacets.
+        :rtype: Dict[str, int]
+        """
+        return self._rating
+
+    @rating.setter
+    def rating(self, rating: Dict[str, int]):
+        """Sets the rating of this MovieFacets.
+
+
+        :param rating: The rating of this MovieFacets.
+        :type rating: Dict[str, int]
+        """
+
+        self._rating = rating
+
+    @property
+    def director(self) -> Dict[str, int]:
+        """Gets the director of this MovieFacets.
+
+
+        :return: The director of this MovieFacets.
+        :rtype: Dict[str, int]
+        """
+        return self._director
+
+    @director.setter
+    def director(self, director: Dict[str, int]):
+        """Sets the director of this MovieFacets.
+
+
+        :param director: The director of this MovieFacets.
+        :type director: Dict[str, int]
+        """
+
+        self._director = director
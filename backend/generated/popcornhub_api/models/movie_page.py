@@ -0,0 +1,145 @@
+from datetime import date, datetime  # noqa: F401
+
+from typing import List, Dict  # noqa: F401
+
+from popcornhub_api.models.base_model import Model
+from popcornhub_api.models.movie import Movie
+from popcornhub_api.models.movie_facets import MovieFacets
+from popcornhub_api import util
+
+from popcornhub_api.models.movie import Movie  # noqa: E501
+from popcornhub_api.models.movie_facets import MovieFacets  # noqa: E501
+
+class MoviePage(Model):
+    """NOTE: This class is auto generated by OpenAPI Generator (https://openapi-generator.tech).
+
+    Do not edit the class manually.
+    """
+
+    def __init__(self, movies=None, total=None, facets=None, next_cursor=None):  # noqa: E501
+        """MoviePage - a model defined in OpenAPI
+
+        :param movies: The movies of this MoviePage.  # noqa: E501
+        :type movies: List[Movie]
+        :param total: The total of this MoviePage.  # noqa: E501
+        :type total: int
+        :param facets: The facets of this MoviePage.  # noqa: E501
+        :type facets: MovieFacets
+        :param next_cursor: The next_cursor of this MoviePage.  # noqa: E501
+        :type next_cursor: str
+        """
+        self.openapi_types = {
+            'movies': List[Movie],
+            'total': int,
+            'facets': MovieFacets,
+            'next_cursor': str
+        }
+
+        self.attribute_map = {
+            'movies': 'movies',
+            'total': 'total',
+            'facets': 'facets',
+            'next_cursor': 'next_cursor'
+        }
+
+        self._movies = movies
+        self._total = total
+        self._facets = facets
+        self._next_cursor = next_cursor
+
+    @classmethod
+    def from_dict(cls, dikt) -> 'MoviePage':
+        """Returns the dict as a model
+
+        :param dikt: A dict.
+        :type: dict
+        :return: The MoviePage of this MoviePage.  # noqa: E501
+        :rtype: MoviePage
+        """
+        return util.deserialize_model(dikt, cls)
+
+    @property
+    def movies(self) -> List[Movie]:
+        """Gets the movies of this MoviePage.
+
+
+        :return: The movies of this MoviePage.
+        :rtype: List[Movie]
+        """
+        return self._movies
+
+    @movies.setter
+    def movies(self, movies: List[Movie]):
+        """Sets the movies of this MoviePage.
+
+
+        :param movies: The movies of this MoviePage.
+        :type movies: List[Movie]
+        """
+
+        self._movies = movies
+
+    @property
+    def total(self) -> int:
+        """Gets the total of this MoviePage.
+
+
+        :return: The total of this MoviePage.
+        :rtype: int
+        """
+        return self._total
+
+    @total.setter
+    def total(self, total: int):
+        """Sets the total of this MoviePage.
+
+
+        :param total: The total of this MoviePage.
+        :type total: int
+        """
+
+        self._total = total
+
+    @property
+    def facets(self) -> MovieFacets:
+        """Gets the facets of this MoviePage.
+
+
+        :return: The facets of this MoviePage.
+        :rtype: MovieFacets
+        """
+        return self._facets
+
+    @facets.setter
+    def facets(self, facets: MovieFacets):
+        """Sets the facets of this MoviePage.
+
+
+        :param facets: The facets of this MoviePage.
+        :type facets: MovieFacets
+        """
+
+        self._facets = facets
+
+    @property
+    def next_cursor(self) -> str:
+        """Gets the next_cursor of this MoviePage.
+
+        Cursor for the next page; null on the last page  # noqa: E501
+
+        :return: The next_cursor of this MoviePage.
+        :rtype: str
+        """
+        return self._next_cursor
+
+    @next_cursor.setter
+    def next_cursor(self, next_cursor: str):
+        """Sets the next_cursor of this MoviePage.
+
+        Cursor for the next page; null on the last page  # noqa: E501
+
+        :param next_cursor: The next_cursor of this MoviePage.
+        :type next_cursor: str
+        """
+
+        self._next_cursor = next_cursor
@@ -2,7 +2,9 @@ import unittest
 
 from flask import json
 
+from popcornhub_api.models.ai_chat_batch_post_request import AiChatBatchPostRequest  # noqa: E501
 from popcornhub_api.models.ai_chat_post_request import AiChatPostRequest  # noqa: E501
+from popcornhub_api.models.chat_analysis import ChatAnalysis  # noqa: E501
 from popcornhub_api.models.chat_response import ChatResponse  # noqa: E501
 from popcornhub_api.models.error import Error  # noqa: E501
 from popcornhub_api.models.health_get200_response import HealthGet200Response  # noqa: E501
@@ -17,6 +19,25 @@ from popcornhub_api.test import BaseTestCase
 class TestDefaultController(BaseTestCase):
     """DefaultController integration test stubs"""
 
+    def test_ai_chat_batch_post(self):
+        """Test case for ai_chat_batch_post
+
+        Batch chat analysis
+        """
+        ai_chat_batch_post_request = popcornhub_api.AiChatBatchPostRequest()
+        headers = { 
+            'Accept': 'application/json',
+            'Content-Type': 'application/json',
+        }
+        response = self.client.open(
+            '/api/ai-chat/batch',
+            method='POST',
+            headers=headers,
+            data=json.dumps(ai_chat_batch_post_request),
+            content_type='application/json')
+        self.assert200(response,
+                       'Response body is : ' + response.data.decode('utf-8'))
+
     def test_ai_chat_post(self):
         """Test case for ai_chat_post
 
@@ -36,6 +57,39 @@ class TestDefaultController(BaseTestCase):
         self.assert200(response,
                        'Response body is : ' + response.data.decode('utf-8'))
 
+    def test_genres_genre_top_get(self):
+        """Test case for genres_genre_top_get
+
+        Get a genre leaderboard
+        """
+        query_string = [('limit', 10),
+                        ('weighted', False)]
+        headers = { 
+            'Accept': 'application/json',
+        }
+        response = self.client.open(
+            '/api/genres/{genre}/top'.format(genre='genre_example'),
+            method='GET',
+            headers=headers,
+            query_string=query_string)
+        self.assert200(response,
+                       'Response body is : ' + response.data.decode('utf-8'))
+
+    def test_genres_get(self):
+        """Test case for genres_get
+
+        List genres
+        """
+        headers = { 
+            'Accept': 'application/json',
+        }
+        response = self.client.open(
+            '/api/genres',
+            method='GET',
+            headers=headers)
+        self.assert200(response,
+                       'Response body is : ' + response.data.decode('utf-8'))
+
     def test_health_get(self):
         """Test case for health_get
 
@@ -51,6 +105,53 @@ class TestDefaultController(BaseTestCase):
         self.assert200(response,
                        'Response body is : ' + response.data.decode('utf-8'))
 
+    def test_movies_autocomplete_get(self):
+        """Test case for movies_autocomplete_get
+
+        Autocomplete movie titles
+        """
+        query_string = [('prefix', 'prefix_example'),
+                        ('limit', 10)]
+        headers = { 
+            'Accept': 'application/json',
+        }
+        response = self.client.open(
+            '/api/movies/autocomplete',
+            method='GET',
+            headers=headers,
+            query_string=query_string)
+        self.assert200(response,
+                       'Response body is : ' + response.data.decode('utf-8'))
+
+    def test_movies_browse_get(self):
+        """Test case for movies_browse_get
+
+        Browse movies
+        """
+        query_string = [('q', 'q_example'),
+                        ('genre', 'genre_example'),
+                        ('genres', ['genres_example']),
+                        ('genreMatch', 'any'),
+                        ('yearFrom', 56),
+                        ('yearTo', 56),
+                        ('minRating', 3.4),
+                        ('minRuntime', 56),
+                        ('maxRuntime', 56),
+                        ('director', 'director_example'),
+                        ('limit', 20),
+                        ('offset', 0),
+                        ('cursor', 'cursor_example')]
+        headers = { 
+            'Accept': 'application/json',
+        }
+        response = self.client.open(
+            '/api/movies/browse',
+            method='GET',
+            headers=headers,
+            query_string=query_string)
+        self.assert200(response,
+                       'Response body is : ' + response.data.decode('utf-8'))
+
     def test_movies_get(self):
         """Test case for movies_get
 
@@ -58,8 +159,17 @@ class TestDefaultController(BaseTestCase):
         """
         query_string = [('q', 'q_example'),
                         ('genre', 'genre_example'),
+                        ('genres', ['genres_example']),
+                        ('genreMatch', 'any'),
+                        ('yearFrom', 56),
+                        ('yearTo', 56),
+                        ('minRating', 3.4),
+                        ('minRuntime', 56),
+                        ('maxRuntime', 56),
+                        ('director', 'director_example'),
                         ('limit', 20),
-                        ('offset', 0)]
+                        ('offset', 0),
+                        ('cursor', 'cursor_example')]
         headers = { 
             'Accept': 'application/json',
         }
@@ -91,7 +201,8 @@ class TestDefaultController(BaseTestCase):
 
         Get movie recommendations
         """
-        query_string = [('limit', 10)]
+        query_string = [('limit', 10),
+                        ('weighted', False)]
         headers = { 
             'Accept': 'application/json',
         }
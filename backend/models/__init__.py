@@ -1,11 +1,17 @@
 # flake8: noqa
 # import models into model package
+from .ai_chat_batch_post_request import AiChatBatchPostRequest
 from .ai_chat_post_request import AiChatPostRequest
 from .cast_member import CastMember
+from .chat_analysis import ChatAnalysis
 from .chat_response import ChatResponse
 from .error import Error
+from .genre import Genre
 from .health_get200_response import HealthGet200Response
 from .movie import Movie
+from .movie_completion import MovieCompletion
+from .movie_facets import MovieFacets
+from .movie_page import MoviePage
 from .movie_suggestion import MovieSuggestion
 from .related_movie import RelatedMovie
 from .watchlist_delete200_response import WatchlistDelete200Response
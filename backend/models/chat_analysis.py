@@ -0,0 +1,113 @@
+from datetime import date, datetime  # noqa: F401
+
+from typing import List, Dict  # noqa: F401
+
+from popcornhub_api.models.base_model import Model
+from popcornhub_api import util
+
+
+class ChatAnalysis(Model):
+    """NOTE: This class is auto generated by OpenAPI Generator (https://openapi-generator.tech).
+
+    Do not edit the class manually.
+    """
+
+    def __init__(self, intent=None, confidence=None, entities=None):  # noqa: E501
+        """ChatAnalysis - a model defined in OpenAPI
+
+        :param intent: The intent of this ChatAnalysis.  # noqa: E501
+        :type intent: str
+        :param confidence: The confidence of this ChatAnalysis.  # noqa: E501
+        :type confidence: float
+        :param entities: The entities of this ChatAnalysis.  # noqa: E501
+        :type entities: Dict[str, str]
+        """
+        self.openapi_types = {
+            'intent': str,
+            'confidence': float,
+            'entities': Dict[str, str]
+        }
+
+        self.attribute_map = {
+            'intent': 'intent',
+            'confidence': 'confidence',
+            'entities': 'entities'
+        }
+
+        self._intent = intent
+        self._confidence = confidence
+        self._entities = entities
+
+    @classmethod
+    def from_dict(cls, dikt) -> 'ChatAnalysis':
+        """Returns the dict as a model
+
+        :param dikt: A dict.
+        :type: dict
+        :return: The ChatAnalysis of this ChatAnalysis.  # noqa: E501
+        :rtype: ChatAnalysis
+        """
+        return util.deserialize_model(dikt, cls)
+
+    @property
+    def intent(self) -> str:
+        """Gets the intent of this ChatAnalysis.
+
+
+        :return: The intent of this ChatAnalysis.
+        :rtype: str
+        """
+        return self._intent
+
+    @intent.setter
+    def intent(self, intent: str):
+        """Sets the intent of this ChatAnalysis.
+
+
+        :param intent: The intent of this ChatAnalysis.
+        :type intent: str
+        """
+
+        self._intent = intent
+
+    @property
+    def confidence(self) -> float:
+        """Gets the confidence of this ChatAnalysis.
+
+
+        :return: The confidence of this ChatAnalysis.
+        :rtype: float
+        """
+        return self._confidence
+
+    @confidence.setter
+    def confidence(self, confidence: float):
+        """Sets the confidence of this ChatAnalysis.
+
+
+        :param confidence: The confidence of this ChatAnalysis.
+        :type confidence: float
+        """
+
+        self._confidence = confidence
+
+    @property
+    def entities(self) -> Dict[str, str]:
+        """Gets the entities of this ChatAnalysis.
+
+
+        :return: The entities of this ChatAnalysis.
+        :rtype: Dict[str, str]
+        """
+        return self._entities
+
+    @entities.setter
+    def entities(self, entities: Dict[str, str]):
+        """Sets the entities of this ChatAnalysis.
+
+
+        :param entities: The entities of this ChatAnalysis.
+        :type entities: Dict[str, str]
+        """
+
+        self._entities = entities
@@ -16,7 +16,7 @@ class Movie(Model):
     Do not edit the class manually.
     """
 
-    def __init__(self, id=None, title=None, description=None, genre=None, rating=None, release_year=None, duration=None, director=None, cast=None, poster=None, trailer_url=None, related_movies=None, awards=None):  # noqa: E501
+    def __init__(self, id=None, title=None, description=None, genre=None, rating=None, votes=None, release_year=None, duration=None, director=None, cast=None, poster=None, trailer_url=None, related_movies=None, awards=None):  # noqa: E501
         """Movie - a model defined in OpenAPI
 
         :param id: The id of this Movie.  # noqa: E501
@@ -29,6 +29,8 @@ class Movie(Model):
         :type genre: List[str]
         :param rating: The rating of this Movie.  # noqa: E501
         :type rating: float
+        :param votes: The votes of this Movie.  # noqa: E501
+        :type votes: int
         :param release_year: The release_year of this Movie.  # noqa: E501
         :type release_year: int
         :param duration: The duration of this Movie.  # noqa: E501
@@ -52,6 +54,7 @@ class Movie(Model):
             'description': str,
             'genre': List[str],
             'rating': float,
+            'votes': int,
             'release_year': int,
             'duration': str,
             'director': str,
@@ -68,6 +71,7 @@ class Movie(Model):
             'description': 'description',
             'genre': 'genre',
             'rating': 'rating',
+            'votes': 'votes',
             'release_year': 'releaseYear',
             'duration': 'duration',
             'director': 'director',
@@ -83,6 +87,7 @@ class Movie(Model):
         self._description = description
         self._genre = genre
         self._rating = rating
+        self._votes = votes
         self._release_year = release_year
         self._duration = duration
         self._director = director
@@ -208,6 +213,27 @@ class Movie(Model):
 
         self._rating = rating
 
+    @property
+    def votes(self) -> int:
+        """Gets the votes of this Movie.
+
+
+        :return: The votes of this Movie.
+        :rtype: int
+        """
+        return self._votes
+
+    @votes.setter
+    def votes(self, votes: int):
+        """Sets the votes of this Movie.
+
+
+        :param votes: The votes of this Movie.
+        :type votes: int
+        """
+
+        self._votes = votes
+
     @property
     def release_year(self) -> int:
         """Gets the release_year of this Movie.
@@ -0,0 +1,113 @@
+from datetime import date, datetime  # noqa: F401
+
+from typing import List, Dict  # noqa: F401
+
+from popcornhub_api.models.base_model import Model
+from popcornhub_api import util
+
+
+class MovieCompletion(Model):
+    """NOTE: This class is auto generated by OpenAPI Generator (https://openapi-generator.tech).
+
+    Do not edit the class manually.
+    """
+
+    def __init__(self, id=None, title=None, year=None):  # noqa: E501
+        """MovieCompletion - a model defined in OpenAPI
+
+        :param id: The id of this MovieCompletion.  # noqa: E501
+        :type id: int
+        :param title: The title of this MovieCompletion.  # noqa: E501
+        :type title: str
+        :param year: The year of this MovieCompletion.  # noqa: E501
+        :type year: int
+        """
+        self.openapi_types = {
+            'id': int,
+            'title': str,
+            'year': int
+        }
+
+        self.attribute_map = {
+            'id': 'id',
+            'title': 'title',
+            'year': 'year'
+        }
+
+        self._id = id
+        self._title = title
+        self._year = year
+
+    @classmethod
+    def from_dict(cls, dikt) -> 'MovieCompletion':
+        """Returns the dict as a model
+
+        :param dikt: A dict.
+        :type: dict
+        :return: The MovieCompletion of this MovieCompletion.  # noqa: E501
+        :rtype: MovieCompletion
+        """
+        return util.deserialize_model(dikt, cls)
+
+    @property
+    def id(self) -> int:
+        """Gets the id of this MovieCompletion.
+
+
+        :return: The id of this MovieCompletion.
+        :rtype: int
+        """
+        return self._id
+
+    @id.setter
+    def id(self, id: int):
+        """Sets the id of this MovieCompletion.
+
+
+        :param id: The id of this MovieCompletion.
+        :type id: int
+        """
+
+        self._id = id
+
+    @property
+    def title(self) -> str:
+        """Gets the title of this MovieCompletion.
+
+
+        :return: The title of this MovieCompletion.
+        :rtype: str
+        """
+        return self._title
+
+    @title.setter
+    def title(self, title: str):
+        """Sets the title of this MovieCompletion.
+
+
+        :param title: The title of this MovieCompletion.
+        :type title: str
+        """
+
+        self._title = title
+
+    @property
+    def year(self) -> int:
+        """Gets the year of this MovieCompletion.
+
+
+        :return: The year of this MovieCompletion.
+        :rtype: int
+        """
+        return self._year
+
+    @year.setter
+    def year(self, year: int):
+        """Sets the year of this MovieCompletion.
+
+
+        :param year: The year of this MovieCompletion.
+        :type year: int
+        """
+
+        self._year = year
@@ -0,0 +1,46 @@
+"""
+PopcornHub recommendations.
+
+Engines that turn what users do (their watchlists) into personalized movie
+suggestions. `ItemSimilarity` is item-item collaborative filtering over
+watchlist co-occurrence (see similarity.py); each serving stack keeps one
+over its own watchlists.
+
+`EMBEDDINGS` is the approximate nearest-neighbor index over per-movie
+embeddings (see ann.py and embeddings.py), mapped from the file named by
+POPCORNHUB_EMBEDDINGS, or None when none is configured. It finds titles like
+the ones on a watchlist even when nobody has saved them together yet.
+
+`TOPLISTS` holds per-user recommendations computed offline for every user
+with a watchlist (see toplists.py), mapped from the file named by
+POPCORNHUB_TOPLISTS, or None. Users it has no entry for are served live.
+"""
+
+import os
+
+from .ann import IVFPQIndex
+from .similarity import ItemSimilarity
+
+
+def open_embeddings(path=None):
+    """Map the movie vector index, if one is configured."""
+    path = path or os.environ.get('POPCORNHUB_EMBEDDINGS')
+    return IVFPQIndex.load(path) if path else None
+
+
+# Vector index of movie embeddings, built offline
+EMBEDDINGS = open_embeddings()
+
+
+def open_toplists(path=None):
+    """Map the precomputed recommendations, if a file is configured."""
+    path = path or os.environ.get('POPCORNHUB_TOPLISTS')
+    if not path:
+        return None
+    from .toplists import TopLists
+
+    return TopLists(path)
+
+
+# Per-user recommendations, precomputed offline
+TOPLISTS = open_toplists()
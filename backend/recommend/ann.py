@@ -0,0 +1,289 @@
+"""
+Approximate Nearest Neighbors
+
+An IVF-PQ index over unit-length movie embeddings, in NumPy, so "more like
+this" queries do not compare against every title.
+
+Build:
+    A coarse k-means splits the vectors into `lists` inverted lists. Each
+    vector's residual from its list centroid is product-quantized: cut into
+    `subspaces` slices, each replaced by the id (uint8) of its nearest
+    centroid in a per-slice codebook of up to 256 entries.
+
+Query:
+    The `nprobe` lists whose centroids are nearest the query are scanned.
+    For a residual r of list centroid c,
+
+        |q - c - r|^2 = |q - c|^2 + (|r|^2 + 2 c.r) - 2 q.r
+
+    The middle term is stored per vector at build time and q.r is a sum of
+    one lookup per slice into a small table computed once per query, so the
+    scan is a gather and a sum over uint8 codes. The best `rerank`
+    candidates by that estimate are then re-scored exactly against the
+    stored vectors.
+
+An index is saved as a single file (header, then 8-byte aligned arrays) and
+loaded with the arrays as views of a read-only memory map, so workers share
+its pages and loading does not depend on its size.
+"""
+
+import mmap
+import struct
+import sys
+
+import numpy as np
+
+MAGIC = b'PHANN001'
+# magic, byte order, dimensions, lists, subspaces, codes per subspace, vectors
+HEADER = struct.Struct('=8s1sxxxIIIIQ')
+ALIGN = 8
+
+DEFAULT_NPROBE = 16
+DEFAULT_RERANK = 256
+KMEANS_ITERATIONS = 12
+# Vectors used to train the coarse and product quantizers
+TRAINING_SAMPLE = 100000
+MAX_CODES = 256
+# Rows scored at once when assigning vectors to centroids
+ASSIGN_CHUNK = 16384
+
+
+def normalize(vectors):
+    """Scale rows to unit length (zero rows are left alone)."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1)
+
+
+def _assign(vectors, centroids):
+    """Return the index of the nearest centroid of each vector."""
+    centroid_norms = (centroids * centroids).sum(axis=1)
+    labels = np.empty(len(vectors), np.int64)
+    for start in range(0, len(vectors), ASSIGN_CHUNK):
+        chunk = vectors[start:start + ASSIGN_CHUNK]
+        # |v - c|^2 up to the |v|^2 term, which does not change the argmin
+        distances = centroid_norms - 2 * chunk @ centroids.T
+        labels[start:start + len(chunk)] = distances.argmin(axis=1)
+    return labels
+
+
+def kmeans(vectors, k, iterations=KMEANS_ITERATIONS, rng=None):
+    """Return k centroids of the vectors (Lloyd's algorithm)."""
+    rng = rng or np.random.default_rng(0)
+    if k >= len(vectors):
+        return np.array(vectors, dtype=np.float32)
+    centroids = vectors[rng.choice(len(vectors), k, replace=False)].astype(np.float32)
+    for _ in range(iterations):
+        labels = _assign(vectors, centroids)
+        counts = np.bincount(labels, minlength=k)
+        sums = np.stack([np.bincount(labels, weights=vectors[:, d], minlength=k)
+                         for d in range(vectors.shape[1])], axis=1)
+        filled = counts > 0
+        centroids[filled] = sums[filled] / counts[filled, None]
+        # Restart empty clusters on random vectors
+        empty = np.flatnonzero(~filled)
+        if len(empty):
+            centroids[empty] = vectors[rng.choice(len(vectors), len(empty), replace=False)]
+    return centroids
+
+
+def _pad(length):
+    return (-length) % ALIGN
+
+
+class IVFPQIndex:
+    # Array fields in file order, with their dtypes
+    FIELDS = [
+        ('ids', np.int64),
+        ('vectors', np.float32),
+        ('centroids', np.float32),
+        ('codebooks', np.float32),
+        ('offsets', np.int64),
+        ('members', np.int32),
+        ('codes', np.uint8),
+        ('bias', np.float32),
+    ]
+
+    def __init__(self, ids, vectors, centroids, codebooks, offsets, members, codes, bias):
+        # ids ascending, with their unit vectors (rows follow the ids)
+        self._ids = ids
+        self._vectors = vectors
+        # lists x dims coarse centroids; subspaces x codes x slice codebooks
+        self._centroids = centroids
+        self._codebooks = codebooks
+        # Rows of each list are members[offsets[l]:offsets[l + 1]], with
+        # their PQ codes and stored distance terms at the same positions
+        self._offsets = offsets
+        self._members = members
+        self._codes = codes
+        self._bias = bias
+        self._centroid_norms = (centroids * centroids).sum(axis=1)
+        self._mm = None
+
+    def __len__(self):
+        return len(self._ids)
+
+    @property
+    def dims(self):
+        return self._vectors.shape[1]
+
+    @classmethod
+    def build(cls, ids, vectors, lists=None, subspaces=None, sample=TRAINING_SAMPLE, seed=0):
+        """Index unit-normalized `vectors` under the matching `ids`.
+
+        `lists` defaults to about 4 * sqrt(n) and `subspaces` to about one
+        per four dimensions; the dimension count must be a multiple of
+        `subspaces`.
+        """
+        rng = np.random.default_rng(seed)
+        ids = np.asarray(ids, dtype=np.int64)
+        order = np.argsort(ids, kind='stable')
+        ids = ids[order]
+        vectors = normalize(vectors)[order]
+        size, dims = vectors.shape
+
+        lists = lists or max(1, min(size, int(4 * np.sqrt(size))))
+        if subspaces is None:
+            subspaces = max(1, dims // 4)
+            while dims % subspaces:
+                subspaces -= 1
+        elif dims % subspaces:
+            raise ValueError(f"{dims} dimensions cannot be split into {subspaces} subspaces")
+        width = dims // subspaces
+
+        training = vectors[rng.choice(size, sample, replace=False)] if size > sample else vectors
+        centroids = kmeans(training, lists, rng=rng)
+        labels = _assign(vectors, centroids)
+
+        residuals = vectors - centroids[labels]
+        training = residuals[rng.choice(size, sample, replace=False)] if size > sample else residuals
+        codes_per = min(MAX_CODES, len(training))
+        codebooks = np.zeros((subspaces, codes_per, width), np.float32)
+        codes = np.empty((size, subspaces), np.uint8)
+        for j in range(subspaces):
+            part = slice(j * width, (j + 1) * width)
+            book = kmeans(np.ascontiguousarray(training[:, part]), codes_per, rng=rng)
+            codebooks[j, :len(book)] = book
+            codes[:, j] = _assign(np.ascontiguousarray(residuals[:, part]), codebooks[j])
+
+        members = np.argsort(labels, kind='stable').astype(np.int32)
+        offsets = np.zeros(len(centroids) + 1, np.int64)
+        np.cumsum(np.bincount(labels, minlength=len(centroids)), out=offsets[1:])
+
+        # |r|^2 + 2 c.r of each quantized residual
+        quantized = codebooks[np.arange(subspaces), codes].reshape(size, dims)
+        bias = (quantized * quantized).sum(axis=1) + 2 * (centroids[labels] * quantized).sum(axis=1)
+
+        return cls(ids, vectors, centroids, codebooks, offsets, members,
+                   codes[members], bias[members].astype(np.float32))
+
+    def save(self, path):
+        """Write the index to a file (see load)."""
+        size, dims = self._vectors.shape
+        subspaces, codes_per, _ = self._codebooks.shape
+        byteorder = b'<' if sys.byteorder == 'little' else b'>'
+        with open(path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, byteorder, dims, len(self._centroids), subspaces, codes_per, size))
+            f.write(b'\0' * _pad(HEADER.size))
+            for name, dtype in self.FIELDS:
+                data = np.ascontiguousarray(getattr(self, '_' + name), dtype).tobytes()
+                f.write(data)
+                f.write(b'\0' * _pad(len(data)))
+
+    @classmethod
+    def load(cls, path):
+        """Open a saved index, its arrays mapped read-only from the file."""
+        with open(path, 'rb') as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, byteorder, dims, lists, subspaces, codes_per, size = HEADER.unpack_from(mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a PopcornHub vector index")
+        native = b'<' if sys.byteorder == 'little' else b'>'
+        if byteorder != native:
+            raise ValueError(f"{path} was written with a different byte order")
+
+        shapes = {
+            'ids': (size,),
+            'vectors': (size, dims),
+            'centroids': (lists, dims),
+            'codebooks': (subspaces, codes_per, dims // subspaces if subspaces else 0),
+            'offsets': (lists + 1,),
+            'members': (size,),
+            'codes': (size, subspaces),
+            'bias': (size,),
+        }
+        arrays = {}
+        offset = HEADER.size + _pad(HEADER.size)
+        for name, dtype in cls.FIELDS:
+            shape = shapes[name]
+            count = int(np.prod(shape))
+            arrays[name] = np.frombuffer(mm, dtype, count, offset).reshape(shape)
+            offset += arrays[name].nbytes + _pad(arrays[name].nbytes)
+
+        index = cls(**arrays)
+        index._mm = mm
+        return index
+
+    def _rows(self, movie_ids):
+        movie_ids = np.asarray(list(movie_ids), dtype=np.int64)
+        rows = np.searchsorted(self._ids, movie_ids)
+        found = rows < len(self._ids)
+        found[found] = self._ids[rows[found]] == movie_ids[found]
+        return rows[found]
+
+    def vector(self, movie_id):
+        """Return the embedding of a movie, or None."""
+        rows = self._rows([movie_id])
+        return self._vectors[rows[0]] if len(rows) else None
+
+    def search(self, query, k=10, nprobe=DEFAULT_NPROBE, rerank=DEFAULT_RERANK):
+        """Return (ids, cosine similarities) of about the k vectors nearest
+        the query, most similar first."""
+        query = normalize(query)
+        if not len(self._ids) or not np.any(query):
+            return np.empty(0, np.int64), np.empty(0, np.float32)
+
+        # Nearest lists; |q|^2 is left out of every distance
+        coarse = self._centroid_norms - 2 * self._centroids @ query
+        nprobe = min(nprobe, len(coarse))
+        probe = np.argpartition(coarse, nprobe - 1)[:nprobe]
+
+        starts = self._offsets[probe]
+        lengths = self._offsets[probe + 1] - starts
+        ends = np.cumsum(lengths)
+        positions = np.repeat(starts - ends + lengths, lengths) + np.arange(ends[-1])
+
+        # Estimated distances from one lookup table per query
+        subspaces, _, width = self._codebooks.shape
+        table = -2 * np.einsum('skw,sw->sk', self._codebooks, query.reshape(subspaces, width))
+        estimate = np.repeat(coarse[probe], lengths) + self._bias[positions]
+        estimate += table[np.arange(subspaces), self._codes[positions]].sum(axis=1)
+
+        if len(positions) > rerank:
+            positions = positions[np.argpartition(estimate, rerank - 1)[:rerank]]
+        rows = self._members[positions]
+        similarity = self._vectors[rows] @ query
+        best = np.argsort(-similarity, kind='stable')[:k]
+        return self._ids[rows[best]], similarity[best]
+
+    def search_exact(self, query, k=10):
+        """Return (ids, cosine similarities) of the k nearest vectors by a
+        full scan (for measuring recall)."""
+        similarity = self._vectors @ normalize(query)
+        k = min(k, len(similarity))
+        best = np.argpartition(-similarity, k - 1)[:k] if k else np.empty(0, np.int64)
+        best = best[np.argsort(-similarity[best], kind='stable')]
+        return self._ids[best], similarity[best]
+
+    def similar(self, movie_ids, k=10, **options):
+        """Return the ids of up to k titles most like the given ones (by
+        their mean embedding), leaving the given ones out."""
+        rows = self._rows(movie_ids)
+        if not len(rows):
+            return []
+        taste = self._vectors[rows].mean(axis=0)
+        options.setdefault('rerank', max(DEFAULT_RERANK, 2 * (k + len(rows))))
+        found, _ = self.search(taste, k + len(rows), **options)
+        exclude = set(self._ids[rows].tolist())
+        return [movie_id for movie_id in found.tolist() if movie_id not in exclude][:k]
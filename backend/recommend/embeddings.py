@@ -0,0 +1,65 @@
+"""
+Movie Embeddings
+
+Dense per-movie vectors for the vector index, computed offline.
+
+The sparse TF-IDF content and genre vectors of catalog.related are reduced
+to `dims` dimensions with a truncated SVD (latent semantic analysis), so
+titles that share vocabulary, people or genres end up close together. The
+vectors are indexed with IVFPQIndex and saved for the API to map at startup
+(see POPCORNHUB_EMBEDDINGS).
+
+Usage:
+    python -m recommend.embeddings catalog/data/movies.json vectors.phann
+    python -m recommend.embeddings catalog.phcat vectors.phann --dims 64
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from .ann import IVFPQIndex
+
+DEFAULT_DIMS = 64
+
+
+def embed(movies, dims=DEFAULT_DIMS, seed=0):
+    """Return (ids, vectors) for a list of movie records."""
+    from scipy import sparse
+    from sklearn.decomposition import TruncatedSVD
+
+    from catalog.related import GENRE_WEIGHT, vectorize
+
+    ids = np.array([movie['id'] for movie in movies], dtype=np.int64)
+    content, genre = vectorize(movies)
+    features = sparse.hstack([content, GENRE_WEIGHT * sparse.csr_matrix(genre)], format='csr')
+    if features.shape[1] <= dims or len(movies) <= dims:
+        # Too small to be worth reducing
+        return ids, features.toarray().astype(np.float32)
+    vectors = TruncatedSVD(dims, random_state=seed).fit_transform(features)
+    return ids, vectors.astype(np.float32)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Embed movies and build their vector index.")
+    parser.add_argument('source', help="movies (JSON, JSONL or a columnar .phcat catalog)")
+    parser.add_argument('output', help="vector index file to write")
+    parser.add_argument('--dims', type=int, default=DEFAULT_DIMS, help="embedding dimensions")
+    parser.add_argument('--lists', type=int, help="inverted lists (default: about 4 * sqrt(n))")
+    args = parser.parse_args(argv)
+
+    from catalog.related import load_movies
+
+    started = time.perf_counter()
+    ids, vectors = embed(load_movies(args.source), args.dims)
+    IVFPQIndex.build(ids, vectors, lists=args.lists).save(args.output)
+
+    print(f"Indexed {len(ids)} movies ({vectors.shape[1]} dimensions) into {args.output} "
+          f"in {time.perf_counter() - started:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
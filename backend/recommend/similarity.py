@@ -0,0 +1,349 @@
+"""
+Item Similarity
+
+Item-item collaborative filtering over users' watchlists.
+
+Two titles are similar when the same people keep them on their watchlists.
+Their cosine similarity is computed from co-occurrence counts,
+
+    similarity(a, b) = together(a, b) / sqrt(count(a) * count(b))
+
+of which each title keeps only its best `neighbors`, in a fixed-width table
+(int32 neighbor rows and their `together` counts). A user's candidates are
+every neighbor of every title on their watchlist, scored in one vectorized
+pass by summing their similarities, which are computed from the live counts
+at query time; serving cost depends on the watchlist length and
+`neighbors`, never on the size of the catalog.
+
+The table is built from a snapshot of the watchlists on first use and kept
+current incrementally after that. Watchlist changes are queued (see added
+and removed) and applied by a background thread: adding or removing a title
+updates its count, its co-occurrence count with each other title on that
+user's watchlist, and the neighbor lists of those pairs, in time
+proportional to the watchlist length. A title enters a full neighbor list
+only by beating its weakest entry when its own pair changes, so lists match
+a full build for the pairs that change and may lag for titles whose counts
+merely drift. Changed pair counts are kept in a dict beside the sorted
+arrays of the build and merged into them once they outgrow a fraction of
+those, so the dict stays bounded however long the server runs.
+"""
+
+import queue
+import threading
+
+import numpy as np
+
+DEFAULT_NEIGHBORS = 50
+# Watchlists whose pairs are counted together, bounding the memory of a build
+BUILD_CHUNK = 2048
+INITIAL_CAPACITY = 1024
+# Changed pairs tolerated before they are merged into the sorted arrays
+MIN_COMPACT = 1024
+COMPACT_FRACTION = 0.125
+
+
+def _pair_key(first, second):
+    """Key of unordered pairs of rows."""
+    low = np.minimum(first, second).astype(np.int64)
+    high = np.maximum(first, second).astype(np.int64)
+    return (low << 32) | high
+
+
+class ItemSimilarity:
+    def __init__(self, watchlists=None, neighbors=DEFAULT_NEIGHBORS):
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+
+        # user -> list of movie ids, read (not modified) by the engine
+        self._watchlists = watchlists if watchlists is not None else {}
+        self.neighbors = neighbors
+
+        # movie id -> row, and per row its id and watchlist count
+        self._rows = {}
+        self._items = np.empty(0, np.int64)
+        self._counts = np.empty(0, np.int64)
+        # Best neighbors of each row (-1 padded) and their co-occurrence counts
+        self._neighbors = np.full((0, neighbors), -1, np.int32)
+        self._together = np.zeros((0, neighbors), np.float32)
+        # Co-occurrence counts of every pair: sorted keys and counts as of
+        # the build, and the pairs changed since
+        self._pair_keys = np.empty(0, np.int64)
+        self._pair_counts = np.empty(0, np.int64)
+        self._pair_changes = {}
+        # The watchlists as the counts see them: user -> set of movie ids
+        self._seen = {}
+        self._built = False
+
+        self._events = queue.Queue()
+        self._updater = None
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __getstate__(self):
+        # Copies (e.g. for worker processes) carry the built table only
+        state = dict(self.__dict__, _watchlists={}, _seen={}, _updater=None)
+        for name in ('_lock', '_build_lock', '_events'):
+            del state[name]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._events = queue.Queue()
+
+    def fit(self, watchlists):
+        """Build the neighbor table from a {user: [movie ids]} mapping."""
+        lists = [np.unique(np.asarray(ids, dtype=np.int64)) for ids in watchlists.values() if len(ids)]
+        items = np.unique(np.concatenate(lists)) if lists else np.empty(0, np.int64)
+        size = len(items)
+        rows = [np.searchsorted(items, ids) for ids in lists]
+
+        counts = np.zeros(size, np.int64)
+        for row in rows:
+            counts[row] += 1
+
+        # Co-occurrence counts of each ordered pair, keyed row * size + row;
+        # pairs are expanded a chunk of watchlists at a time
+        keys = [np.empty(0, np.int64)]
+        together = [np.empty(0, np.int64)]
+        pairs = [row for row in rows if len(row) > 1]
+        for start in range(0, len(pairs), BUILD_CHUNK):
+            chunk = pairs[start:start + BUILD_CHUNK]
+            first = np.concatenate([np.repeat(row, len(row)) for row in chunk])
+            second = np.concatenate([np.tile(row, len(row)) for row in chunk])
+            distinct = first != second
+            found, found_counts = np.unique(first[distinct] * size + second[distinct], return_counts=True)
+            keys.append(found)
+            together.append(found_counts)
+        keys, inverse = np.unique(np.concatenate(keys), return_inverse=True)
+        together = np.bincount(inverse, weights=np.concatenate(together), minlength=len(keys)).astype(np.int64)
+
+        first, second = np.divmod(keys, size) if size else (keys, keys)
+        similarity = together / np.sqrt(counts[first] * counts[second])
+
+        # Each unordered pair once, for the incremental updates
+        lower = first < second
+        pair_keys = _pair_key(first[lower], second[lower])
+        order = np.argsort(pair_keys)
+        pair_keys, pair_counts = pair_keys[order], together[lower][order]
+
+        # Best neighbors first within each row, ties by row
+        order = np.lexsort((second, -similarity, first))
+        first, second, together = first[order], second[order], together[order]
+        starts = np.searchsorted(first, np.arange(size))
+        rank = np.arange(len(first)) - starts[first]
+        keep = rank < self.neighbors
+
+        capacity = max(INITIAL_CAPACITY, size)
+        table = np.full((capacity, self.neighbors), -1, np.int32)
+        weights = np.zeros((capacity, self.neighbors), np.float32)
+        table[first[keep], rank[keep]] = second[keep]
+        weights[first[keep], rank[keep]] = together[keep]
+
+        with self._lock:
+            self._rows = dict(zip(items.tolist(), range(size)))
+            self._items = np.zeros(capacity, np.int64)
+            self._items[:size] = items
+            self._counts = np.zeros(capacity, np.int64)
+            self._counts[:size] = counts
+            self._neighbors, self._together = table, weights
+            self._pair_keys, self._pair_counts = pair_keys, pair_counts
+            self._pair_changes = {}
+            self._seen = {user: set(ids) for user, ids in watchlists.items() if len(ids)}
+            self._built = True
+        return self
+
+    def _ensure_built(self):
+        """Build the table from the watchlists on first use."""
+        if self._built:
+            return
+        with self._build_lock:
+            if not self._built:
+                self.fit({user: list(ids) for user, ids in list(self._watchlists.items())})
+
+    def added(self, user, movie_id):
+        """Note that a title was added to a user's watchlist."""
+        self._queue(user, movie_id, True)
+
+    def removed(self, user, movie_id):
+        """Note that a title was removed from a user's watchlist."""
+        self._queue(user, movie_id, False)
+
+    def _queue(self, user, movie_id, add):
+        self._events.put((user, movie_id, add))
+        if self._updater is None:
+            with self._lock:
+                if self._updater is None:
+                    self._updater = threading.Thread(target=self._update_forever, daemon=True)
+                    self._updater.start()
+
+    def flush(self):
+        """Wait until every queued change has been applied."""
+        self._events.join()
+
+    def _update_forever(self):
+        while True:
+            user, movie_id, add = self._events.get()
+            try:
+                self._ensure_built()
+                self.apply(user, movie_id, add)
+            finally:
+                self._events.task_done()
+
+    def apply(self, user, movie_id, add=True):
+        """Update the counts and neighbor lists for one watchlist change.
+
+        Changes the counts already reflect (such as ones made before the
+        table was built) are ignored.
+        """
+        with self._lock:
+            seen = self._seen.setdefault(user, set())
+            if (movie_id in seen) == add:
+                return
+            if add:
+                others = list(seen)
+                seen.add(movie_id)
+            else:
+                seen.discard(movie_id)
+                others = list(seen)
+
+            row = self._row(movie_id)
+            others = np.array([self._row(other) for other in others], np.int64)
+            step = 1 if add else -1
+            self._counts[row] += step
+
+            # Current co-occurrence counts of the pairs this change touches
+            keys = _pair_key(np.full(len(others), row), others)
+            built = len(self._pair_keys)
+            if built:
+                positions = np.minimum(np.searchsorted(self._pair_keys, keys), built - 1)
+                counts = np.where(self._pair_keys[positions] == keys, self._pair_counts[positions], 0)
+            else:
+                counts = np.zeros(len(keys), np.int64)
+
+            for key, other, count in zip(keys.tolist(), others.tolist(), counts.tolist()):
+                count = self._pair_changes.get(key, count) + step
+                self._pair_changes[key] = count
+                self._place(row, other, count)
+                self._place(other, row, count)
+
+            if len(self._pair_changes) > max(MIN_COMPACT, COMPACT_FRACTION * len(self._pair_keys)):
+                self._compact()
+
+    def _compact(self):
+        """Merge the changed pair counts into the sorted arrays, dropping
+        pairs no watchlist holds together any more."""
+        changes = self._pair_changes
+        keys = np.fromiter(changes.keys(), np.int64, len(changes))
+        counts = np.fromiter(changes.values(), np.int64, len(changes))
+        stale = np.isin(self._pair_keys, keys, assume_unique=True)
+        keys = np.concatenate([self._pair_keys[~stale], keys])
+        counts = np.concatenate([self._pair_counts[~stale], counts])
+        order = np.argsort(keys, kind='stable')
+        keys, counts = keys[order], counts[order]
+        live = counts > 0
+        self._pair_keys, self._pair_counts = keys[live], counts[live]
+        self._pair_changes = {}
+
+    def _row(self, movie_id):
+        row = self._rows.get(movie_id)
+        if row is None:
+            row = self._rows[movie_id] = len(self._rows)
+            if row == len(self._items):
+                self._grow()
+            self._items[row] = movie_id
+        return row
+
+    def _grow(self):
+        capacity = max(INITIAL_CAPACITY, 2 * len(self._items))
+        size = len(self._items)
+        for name, fill in (('_items', 0), ('_counts', 0), ('_neighbors', -1), ('_together', 0)):
+            array = getattr(self, name)
+            grown = np.full((capacity,) + array.shape[1:], fill, array.dtype)
+            grown[:size] = array
+            setattr(self, name, grown)
+
+    def _place(self, row, other, together):
+        """Record the co-occurrence count of `other` in the neighbor list of
+        `row`: update (or drop) it if listed, otherwise list it if there is
+        room or it beats the weakest neighbor."""
+        neighbors = self._neighbors[row]
+        listed = np.flatnonzero(neighbors == other)
+        if len(listed):
+            if together > 0:
+                self._together[row, listed[0]] = together
+            else:
+                neighbors[listed[0]] = -1
+                self._together[row, listed[0]] = 0
+            return
+        if together <= 0:
+            return
+        empty = np.flatnonzero(neighbors < 0)
+        if len(empty):
+            slot = empty[0]
+        else:
+            # Similarities within a row share count(row), so compare
+            # together / sqrt(count(other))
+            strength = self._together[row] / np.sqrt(np.maximum(self._counts[neighbors], 1))
+            slot = strength.argmin()
+            if together / np.sqrt(max(self._counts[other], 1)) <= strength[slot]:
+                return
+        neighbors[slot] = other
+        self._together[row, slot] = together
+
+    def scores(self, movie_ids):
+        """Return (candidate movie ids, scores) for a watchlist, in no
+        particular order. Titles on the watchlist are not candidates."""
+        self._ensure_built()
+        with self._lock:
+            rows = np.array([row for row in map(self._rows.get, set(movie_ids)) if row is not None], np.int64)
+
+            # Gather every neighbor of the watched rows at once
+            neighbors = self._neighbors[rows]
+            listed = neighbors >= 0
+            owners = np.repeat(rows, listed.sum(axis=1))
+            others = neighbors[listed]
+            together = self._together[rows][listed]
+            similarity = together / np.sqrt(np.maximum(self._counts[owners] * self._counts[others], 1))
+            items = self._items
+
+        candidates, inverse = np.unique(others, return_inverse=True)
+        totals = np.bincount(inverse, weights=similarity, minlength=len(candidates))
+        unseen = ~np.isin(candidates, rows)
+        return items[candidates[unseen]], totals[unseen]
+
+    def recommend(self, movie_ids, limit=None, fallback=()):
+        """Return up to `limit` movie ids for someone whose watchlist holds
+        `movie_ids`, best first.
+
+        Titles already on the watchlist are left out, and places the
+        watchlist cannot fill are taken from `fallback` (ids, best first).
+        """
+        movie_ids = list(movie_ids)
+        candidates, totals = self.scores(movie_ids)
+        if limit is not None and limit < len(candidates):
+            # Every candidate tied with the k-th, so ties are cut by id below
+            cutoff = totals[np.argpartition(-totals, limit - 1)[limit - 1]] if limit else np.inf
+            best = totals >= cutoff
+            candidates, totals = candidates[best], totals[best]
+        ids = candidates[np.lexsort((candidates, -totals))][:limit].tolist()
+        return top_up(ids, fallback, limit, exclude=movie_ids)
+
+
+def top_up(ids, fallback, limit=None, exclude=()):
+    """Extend a list of movie ids, best first, with ids from `fallback` until
+    it holds `limit` of them, skipping repeats and anything in `exclude`."""
+    if limit is None or len(ids) < limit:
+        seen = set(ids)
+        seen.update(exclude)
+        # Stop as soon as the list is full, so a lazy fallback is not
+        # advanced (or computed) past what is needed
+        for movie_id in fallback:
+            if movie_id not in seen:
+                seen.add(movie_id)
+                ids.append(movie_id)
+                if limit is not None and len(ids) >= limit:
+                    break
+    return ids
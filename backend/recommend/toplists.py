@@ -0,0 +1,252 @@
+"""
+Precomputed Recommendations
+
+Offline top-N recommendations for every user with a watchlist, served with
+one hash probe per request.
+
+The job fits ItemSimilarity on all watchlists once, then scores users in
+shards over a process pool (optionally topping up each list with the titles
+nearest the watchlist in the vector index, see ann.py). The lists are
+written to a single memory-mapped file:
+
+    header     magic, byte order, slot count, user count, version
+    slots      open-addressing table of 64-bit user key hashes -> user index
+    keys       UTF-8 user keys (offsets + blob), to confirm a hash hit
+    lists      int64 movie ids per user (offsets + ids), best first
+
+The version (by default the build time) is stored in the header so a server
+can tell which run it is serving. Users missing from the file are served by
+the live path.
+
+Usage:
+    python -m recommend.toplists watchlists.json toplists.phtop
+    python -m recommend.toplists watchlists.json toplists.phtop --top 50 --workers 8 --embeddings vectors.phann
+"""
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+
+import numpy as np
+
+from .similarity import ItemSimilarity, top_up
+
+MAGIC = b'PHTOP002'
+HEADER = struct.Struct('=8s1sxxxxxxxQQQ')
+ALIGN = 8
+
+DEFAULT_TOP = 50
+DEFAULT_SHARD_SIZE = 1000
+
+# Set in each worker process by _init_worker
+_WORKER = None
+
+
+def user_hash(user):
+    """Return the nonzero 64-bit hash of a user key used by the slot table."""
+    digest = hashlib.blake2b(user.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little') or 1
+
+
+def _init_worker(engine, embeddings, top):
+    global _WORKER
+    if embeddings:
+        from .ann import IVFPQIndex
+
+        embeddings = IVFPQIndex.load(embeddings)
+    _WORKER = (engine, embeddings, top)
+
+
+def _score_shard(shard):
+    """Return [(user, ids)] for a shard of (user, watchlist) pairs."""
+    engine, embeddings, top = _WORKER
+    results = []
+    for user, watchlist in shard:
+        similar = embeddings.similar(watchlist, top) if embeddings is not None else ()
+        results.append((user, engine.recommend(watchlist, top, fallback=similar)))
+    return results
+
+
+def compute_toplists(watchlists, top=DEFAULT_TOP, workers=None, embeddings=None,
+                     shard_size=DEFAULT_SHARD_SIZE, progress=None):
+    """Return {user: [movie ids]} for every user with a non-empty watchlist.
+
+    `embeddings` is the path of a vector index to top lists up from.
+    `progress`, if given, is called with the number of users done.
+    """
+    engine = ItemSimilarity().fit(watchlists)
+    users = [(user, list(ids)) for user, ids in watchlists.items() if ids]
+    shards = [users[start:start + shard_size] for start in range(0, len(users), shard_size)]
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(shards) <= 1:
+        _init_worker(engine, embeddings, top)
+        results = map(_score_shard, shards)
+        pool = None
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                   initargs=(engine, embeddings, top))
+        results = pool.map(_score_shard, shards)
+    lists = {}
+    try:
+        for shard in results:
+            lists.update(shard)
+            if progress:
+                progress(len(lists))
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return lists
+
+
+def _pad(length):
+    return (-length) % ALIGN
+
+
+def write_toplists(path, lists, version=None):
+    """Write {user: [movie ids]} to a file, atomically replacing `path`."""
+    version = int(time.time()) if version is None else version
+    users = list(lists)
+    slots = 1
+    while slots < 2 * len(users):
+        slots *= 2
+
+    slot_hashes = np.zeros(slots, np.uint64)
+    slot_users = np.full(slots, -1, np.int64)
+    for index, user in enumerate(users):
+        key = user_hash(user)
+        slot = key & (slots - 1)
+        while slot_users[slot] >= 0:
+            slot = (slot + 1) & (slots - 1)
+        slot_hashes[slot] = key
+        slot_users[slot] = index
+
+    keys = [user.encode('utf-8') for user in users]
+    key_offsets = np.zeros(len(users) + 1, np.uint64)
+    np.cumsum([len(key) for key in keys], out=key_offsets[1:])
+    list_offsets = np.zeros(len(users) + 1, np.uint64)
+    np.cumsum([len(lists[user]) for user in users], out=list_offsets[1:])
+    ids = np.fromiter((movie_id for user in users for movie_id in lists[user]),
+                      np.int64, int(list_offsets[-1]))
+
+    byteorder = b'<' if sys.byteorder == 'little' else b'>'
+    fd, temp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, byteorder, slots, len(users), version))
+            for data in (slot_hashes.tobytes(), slot_users.tobytes(), key_offsets.tobytes(),
+                         b''.join(keys), list_offsets.tobytes(), ids.tobytes()):
+                f.write(data)
+                f.write(b'\0' * _pad(len(data)))
+        os.replace(temp, path)
+    except BaseException:
+        os.unlink(temp)
+        raise
+
+
+class TopLists:
+    """Read-only view over a precomputed recommendations file."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, byteorder, slots, users, version = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a PopcornHub recommendations file")
+        native = b'<' if sys.byteorder == 'little' else b'>'
+        if byteorder != native:
+            raise ValueError(f"{path} was written with a different byte order")
+        self.version = version
+        self._users = users
+
+        offset = HEADER.size
+
+        def take(dtype, count):
+            nonlocal offset
+            array = np.frombuffer(self._mm, dtype, count, offset)
+            offset += array.nbytes + _pad(array.nbytes)
+            return array
+
+        self._slot_hashes = take(np.uint64, slots)
+        self._slot_users = take(np.int64, slots)
+        self._key_offsets = take(np.uint64, users + 1)
+        self._keys = take(np.uint8, int(self._key_offsets[-1]))
+        self._list_offsets = take(np.uint64, users + 1)
+        self._ids = take(np.int64, int(self._list_offsets[-1]))
+        self._mask = slots - 1
+
+    def __len__(self):
+        return self._users
+
+    def __contains__(self, user):
+        return self._index(user) >= 0
+
+    def _index(self, user):
+        key = user_hash(user)
+        encoded = user.encode('utf-8')
+        slot = key & self._mask
+        while True:
+            index = int(self._slot_users[slot])
+            if index < 0:
+                return -1
+            if int(self._slot_hashes[slot]) == key:
+                start, stop = int(self._key_offsets[index]), int(self._key_offsets[index + 1])
+                if self._keys[start:stop].tobytes() == encoded:
+                    return index
+            slot = (slot + 1) & self._mask
+
+    def get(self, user):
+        """Return a user's precomputed movie ids, best first, or None."""
+        index = self._index(user)
+        if index < 0:
+            return None
+        start, stop = int(self._list_offsets[index]), int(self._list_offsets[index + 1])
+        return self._ids[start:stop].tolist()
+
+    def recommend(self, user, movie_ids, limit=None, fallback=()):
+        """Return up to `limit` movie ids for a user from their precomputed
+        list, or None if the file has no entry for them.
+
+        Titles added to the watchlist (`movie_ids`) since the list was built
+        are left out, and places it cannot fill are taken from `fallback`.
+        """
+        ids = self.get(user)
+        if ids is None:
+            return None
+        return top_up([], chain(ids, fallback), limit, exclude=movie_ids)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precompute top-N recommendations for every user.")
+    parser.add_argument('watchlists', help="JSON object of user -> list of movie ids")
+    parser.add_argument('output', help="recommendations file to write")
+    parser.add_argument('--top', type=int, default=DEFAULT_TOP, help="recommendations per user")
+    parser.add_argument('--workers', type=int, help="worker processes (default: CPU count)")
+    parser.add_argument('--shard-size', type=int, default=DEFAULT_SHARD_SIZE, help="users per task")
+    parser.add_argument('--embeddings', help="vector index to top lists up from (see recommend.embeddings)")
+    parser.add_argument('--version', type=int, help="version stored in the file (default: build time)")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    with open(args.watchlists, 'r') as f:
+        watchlists = json.load(f)
+    lists = compute_toplists(watchlists, args.top, args.workers, args.embeddings, args.shard_size)
+    write_toplists(args.output, lists, args.version)
+
+    print(f"Wrote recommendations for {len(lists)} users to {args.output} "
+          f"in {time.perf_counter() - started:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
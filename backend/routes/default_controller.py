@@ -5,70 +5,98 @@ from typing import Union
 from typing import List
 import sys
 import os
+from itertools import chain
 
 # Add chatbot directory to path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'chatbot'))
 
+from models.ai_chat_batch_post_request import AiChatBatchPostRequest  # noqa: E501
 from models.ai_chat_post_request import AiChatPostRequest  # noqa: E501
+from models.chat_analysis import ChatAnalysis  # noqa: E501
 from models.chat_response import ChatResponse  # noqa: E501
 from models.error import Error  # noqa: E501
+from models.genre import Genre  # noqa: E501
 from models.health_get200_response import HealthGet200Response  # noqa: E501
 from models.movie import Movie  # noqa: E501
+from models.movie_completion import MovieCompletion  # noqa: E501
+from models.movie_facets import MovieFacets  # noqa: E501
+from models.movie_page import MoviePage  # noqa: E501
 from models.movie_suggestion import MovieSuggestion  # noqa: E501
 from models.watchlist_delete200_response import WatchlistDelete200Response  # noqa: E501
 from models.watchlist_post200_response import WatchlistPost200Response  # noqa: E501
 from models.watchlist_request import WatchlistRequest  # noqa: E501
 from models.cast_member import CastMember
 from models.related_movie import RelatedMovie
-from chatbot.chatbot import PopcornHubChatbot
-
-# Mock movie data - in production, this would come from a database
-MOVIES = [
-    Movie(
-        id=1,
-        title="Inception",
-        description="A thief who steals corporate secrets through the use of dream-sharing technology is given the inverse task of planting an idea into the mind of a CEO.",
-        genre=["Sci-Fi", "Action", "Thriller"],
-        rating=8.8,
-        release_year=2010,
-        duration="148 min",
-        director="Christopher Nolan",
-        cast=[
-            CastMember(name="Leonardo DiCaprio", role="Dom Cobb"),
-            CastMember(name="Marion Cotillard", role="Mal Cobb"),
-            CastMember(name="Tom Hardy", role="Eames")
-        ],
-        poster="https://via.placeholder.com/600x900/1a1a1a/ffffff?text=Inception+Poster",
-        trailer_url="https://www.youtube.com/embed/YoHD9XEInc0",
-        related_movies=[
-            RelatedMovie(id=2, title="Interstellar", poster="https://via.placeholder.com/300x450/1a1a1a/ffffff?text=Interstellar", rating=8.6),
-            RelatedMovie(id=3, title="The Dark Knight", poster="https://via.placeholder.com/300x450/1a1a1a/ffffff?text=Dark+Knight", rating=9.0)
-        ]
-    ),
-    Movie(
-        id=2,
-        title="The Shawshank Redemption",
-        description="Two imprisoned men bond over a number of years, finding solace and eventual redemption through acts of common decency.",
-        genre=["Drama"],
-        rating=9.3,
-        release_year=1994,
-        duration="142 min",
-        director="Frank Darabont",
-        cast=[
-            CastMember(name="Tim Robbins", role="Andy Dufresne"),
-            CastMember(name="Morgan Freeman", role="Ellis Redding")
-        ],
-        poster="https://via.placeholder.com/600x900/1a1a1a/ffffff?text=Shawshank",
-        trailer_url="https://www.youtube.com/embed/6hB3S9bIaco",
-        related_movies=[
-            Movie(id=1, title="Inception", poster="https://via.placeholder.com/300x450/1a1a1a/ffffff?text=Inception", rating=8.8)
-        ]
-    )
-]
+from chatbot import CONFIDENCE_THRESHOLD, get_batcher, get_chatbot
+from catalog import AUTOCOMPLETE, CATALOG, FACETS, RATINGS, RELATED, SCORES, SEARCH, TRIGRAMS
+from catalog.related import related_movies
+from recommend import EMBEDDINGS, TOPLISTS, ItemSimilarity
+
+# Movie data is served from the shared, indexed catalog store
+MOVIES = CATALOG
+
+
+def _to_movie(record):
+    """Build the Movie model for a catalog record."""
+    return Movie.from_dict(record)
+
+
+def _select(q=None, genre=None, facets=False, limit=None, offset=None, cursor=None, **filters):
+    """Return the FACETS selection (a page of ids, the total, facet counts
+    and the next cursor) for a movie listing. Raises ValueError for an
+    invalid cursor."""
+    filters = {name: value for name, value in filters.items() if value is not None and value != []}
+    within = TRIGRAMS.match_ids(q) if q else None
+    return FACETS.select(within, facets=facets, limit=limit, offset=offset or 0,
+                         cursor=cursor, genre=genre, **filters)
+
+
+def _best_for(watchlist, limit=None, weighted=False):
+    """Yield the ids of the best titles for a watchlist, best first: the
+    best scoring for its genres, or the best rated (a slice of RATINGS)
+    when it is empty. Nothing is ranked until the first id is asked for."""
+    if watchlist:
+        yield from SCORES.top(limit, weighted=weighted, taste=watchlist)
+    else:
+        yield from RATINGS.top(limit, weighted=weighted)
+
 
 # Mock watchlist - in production, this would be in a database
 WATCHLISTS = {}
 
+# Item-item similarities learned from WATCHLISTS, for recommendations
+SIMILAR = ItemSimilarity(WATCHLISTS)
+
+def ai_chat_batch_post(body):  # noqa: E501
+    """Batch chat analysis
+
+    Classify the intent and extract the entities of many chat messages in one call, without replying to them or updating chat memory # noqa: E501
+
+    :param ai_chat_batch_post_request: 
+    :type ai_chat_batch_post_request: dict | bytes
+
+    :rtype: Union[List[ChatAnalysis], Tuple[List[ChatAnalysis], int], Tuple[List[ChatAnalysis], int, Dict[str, str]]
+    """
+    try:
+        ai_chat_batch_post_request = (AiChatBatchPostRequest.from_dict(body) if isinstance(body, dict)
+                                      else body)
+    except ValueError as e:
+        return Error(error=str(e)), 400
+    messages = ai_chat_batch_post_request.messages
+    if not messages:
+        return Error(error="messages is required"), 400
+
+    # Classify every message with one model call; no replies or memory
+    bot = get_chatbot()
+    results = []
+    for (intent, confidence), entities in zip(bot.predict_intent_batch(messages),
+                                              bot.extract_entities_batch(messages)):
+        if confidence < CONFIDENCE_THRESHOLD:
+            intent = 'fallback'
+        results.append(ChatAnalysis(intent=intent, confidence=confidence, entities=entities))
+    return results
+
+
 def ai_chat_post(body):  # noqa: E501
     """AI movie chat
 
@@ -82,70 +110,90 @@ def ai_chat_post(body):  # noqa: E501
     ai_chat_post_request = AiChatPostRequest.from_dict(body) if isinstance(body, dict) else body
 
     user_message = ai_chat_post_request.message
+    if not isinstance(user_message, str):
+        return Error(error="message must be a string"), 400
 
-    # Change to chatbot directory for file access
-    original_cwd = os.getcwd()
-    chatbot_dir = os.path.join(os.path.dirname(__file__), '..', '..', 'chatbot')
-    os.chdir(chatbot_dir)
-
-    try:
-        # Initialize chatbot
-        bot = PopcornHubChatbot()
+    # The shared chatbot, loaded once per process
+    bot = get_chatbot()
 
-        # Get user ID from request (default if not provided)
-        user_id = connexion.request.headers.get('X-User-ID', 'default_user')
+    # Get user ID from request (default if not provided)
+    user_id = connexion.request.headers.get('X-User-ID', 'default_user')
 
-        # Predict intent and extract entities
-        intent, confidence = bot.predict_intent(user_message)
-        entities = bot.extract_entities(user_message)
+    # Intent, entities and reply, answered together with any concurrent
+    # messages by the micro-batcher
+    intent, entities, bot_response = get_batcher().respond(user_message)
 
-        if confidence < 0.6:
-            intent = 'fallback'
+    # Update memory
+    bot.update_memory(user_id, intent, entities)
 
-        # Get response from chatbot
-        bot_response = bot.get_response(intent, entities, user_message)
-
-        # Update memory
-        bot.update_memory(user_id, intent, entities)
-
-        # Create suggestions based on intent
-        suggestions = []
-        if intent == 'suggest_movie' and 'genre' in entities:
-            # Filter movies by genre
-            genre_movies = [m for m in MOVIES if any(g.lower() == entities['genre'] for g in m.genre)]
-            if genre_movies:
-                for movie in genre_movies[:3]:  # Limit to 3 suggestions
-                    suggestions.append(MovieSuggestion(
-                        id=movie.id,
-                        title=movie.title,
-                        poster=movie.poster,
-                        year=movie.release_year,
-                        rating=movie.rating
-                    ))
-        elif intent in ['suggest_movie', 'greeting']:
-            # General recommendations
-            top_movies = sorted(MOVIES, key=lambda x: x.rating, reverse=True)[:3]
-            for movie in top_movies:
+    # Create suggestions based on intent
+    suggestions = []
+    if intent == 'suggest_movie' and 'genre' in entities:
+        # Best rated movies of the genre, read off its leaderboard
+        genre_movies = MOVIES.get_many(RATINGS.top(3, genre=entities['genre']))
+        if genre_movies:
+            for movie in genre_movies:
                 suggestions.append(MovieSuggestion(
-                    id=movie.id,
-                    title=movie.title,
-                    poster=movie.poster,
-                    year=movie.release_year,
-                    rating=movie.rating
+                    id=movie['id'],
+                    title=movie['title'],
+                    poster=movie['poster'],
+                    year=movie['releaseYear'],
+                    rating=movie['rating']
                 ))
+    elif intent in ['suggest_movie', 'greeting']:
+        # General recommendations: titles like the ones on the user's
+        # watchlist when there are any, otherwise the best scoring
+        watchlist = WATCHLISTS.get(user_id, [])
+        similar = EMBEDDINGS.similar(watchlist, 3) if EMBEDDINGS is not None and watchlist else []
+        top_movies = MOVIES.get_many(similar or _best_for(watchlist, 3))
+        for movie in top_movies:
+            suggestions.append(MovieSuggestion(
+                id=movie['id'],
+                title=movie['title'],
+                poster=movie['poster'],
+                year=movie['releaseYear'],
+                rating=movie['rating']
+            ))
 
-        response = ChatResponse(
-            text=bot_response,
-            suggestions=suggestions
-        )
-
-    finally:
-        # Restore original working directory
-        os.chdir(original_cwd)
+    response = ChatResponse(
+        text=bot_response,
+        suggestions=suggestions
+    )
 
     return response
 
 
+def genres_genre_top_get(genre, limit=None, weighted=None):  # noqa: E501
+    """Get a genre leaderboard
+
+    Get the best rated titles of a genre (case-insensitive) # noqa: E501
+
+    :param genre: Genre name
+    :type genre: str
+    :param limit: Maximum number of movies to return
+    :type limit: int
+    :param weighted: Rank by vote-weighted (Bayesian) rating instead of raw rating
+    :type weighted: bool
+
+    :rtype: Union[List[Movie], Tuple[List[Movie], int], Tuple[List[Movie], int, Dict[str, str]]
+    """
+    top = RATINGS.top(limit or 10, weighted=bool(weighted), genre=genre)
+    if not top:
+        return Error(error="Genre not found"), 404
+    return [_to_movie(m) for m in MOVIES.get_many(top)]
+
+
+def genres_get():  # noqa: E501
+    """List genres
+
+    List the genres in the catalog with the number of titles in each, most titles first # noqa: E501
+
+
+    :rtype: Union[List[Genre], Tuple[List[Genre], int], Tuple[List[Genre], int, Dict[str, str]]
+    """
+    return [Genre(name=name, count=count) for name, count in RATINGS.genres()]
+
+
 def health_get():  # noqa: E501
     """Health check
 
@@ -157,37 +205,119 @@ def health_get():  # noqa: E501
     return HealthGet200Response(status="healthy")
 
 
-def movies_get(q=None, genre=None, limit=None, offset=None):  # noqa: E501
-    """Get movies
+def movies_autocomplete_get(prefix, limit=None):  # noqa: E501
+    """Autocomplete movie titles
 
-    Retrieve a list of movies with optional filtering # noqa: E501
+    Suggest titles starting with a prefix (or with a word starting with it), best rated first # noqa: E501
+
+    :param prefix: Title prefix typed so far
+    :type prefix: str
+    :param limit: Maximum number of completions to return
+    :type limit: int
+
+    :rtype: Union[List[MovieCompletion], Tuple[List[MovieCompletion], int], Tuple[List[MovieCompletion], int, Dict[str, str]]
+    """
+    return [
+        MovieCompletion(id=movie_id, title=title, year=year)
+        for movie_id, title, year in AUTOCOMPLETE.complete(prefix, limit)
+    ]
+
+
+def movies_browse_get(q=None, genre=None, genres=None, genre_match=None, year_from=None, year_to=None, min_rating=None, min_runtime=None, max_runtime=None, director=None, limit=None, offset=None, cursor=None):  # noqa: E501
+    """Browse movies
+
+    Filter movies and get facet counts for the matching set in one call # noqa: E501
 
     :param q: Search query for movie title or description
     :type q: str
     :param genre: Filter by genre
     :type genre: str
+    :param genres: Filter by several genres, combined as set by genreMatch
+    :type genres: List[str]
+    :param genre_match: Whether movies must have any or all of the given genres
+    :type genre_match: str
+    :param year_from: Earliest release year
+    :type year_from: int
+    :param year_to: Latest release year
+    :type year_to: int
+    :param min_rating: Minimum rating
+    :type min_rating: float
+    :param min_runtime: Minimum runtime in minutes
+    :type min_runtime: int
+    :param max_runtime: Maximum runtime in minutes
+    :type max_runtime: int
+    :param director: Filter by director (case-insensitive)
+    :type director: str
     :param limit: Maximum number of movies to return
     :type limit: int
-    :param offset: Number of movies to skip
+    :param offset: Number of movies to skip (ignored when a cursor is given)
     :type offset: int
+    :param cursor: Opaque cursor from a previous page, to fetch the page after it
+    :type cursor: str
 
-    :rtype: Union[List[Movie], Tuple[List[Movie], int], Tuple[List[Movie], int, Dict[str, str]]
+    :rtype: Union[MoviePage, Tuple[MoviePage, int], Tuple[MoviePage, int, Dict[str, str]]
     """
-    filtered_movies = MOVIES
+    try:
+        selection = _select(q, genre, facets=True, limit=limit, offset=offset, cursor=cursor,
+                            genres=genres, genre_match=genre_match, year_from=year_from,
+                            year_to=year_to, min_rating=min_rating, min_runtime=min_runtime,
+                            max_runtime=max_runtime, director=director)
+    except ValueError as e:
+        return Error(error=str(e)), 400
+    return MoviePage(
+        movies=[_to_movie(m) for m in MOVIES.get_many(selection.ids)],
+        total=selection.total,
+        facets=MovieFacets.from_dict(selection.facets),
+        next_cursor=selection.next_cursor
+    )
 
-    if q:
-        filtered_movies = [m for m in filtered_movies if q.lower() in m.title.lower() or q.lower() in m.description.lower()]
 
-    if genre:
-        filtered_movies = [m for m in filtered_movies if any(g.lower() == genre.lower() for g in m.genre)]
+def movies_get(q=None, genre=None, genres=None, genre_match=None, year_from=None, year_to=None, min_rating=None, min_runtime=None, max_runtime=None, director=None, limit=None, offset=None, cursor=None):  # noqa: E501
+    """Get movies
 
-    if offset:
-        filtered_movies = filtered_movies[offset:]
+    Retrieve a list of movies with optional filtering # noqa: E501
+
+    :param q: Search query for movie title or description
+    :type q: str
+    :param genre: Filter by genre
+    :type genre: str
+    :param genres: Filter by several genres, combined as set by genreMatch
+    :type genres: List[str]
+    :param genre_match: Whether movies must have any or all of the given genres
+    :type genre_match: str
+    :param year_from: Earliest release year
+    :type year_from: int
+    :param year_to: Latest release year
+    :type year_to: int
+    :param min_rating: Minimum rating
+    :type min_rating: float
+    :param min_runtime: Minimum runtime in minutes
+    :type min_runtime: int
+    :param max_runtime: Maximum runtime in minutes
+    :type max_runtime: int
+    :param director: Filter by director (case-insensitive)
+    :type director: str
+    :param limit: Maximum number of movies to return
+    :type limit: int
+    :param offset: Number of movies to skip (ignored when a cursor is given)
+    :type offset: int
+    :param cursor: Opaque cursor from a previous page, to fetch the page after it
+    :type cursor: str
 
-    if limit:
-        filtered_movies = filtered_movies[:limit]
+    :rtype: Union[List[Movie], Tuple[List[Movie], int], Tuple[List[Movie], int, Dict[str, str]]
+    """
+    try:
+        selection = _select(q, genre, limit=limit, offset=offset, cursor=cursor,
+                            genres=genres, genre_match=genre_match, year_from=year_from,
+                            year_to=year_to, min_rating=min_rating, min_runtime=min_runtime,
+                            max_runtime=max_runtime, director=director)
+    except ValueError as e:
+        return Error(error=str(e)), 400
 
-    return filtered_movies
+    # Only the requested page is looked up; the cursor for the next one
+    # travels in a header so the body stays a plain list
+    headers = {'X-Next-Cursor': selection.next_cursor} if selection.next_cursor else {}
+    return [_to_movie(m) for m in MOVIES.get_many(selection.ids)], 200, headers
 
 
 def movies_movie_id_get(movie_id):  # noqa: E501
@@ -200,27 +330,47 @@ def movies_movie_id_get(movie_id):  # noqa: E501
 
     :rtype: Union[Movie, Tuple[Movie, int], Tuple[Movie, int, Dict[str, str]]
     """
-    movie = next((m for m in MOVIES if m.id == movie_id), None)
+    movie = MOVIES.get(movie_id)
     if movie:
-        return movie
+        result = _to_movie(movie)
+        # Related titles come from the precomputed neighbor table, with each
+        # one's current title, poster and rating
+        result.related_movies = [
+            RelatedMovie.from_dict(related) for related in related_movies(MOVIES, movie, RELATED)
+        ]
+        return result
     return Error(error="Movie not found"), 404
 
 
-def movies_recommendations_get(limit=None):  # noqa: E501
+def movies_recommendations_get(limit=None, weighted=None):  # noqa: E501
     """Get movie recommendations
 
     Retrieve personalized movie recommendations # noqa: E501
 
     :param limit: Maximum number of recommendations to return
     :type limit: int
+    :param weighted: Rank by vote-weighted (Bayesian) rating instead of raw rating
+    :type weighted: bool
 
     :rtype: Union[List[Movie], Tuple[List[Movie], int], Tuple[List[Movie], int, Dict[str, str]]
     """
-    # Simple recommendation logic - return top rated movies
-    recommendations = sorted(MOVIES, key=lambda x: x.rating, reverse=True)
-    if limit:
-        recommendations = recommendations[:limit]
-    return recommendations
+    # In production, get user_id from JWT token
+    user_id = connexion.request.headers.get('X-User-ID', 'anonymous')
+    watchlist = WATCHLISTS.get(user_id, [])
+
+    # Titles kept alongside the user's watchlist by others, then titles near
+    # it in embedding space, topped up with the best scoring ones for the
+    # user's genres (see catalog/scoring.py), or the best rated without a
+    # watchlist; read from the offline lists when the user has one, computed
+    # live otherwise, and the top-up ranked only if a list runs short
+    top_rated = _best_for(watchlist, limit or None, bool(weighted))
+    ids = TOPLISTS.recommend(user_id, watchlist, limit or None, fallback=top_rated) if TOPLISTS is not None else None
+    if ids is None:
+        if EMBEDDINGS is not None and watchlist:
+            top_rated = chain(EMBEDDINGS.similar(watchlist, limit or 10), top_rated)
+        ids = SIMILAR.recommend(watchlist, limit or None, fallback=top_rated)
+    recommendations = MOVIES.get_many(ids)
+    return [_to_movie(m) for m in recommendations]
 
 
 def movies_search_get(q, limit=None):  # noqa: E501
@@ -235,19 +385,17 @@ def movies_search_get(q, limit=None):  # noqa: E501
 
     :rtype: Union[List[MovieSuggestion], Tuple[List[MovieSuggestion], int], Tuple[List[MovieSuggestion], int, Dict[str, str]]
     """
-    results = []
-    for movie in MOVIES:
-        if q.lower() in movie.title.lower() or q.lower() in movie.description.lower():
-            results.append(MovieSuggestion(
-                id=movie.id,
-                title=movie.title,
-                poster=movie.poster,
-                year=movie.release_year,
-                rating=movie.rating
-            ))
+    ranked = SEARCH.search(q, limit)
 
-    if limit:
-        results = results[:limit]
+    results = []
+    for movie in MOVIES.get_many(movie_id for movie_id, _ in ranked):
+        results.append(MovieSuggestion(
+            id=movie['id'],
+            title=movie['title'],
+            poster=movie['poster'],
+            year=movie['releaseYear'],
+            rating=movie['rating']
+        ))
 
     return results
 
@@ -270,6 +418,7 @@ def watchlist_delete(body):  # noqa: E501
     movie_id = watchlist_request.movie_id
     if user_id in WATCHLISTS and movie_id in WATCHLISTS[user_id]:
         WATCHLISTS[user_id].remove(movie_id)
+        SIMILAR.removed(user_id, movie_id)
         return WatchlistDelete200Response(message="Movie removed from watchlist")
 
     return Error(error="Movie not in watchlist"), 404
@@ -309,5 +458,6 @@ def watchlist_post(body):  # noqa: E501
     movie_id = watchlist_request.movie_id
     if movie_id not in WATCHLISTS[user_id]:
         WATCHLISTS[user_id].append(movie_id)
+        SIMILAR.added(user_id, movie_id)
 
     return WatchlistPost200Response(message="Movie added to watchlist")
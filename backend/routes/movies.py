@@ -1,108 +1,122 @@
 from flask import Blueprint, jsonify, request
 
+from catalog import AUTOCOMPLETE, CATALOG, FACETS, RATINGS, RELATED, SEARCH, TRIGRAMS
+from catalog.facets import parse_filters
+from catalog.related import related_movies
+
 movies_bp = Blueprint('movies', __name__)
 
-# Mock movie data - in production, this would come from a database
-MOVIES = [
-    {
-        "id": 1,
-        "title": "Inception",
-        "description": "A thief who steals corporate secrets through the use of dream-sharing technology is given the inverse task of planting an idea into the mind of a CEO.",
-        "genre": ["Sci-Fi", "Action", "Thriller"],
-        "rating": 8.8,
-        "releaseYear": 2010,
-        "duration": "148 min",
-        "director": "Christopher Nolan",
-        "cast": [
-            {"name": "Leonardo DiCaprio", "role": "Dom Cobb"},
-            {"name": "Marion Cotillard", "role": "Mal Cobb"},
-            {"name": "Tom Hardy", "role": "Eames"}
-        ],
-        "poster": "https://via.placeholder.com/600x900/1a1a1a/ffffff?text=Inception+Poster",
-        "trailerUrl": "https://www.youtube.com/embed/YoHD9XEInc0",
-        "relatedMovies": [
-            {"id": 2, "title": "Interstellar", "poster": "https://via.placeholder.com/300x450/1a1a1a/ffffff?text=Interstellar", "rating": 8.6},
-            {"id": 3, "title": "The Dark Knight", "poster": "https://via.placeholder.com/300x450/1a1a1a/ffffff?text=Dark+Knight", "rating": 9.0}
-        ]
-    },
-    {
-        "id": 2,
-        "title": "The Shawshank Redemption",
-        "description": "Two imprisoned men bond over a number of years, finding solace and eventual redemption through acts of common decency.",
-        "genre": ["Drama"],
-        "rating": 9.3,
-        "releaseYear": 1994,
-        "duration": "142 min",
-        "director": "Frank Darabont",
-        "cast": [
-            {"name": "Tim Robbins", "role": "Andy Dufresne"},
-            {"name": "Morgan Freeman", "role": "Ellis Redding"}
-        ],
-        "poster": "https://via.placeholder.com/600x900/1a1a1a/ffffff?text=Shawshank",
-        "trailerUrl": "https://www.youtube.com/embed/6hB3S9bIaco",
-        "relatedMovies": [
-            {"id": 1, "title": "Inception", "poster": "https://via.placeholder.com/300x450/1a1a1a/ffffff?text=Inception", "rating": 8.8}
-        ]
-    }
-]
+# Movie data is served from the shared, indexed catalog store
+MOVIES = CATALOG
 
 @movies_bp.route('/movies', methods=['GET'])
 def get_movies():
     """Get all movies or search by query"""
     query = request.args.get('q', '').lower()
     genre = request.args.get('genre', '').lower()
+    try:
+        filters = parse_filters(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
-    filtered_movies = MOVIES
+    if not query and not genre and not filters:
+        return jsonify(MOVIES.slice())
 
-    if query:
-        filtered_movies = [m for m in filtered_movies if query in m['title'].lower() or query in m['description'].lower()]
+    if not genre and not filters:
+        return jsonify(TRIGRAMS.matches(query))
 
-    if genre:
-        filtered_movies = [m for m in filtered_movies if any(g.lower() == genre for g in m['genre'])]
+    selection = FACETS.select(TRIGRAMS.match_ids(query) if query else None, genre=genre, **filters)
+    return jsonify(MOVIES.get_many(selection.ids))
 
-    return jsonify(filtered_movies)
+@movies_bp.route('/movies/browse', methods=['GET'])
+def browse_movies():
+    """Filter movies and return facet counts for the matching set"""
+    query = request.args.get('q', '').lower()
+    genre = request.args.get('genre', '').lower()
+    try:
+        filters = parse_filters(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    selection = FACETS.select(TRIGRAMS.match_ids(query) if query else None,
+                              facets=True, genre=genre, **filters)
+    return jsonify({"movies": MOVIES.get_many(selection.ids), "total": selection.total,
+                    "facets": selection.facets})
 
 @movies_bp.route('/movies/<int:movie_id>', methods=['GET'])
 def get_movie(movie_id):
     """Get movie details by ID"""
-    movie = next((m for m in MOVIES if m['id'] == movie_id), None)
+    movie = MOVIES.get(movie_id)
     if movie:
-        return jsonify(movie)
+        return jsonify(dict(movie, relatedMovies=related_movies(MOVIES, movie, RELATED)))
     return jsonify({"error": "Movie not found"}), 404
 
 @movies_bp.route('/movies/recommendations', methods=['GET'])
 def get_recommendations():
     """Get movie recommendations"""
-    # Simple recommendation logic - return top rated movies
-    recommendations = sorted(MOVIES, key=lambda x: x['rating'], reverse=True)[:5]
+    # Top rated movies, read off the rating-ordered index
+    weighted = request.args.get('weighted', '').lower() == 'true'
+    recommendations = MOVIES.get_many(RATINGS.top(5, weighted=weighted))
     return jsonify(recommendations)
 
 @movies_bp.route('/movies/search', methods=['GET'])
 def search_movies():
-    """Search movies by title or description"""
+    """Search movies by title, description, director or cast (ranked)"""
     query = request.args.get('q', '')
     if not query:
         return jsonify({"error": "Query parameter 'q' is required"}), 400
 
     results = []
-    for movie in MOVIES:
-        if query.lower() in movie['title'].lower() or query.lower() in movie['description'].lower():
-            results.append({
-                "id": movie['id'],
-                "title": movie['title'],
-                "poster": movie['poster'],
-                "rating": movie['rating'],
-                "year": movie['releaseYear']
-            })
+    for movie in MOVIES.get_many(movie_id for movie_id, _ in SEARCH.search(query)):
+        results.append({
+            "id": movie['id'],
+            "title": movie['title'],
+            "poster": movie['poster'],
+            "rating": movie['rating'],
+            "year": movie['releaseYear']
+        })
 
     return jsonify(results)
 
+@movies_bp.route('/movies/autocomplete', methods=['GET'])
+def autocomplete_movies():
+    """Complete a title prefix, best rated first"""
+    prefix = request.args.get('prefix', '')
+    if not prefix:
+        return jsonify({"error": "Query parameter 'prefix' is required"}), 400
+
+    completions = AUTOCOMPLETE.complete(prefix)
+    return jsonify([
+        {"id": movie_id, "title": title, "year": year}
+        for movie_id, title, year in completions
+    ])
+
+@movies_bp.route('/genres', methods=['GET'])
+def get_genres():
+    """List genres with their title counts, most titles first"""
+    return jsonify([{"name": name, "count": count} for name, count in RATINGS.genres()])
+
+@movies_bp.route('/genres/<genre>/top', methods=['GET'])
+def get_genre_top(genre):
+    """Get the best rated movies of a genre"""
+    limit = request.args.get('limit') or '10'
+    if not limit.isdigit() or int(limit) < 1:
+        return jsonify({"error": "Query parameter 'limit' must be a positive integer"}), 400
+    limit = int(limit)
+    weighted = request.args.get('weighted', '').lower() == 'true'
+    top = RATINGS.top(limit, weighted=weighted, genre=genre)
+    if not top:
+        return jsonify({"error": "Genre not found"}), 404
+    return jsonify(MOVIES.get_many(top))
+
 @movies_bp.route('/ai-chat', methods=['POST'])
 def ai_chat():
     """Handle AI chat for movie recommendations"""
     data = request.get_json()
     if not data or 'message' not in data:
         return jsonify({"error": "Message is required"}), 400
+    if not isinstance(data['message'], str):
+        return jsonify({"error": "message must be a string"}), 400
 
     user_message = data['message'].lower()
 
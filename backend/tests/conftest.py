@@ -0,0 +1,28 @@
+import os
+import sys
+
+import pytest
+
+# The backend packages (catalog, recommend, chatbot, ...) and the generated
+# API models, as the serving stacks import them
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (BACKEND_DIR, os.path.join(BACKEND_DIR, 'generated')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+@pytest.fixture(autouse=True, scope='session')
+def chat_memory(tmp_path_factory):
+    """Keep the shared chatbot's memory out of chatbot/chatbot_memory.json."""
+    import chatbot
+
+    path = str(tmp_path_factory.mktemp('chat') / 'memory.json')
+    previous = os.environ.get('POPCORNHUB_CHAT_MEMORY')
+    os.environ['POPCORNHUB_CHAT_MEMORY'] = path
+    chatbot._CHATBOT = chatbot._BATCHER = None
+    yield path
+    chatbot._CHATBOT = chatbot._BATCHER = None
+    if previous is None:
+        del os.environ['POPCORNHUB_CHAT_MEMORY']
+    else:
+        os.environ['POPCORNHUB_CHAT_MEMORY'] = previous
@@ -0,0 +1,46 @@
+"""Request validation of the Flask app and the movies blueprint."""
+
+import pytest
+from flask import Flask
+
+import app_connexion
+from routes.movies import movies_bp
+
+
+def blueprint_app():
+    app = Flask('blueprint')
+    app.register_blueprint(movies_bp, url_prefix='/api')
+    return app
+
+
+@pytest.fixture(params=['app', 'blueprint'])
+def client(request):
+    app = app_connexion.app if request.param == 'app' else blueprint_app()
+    return app.test_client()
+
+
+@pytest.mark.parametrize('limit', ['abc', '0', '-3', '2.5'])
+def test_genre_top_rejects_bad_limit(client, limit):
+    response = client.get(f'/api/genres/drama/top?limit={limit}')
+    assert response.status_code == 400
+    assert "'limit'" in response.get_json()['error']
+
+
+def test_genre_top_limit(client):
+    assert len(client.get('/api/genres/drama/top?limit=1').get_json()) == 1
+
+
+@pytest.mark.parametrize('message', [123, None, ['hello'], {'text': 'hello'}])
+def test_chat_rejects_non_string_message(client, message):
+    response = client.post('/api/ai-chat', json={'message': message})
+    assert response.status_code == 400
+
+
+def test_search_matches_partial_words(client):
+    titles = [movie['title'] for movie in client.get('/api/movies/search?q=incep').get_json()]
+    assert titles == ['Inception']
+
+
+def test_movie_details_list_related_movies(client):
+    related = client.get('/api/movies/1').get_json()['relatedMovies']
+    assert [movie['title'] for movie in related] == ['The Shawshank Redemption']
@@ -0,0 +1,47 @@
+"""MicroBatcher: concurrent messages answered together, failures kept apart."""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from chatbot.batching import MicroBatcher
+
+
+class EchoBot:
+    """Answers (message, batch size); chokes on anything but a string."""
+
+    def respond_batch(self, messages):
+        return [(message.lower(), len(messages)) for message in messages]
+
+
+def answer_all(messages):
+    """Send the messages concurrently; the batch closes once all arrived."""
+    batcher = MicroBatcher(EchoBot(), window=5, max_batch=len(messages))
+    with ThreadPoolExecutor(len(messages)) as pool:
+        return batcher, [pool.submit(batcher.respond, message) for message in messages]
+
+
+def test_concurrent_messages_share_a_batch():
+    batcher, futures = answer_all(['A', 'B', 'C', 'D'])
+    assert sorted(future.result() for future in futures) == [('a', 4), ('b', 4), ('c', 4), ('d', 4)]
+    assert batcher.batches == 1 and batcher.messages == 4
+
+
+def test_bad_message_fails_only_its_own_request():
+    batcher, futures = answer_all(['A', 123, 'C'])
+    results = {}
+    for future in futures:
+        try:
+            results[future] = future.result()
+        except AttributeError:
+            results[future] = 'error'
+    assert sorted(map(str, results.values())) == ["('a', 1)", "('c', 1)", 'error']
+    # The batch of three failed; the good messages were answered alone
+    assert batcher.batches == 2 and batcher.messages == 2
+
+
+def test_direct_answers_without_a_window():
+    batcher = MicroBatcher(EchoBot(), window=0)
+    assert batcher.respond('Hi') == ('hi', 1)
+    with pytest.raises(AttributeError):
+        batcher.respond(None)
@@ -0,0 +1,127 @@
+"""The chat endpoints and the chatbot shared by their requests."""
+
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import app_connexion
+import chatbot
+from chatbot import CONFIDENCE_THRESHOLD
+from chatbot.chatbot import MEMORY_PATH, PopcornHubChatbot
+
+
+@pytest.fixture
+def client():
+    return app_connexion.app.test_client()
+
+
+def test_chat_remembers_users_outside_the_repo(client, chat_memory):
+    with open(MEMORY_PATH, 'rb') as f:
+        shipped = f.read()
+    response = client.post('/api/ai-chat', json={'message': 'Hello there!'}, headers={'X-User-ID': 'tester'})
+    assert response.status_code == 200 and response.get_json()['text']
+
+    with open(chat_memory) as f:
+        users = [entry['user_id'] for entry in json.load(f)['_default'].values()]
+    assert 'tester' in users
+    with open(MEMORY_PATH, 'rb') as f:
+        assert f.read() == shipped
+
+
+def test_requests_share_one_warm_chatbot(client, monkeypatch):
+    bot = chatbot.get_chatbot()
+    # A second chatbot would have to load the model again
+    monkeypatch.setattr(chatbot, 'open_chatbot', lambda *args, **kwargs: pytest.fail("chatbot reloaded"))
+    for message in ['Hi', 'Suggest a comedy movie', 'Bye']:
+        assert client.post('/api/ai-chat', json={'message': message}).status_code == 200
+    with ThreadPoolExecutor(8) as pool:
+        assert set(pool.map(lambda _: chatbot.get_chatbot(), range(32))) == {bot}
+    assert chatbot.get_batcher().bot is bot
+
+
+def test_first_use_builds_one_chatbot(monkeypatch):
+    monkeypatch.setattr(chatbot, '_CHATBOT', None)
+    monkeypatch.setattr(chatbot, '_BATCHER', None)
+    built = []
+    barrier = threading.Barrier(8)
+
+    def open_chatbot():
+        built.append(object())
+        return built[-1]
+
+    def first_use(_):
+        barrier.wait()
+        return chatbot.get_chatbot()
+
+    monkeypatch.setattr(chatbot, 'open_chatbot', open_chatbot)
+    with ThreadPoolExecutor(8) as pool:
+        found = set(pool.map(first_use, range(8)))
+    assert len(built) == 1 and found == {built[0]}
+
+
+def test_chatbot_loads_its_files_from_any_directory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    bot = PopcornHubChatbot(memory_path=str(tmp_path / 'memory.json'))
+    assert bot.predict_intent('Hello!')[0] == 'greeting'
+    assert bot.respond_batch(['Hello!'])[0][2]
+    bot.update_memory('tester', 'greeting', {})
+    assert os.getcwd() == str(tmp_path)
+    assert sorted(os.listdir(tmp_path)) == ['memory.json']
+
+
+def test_chatbot_paths_follow_the_environment(tmp_path, monkeypatch):
+    memory = tmp_path / 'elsewhere.json'
+    monkeypatch.setenv('POPCORNHUB_CHAT_MEMORY', str(memory))
+    monkeypatch.setenv('POPCORNHUB_CHAT_KB', str(tmp_path / 'missing.phkb'))
+    bot = chatbot.open_chatbot()
+    bot.update_memory('tester', 'greeting', {})
+    assert memory.exists()
+    # Without its prebuilt index the knowledge base is indexed in memory
+    assert bot.fallback_response_batch(['popcorn'])
+    with pytest.raises(FileNotFoundError):
+        chatbot.open_chatbot(model_path=str(tmp_path / 'missing.npz'))
+
+
+MESSAGES = ['Hello!', 'Suggest a comedy movie for Friday at 8pm', 'Bring popcorn and nachos', 'asdf qwerty']
+
+
+def analyze(bot, message):
+    intent, confidence = bot.predict_intent(message)
+    return {
+        'intent': intent if confidence >= CONFIDENCE_THRESHOLD else 'fallback',
+        'confidence': pytest.approx(confidence),
+        'entities': bot.extract_entities(message),
+    }
+
+
+def test_batch_analyzes_each_message_as_sent_alone(client, chat_memory):
+    with open(chat_memory, 'rb') as f:
+        memory = f.read()
+    response = client.post('/api/ai-chat/batch', json={'messages': MESSAGES})
+    assert response.status_code == 200
+    bot = chatbot.get_chatbot()
+    assert response.get_json() == [analyze(bot, message) for message in MESSAGES]
+    # Nothing is remembered
+    with open(chat_memory, 'rb') as f:
+        assert f.read() == memory
+
+
+def test_batch_controller_matches_the_flask_app(client):
+    from routes.default_controller import ai_chat_batch_post
+
+    flask = client.post('/api/ai-chat/batch', json={'messages': MESSAGES}).get_json()
+    assert [analysis.to_dict() for analysis in ai_chat_batch_post({'messages': MESSAGES})] == flask
+    assert ai_chat_batch_post({'messages': []})[1] == 400
+
+
+@pytest.mark.parametrize('body', [
+    {}, {'messages': []}, {'messages': 'hello'}, {'messages': ['hi', 3]}, ['hi'],
+    {'messages': ['hi'] * (app_connexion.MAX_CHAT_BATCH + 1)},
+])
+def test_batch_rejects_bad_bodies(client, body):
+    response = client.post('/api/ai-chat/batch', json=body)
+    assert response.status_code == 400
+    assert response.get_json()['error']
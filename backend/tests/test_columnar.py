@@ -0,0 +1,99 @@
+"""Columnar catalog files read back as the records they were written from."""
+
+import pytest
+
+from catalog import load_seed
+from catalog.columnar import ColumnarCatalog, ColumnarWriter, write_catalog
+from catalog.store import CatalogStore
+
+SPARSE = [
+    # Every field
+    {'id': 7, 'title': 'Héroes', 'description': 'Uno.', 'genre': ['Drama', 'drama'], 'rating': 7.5,
+     'votes': 10, 'releaseYear': 1999, 'duration': '101 min', 'director': 'Ana', 'cast': [{'name': 'B'}],
+     'poster': 'p.jpg', 'trailerUrl': 't', 'awards': ['Goya'], 'relatedMovies': [{'id': 9}, {'id': 8}]},
+    # String fields missing, null and empty; no duration, no numbers
+    {'id': 8, 'title': 'Sparse', 'genre': [], 'cast': [], 'rating': None, 'releaseYear': None,
+     'director': None, 'poster': ''},
+    # A duration not in "<n> min" form, an explicit null one, negative ids
+    {'id': -9, 'title': 'Short', 'genre': ['Animation'], 'cast': [], 'rating': 6.0, 'releaseYear': 2001,
+     'duration': '1h 30m', 'relatedMovies': [{'id': 7}]},
+    {'id': 2 ** 40, 'title': 'Unknown length', 'genre': [], 'cast': [], 'rating': 5.0, 'releaseYear': 0,
+     'duration': None},
+]
+
+
+def served(movie):
+    """A record as a JSON-backed store serves it (relatedMovies apart)."""
+    return {key: value for key, value in movie.items() if key != 'relatedMovies'}
+
+
+@pytest.fixture(params=['seed', 'sparse'])
+def movies(request):
+    return load_seed() if request.param == 'seed' else SPARSE
+
+
+def test_round_trip(movies, tmp_path):
+    path = str(tmp_path / 'catalog.phcat')
+    write_catalog(path, movies)
+    catalog = ColumnarCatalog(path)
+
+    assert len(catalog) == len(movies)
+    assert catalog.ids() == [movie['id'] for movie in movies]
+    for row, movie in enumerate(movies):
+        assert catalog.row_of(movie['id']) == row
+        assert catalog.record(row) == served(movie)
+        assert catalog.related_ids(row) == [related['id'] for related in movie.get('relatedMovies') or ()]
+        assert catalog.text(row) == ((movie.get('title') or '').lower(), (movie.get('description') or '').lower())
+    assert catalog.get(12345) is None and 12345 not in catalog
+    catalog.close()
+
+
+def test_missing_strings_are_not_empty(tmp_path):
+    path = str(tmp_path / 'catalog.phcat')
+    write_catalog(path, SPARSE)
+    sparse = ColumnarCatalog(path).get(8)
+    assert 'description' not in sparse and 'trailerUrl' not in sparse and 'duration' not in sparse
+    assert sparse['director'] is None and sparse['poster'] == ''
+    assert ColumnarCatalog(path).get(2 ** 40)['duration'] is None
+
+
+def test_written_in_chunks_matches_one_batch(tmp_path, monkeypatch):
+    movies = load_seed() + SPARSE
+    whole = str(tmp_path / 'whole.phcat')
+    write_catalog(whole, movies)
+    monkeypatch.setattr(ColumnarWriter, 'chunk_size', 2)
+    chunked = str(tmp_path / 'chunked.phcat')
+    with ColumnarWriter(chunked) as writer:
+        writer.extend(movies[:3])
+        writer.append(movies[3])
+        writer.extend(movies[4:])
+    with open(whole, 'rb') as a, open(chunked, 'rb') as b:
+        assert a.read() == b.read()
+
+
+def test_store_over_columnar_base_serves_like_json_store(tmp_path):
+    movies = load_seed() + SPARSE
+    path = str(tmp_path / 'catalog.phcat')
+    write_catalog(path, movies)
+    mapped = CatalogStore(base=ColumnarCatalog(path))
+    loaded = CatalogStore(movies)
+
+    for store in (mapped, loaded):
+        store.put(dict(SPARSE[1], title='Replaced'))
+        store.remove(-9)
+        store.put({'id': 99, 'title': 'New', 'genre': ['Drama']})
+
+    assert mapped.ids() == loaded.ids()
+    assert list(mapped) == list(loaded)
+    for movie_id in loaded.ids():
+        assert mapped.related_ids(movie_id) == loaded.related_ids(movie_id)
+        assert mapped.text(movie_id) == loaded.text(movie_id)
+    for genre in set(mapped.genres()) | set(loaded.genres()):
+        assert mapped.genre_ids(genre) == loaded.genre_ids(genre.upper())
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / 'catalog.phcat'
+    path.write_bytes(b'\0' * 64)
+    with pytest.raises(ValueError):
+        ColumnarCatalog(str(path))
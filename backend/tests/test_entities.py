@@ -0,0 +1,23 @@
+"""Single-pass entity extraction against the per-entity regexes it replaced."""
+
+import pytest
+
+from benchmarks.entity_extraction import grow, make_corpus, regex_extract
+from chatbot.entities import KEYWORDS, EntityExtractor
+
+
+@pytest.mark.parametrize('size', [None, 300])
+def test_extractor_agrees_with_the_regexes(size):
+    keywords = grow(KEYWORDS, size) if size else KEYWORDS
+    extractor = EntityExtractor(keywords)
+    for message, _ in make_corpus(3000, keywords, seed=size or 0):
+        assert extractor.extract(message) == regex_extract(message, keywords), message
+
+
+@pytest.mark.parametrize('message', [
+    '', 'nothing to see', 'Tonight at 8pm with FRIENDS', 'comedy or horror? horror!',
+    'next  week', 'next week', 'dramatic', 'me and my friends on 12/25/2024 at 10:30 PM',
+    'Popcorn, NACHOS and soda', 'café naïve 7am', '"tomorrow"', 'fridays', '123pm', '1/2/3/4',
+])
+def test_extractor_agrees_on_edge_cases(message):
+    assert EntityExtractor().extract(message) == regex_extract(message)
@@ -0,0 +1,19 @@
+"""Browse filters read from query parameters."""
+
+import pytest
+from werkzeug.datastructures import MultiDict
+
+from catalog.facets import parse_filters
+
+
+def test_parse_filters_converts_values():
+    args = MultiDict([('genres', 'drama'), ('genres', 'crime'), ('yearFrom', '1990'), ('minRating', '8.5'),
+                      ('director', 'Nolan'), ('maxRuntime', '')])
+    assert parse_filters(args) == {'genres': ['drama', 'crime'], 'year_from': 1990, 'min_rating': 8.5,
+                                   'director': 'Nolan'}
+
+
+@pytest.mark.parametrize('param, value', [('yearFrom', 'abc'), ('minRating', 'high'), ('maxRuntime', '2.5')])
+def test_parse_filters_names_bad_parameter(param, value):
+    with pytest.raises(ValueError, match=f"'{param}'"):
+        parse_filters(MultiDict([(param, value)]))
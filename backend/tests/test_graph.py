@@ -0,0 +1,66 @@
+"""The related-movies CSR graph and its overlay of pending changes."""
+
+import random
+
+from catalog import graph
+from catalog.graph import RelatedGraph
+from catalog.store import CatalogStore
+
+def check(related, expected, ids):
+    for movie_id in ids:
+        assert related.get(movie_id) == list(expected.get(movie_id, ()))
+
+def test_graph_matches_a_dict_through_changes_and_compactions():
+    rng = random.Random(0)
+    related = RelatedGraph()
+    expected = {}
+    ids = range(1, 301)
+    for step in range(2000):
+        movie_id = rng.choice(ids)
+        if rng.random() < 0.2:
+            related.discard(movie_id)
+            expected.pop(movie_id, None)
+        else:
+            # Order matters and repeats are kept
+            targets = [rng.choice(range(1, 2**40, 2**30)) for _ in range(rng.randint(0, 6))]
+            related.set(movie_id, targets)
+            expected[movie_id] = targets
+        if step % 97 == 0:
+            related.compact()
+            assert not related._changes
+        if step % 250 == 0:
+            check(related, expected, ids)
+    check(related, expected, ids)
+    related.compact()
+    check(related, expected, list(ids) + [0, 10**6])
+    assert related.nbytes > 0
+
+def test_maybe_compact_bounds_the_overlay(monkeypatch):
+    monkeypatch.setattr(graph, 'MIN_COMPACT', 8)
+    related = RelatedGraph()
+    for movie_id in range(100):
+        related.set(movie_id, [movie_id + 1])
+        related.maybe_compact()
+        assert len(related._changes) <= max(8, graph.COMPACT_FRACTION * (movie_id + 1))
+    assert [related.get(movie_id) for movie_id in range(100)] == [[movie_id + 1] for movie_id in range(100)]
+
+    related.discard(5)
+    related.set(6, [])
+    assert related.get(5) == [] and related.get(6) == []
+    related.compact()
+    assert related.get(5) == [] and related.get(6) == [] and related.get(7) == [8]
+
+def test_store_keeps_related_ids_through_updates():
+    store = CatalogStore([
+        {'id': 1, 'title': 'A', 'relatedMovies': [{'id': 2}, {'id': 3}]},
+        {'id': 2, 'title': 'B', 'relatedMovies': [{'id': 1}]},
+        {'id': 3, 'title': 'C'},
+    ])
+    assert store.related_ids(1) == [2, 3]
+    # Replacing a record without relatedMovies keeps its related ids
+    store.put({'id': 1, 'title': 'A II'})
+    assert store.related_ids(1) == [2, 3]
+    store.put({'id': 1, 'title': 'A', 'relatedMovies': [{'id': 3}]})
+    assert store.related_ids(1) == [3]
+    store.remove(2)
+    assert store.related_ids(2) == []
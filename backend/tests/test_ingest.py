@@ -0,0 +1,96 @@
+"""Bulk ingest: valid rows land in the catalog, bad rows are rejected."""
+
+import csv
+import json
+
+import pytest
+
+from catalog.columnar import ColumnarCatalog
+from catalog.ingest import ingest, validate_movie
+from catalog.store import CatalogStore
+
+GOOD = [
+    {'id': 1, 'title': 'Inception', 'genre': ['Sci-Fi'], 'rating': 8.8, 'releaseYear': 2010,
+     'duration': '148 min', 'relatedMovies': [{'id': 2}]},
+    {'id': 2, 'title': 'Interstellar', 'rating': 8.6},
+    {'id': 2 ** 63 - 1, 'title': 'Largest id', 'releaseYear': 2 ** 31 - 1},
+]
+
+# Row text -> the start of the error it is rejected with
+BAD = [
+    ('{"id": 10, "title": "Broken"', 'Expecting'),
+    ('{"title": "No id"}', 'movie.id: required'),
+    ('{"id": 11}', 'movie.title: required'),
+    ('{"id": 12, "title": "Typo", "ratting": 5}', 'movie.ratting: unknown field'),
+    ('{"id": "13", "title": "Text id"}', 'movie.id: expected an integer'),
+    ('{"id": 14, "title": "Cast", "cast": [{"name": 3}]}', 'movie.cast[0].name: expected a string'),
+    ('{"id": 15, "title": "Overrated", "rating": 11}', 'movie.rating: must be between 0 and 10'),
+    ('{"id": 16, "title": "Far future", "releaseYear": 99999999999}', 'movie.releaseYear: out of range'),
+    ('{"id": 17, "title": "Long", "duration": "99999999999 min"}', 'movie.duration: out of range'),
+    ('{"id": 9223372036854775808, "title": "Huge id"}', 'movie.id: out of range'),
+    ('{"id": 18, "title": "Anonymous", "relatedMovies": [{"title": "x"}]}', 'movie.relatedMovies[0].id: required'),
+    ('{"id": 1, "title": "Duplicate"}', 'movie.id: duplicate id 1'),
+]
+
+
+def write_jsonl(path, lines):
+    path.write_text(''.join(line + '\n' for line in lines))
+    return str(path)
+
+
+def read_rejects(path):
+    with open(path) as f:
+        return {reject['row']: reject['error'] for reject in map(json.loads, f)}
+
+
+@pytest.mark.parametrize('chunk_size', [1, 4, 100])
+def test_ingest_rejects_bad_rows_without_stopping(tmp_path, chunk_size):
+    lines = [json.dumps(movie) for movie in GOOD] + [line for line, _ in BAD]
+    source = write_jsonl(tmp_path / 'movies.jsonl', lines)
+    output = str(tmp_path / 'catalog.phcat')
+    rejects = str(tmp_path / 'rejects.jsonl')
+
+    stats = ingest(source, output, workers=2, chunk_size=chunk_size, rejects=rejects)
+
+    assert (stats['rows'], stats['accepted'], stats['rejected']) == (len(lines), len(GOOD), len(BAD))
+    errors = read_rejects(rejects)
+    assert sorted(errors) == list(range(len(GOOD) + 1, len(lines) + 1))
+    for number, (_, message) in enumerate(BAD, len(GOOD) + 1):
+        assert errors[number].startswith(message), errors[number]
+
+    catalog = ColumnarCatalog(output)
+    assert catalog.ids() == [movie['id'] for movie in GOOD]
+    assert catalog.get(2 ** 63 - 1)['releaseYear'] == 2 ** 31 - 1
+    assert catalog.related_ids(catalog.row_of(1)) == [2]
+
+
+def test_ingest_csv(tmp_path):
+    source = tmp_path / 'movies.csv'
+    with open(source, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['id', 'title', 'genre', 'rating', 'cast'])
+        writer.writerow(['1', 'Inception', 'Action|Sci-Fi', '8.8', '[{"name": "Leonardo DiCaprio"}]'])
+        writer.writerow(['2', 'Too many', '', '', '', 'extra'])
+        writer.writerow(['x', 'Bad id', '', '', ''])
+        writer.writerow(['3', 'Bad cast', '', '', 'not json'])
+        writer.writerow(['4', 'Plain', '', '', ''])
+    rejects = str(tmp_path / 'rejects.jsonl')
+
+    store = CatalogStore()
+    stats = ingest(str(source), store=store, workers=1, rejects=rejects)
+
+    assert (stats['accepted'], stats['rejected']) == (2, 3)
+    assert read_rejects(rejects) == {
+        2: "expected 5 columns, got 6",
+        3: "movie.id: cannot parse 'x'",
+        4: "movie.cast: cannot parse 'not json'",
+    }
+    assert store.get(1) == {'id': 1, 'title': 'Inception', 'genre': ['Action', 'Sci-Fi'], 'rating': 8.8,
+                            'cast': [{'name': 'Leonardo DiCaprio'}]}
+    assert store.ids() == [1, 4]
+
+
+def test_validate_movie_normalizes():
+    movie = validate_movie({'id': 1, 'title': 'Up', 'rating': 8, 'director': None})
+    assert movie == {'id': 1, 'title': 'Up', 'rating': 8.0}
+    assert type(movie['rating']) is float
@@ -0,0 +1,96 @@
+"""The NumPy intent runtime against the scikit-learn pipeline it exports."""
+
+import json
+import warnings
+
+import numpy as np
+import pytest
+
+from benchmarks.chat_latency import MESSAGES
+from chatbot.chatbot import INTENTS_PATH, MODEL_PATH
+from chatbot.intent_model import IntentModel, Tfidf, load_intent_model
+
+pytest.importorskip('sklearn')
+from sklearn.feature_extraction.text import TfidfVectorizer  # noqa: E402
+from sklearn.linear_model import LogisticRegression  # noqa: E402
+from sklearn.pipeline import Pipeline  # noqa: E402
+
+
+def training_data():
+    with open(INTENTS_PATH) as f:
+        intents = json.load(f)
+    patterns = [pattern for intent in intents for pattern in intent['patterns']]
+    labels = [intent['tag'] for intent in intents for _ in intent['patterns']]
+    return patterns, labels
+
+
+def messages():
+    patterns, _ = training_data()
+    return [message.lower() for message in patterns + MESSAGES + ['', 'zzz unknown words', 'hi hi hi HI']]
+
+
+def fit(classifier, patterns=None, labels=None):
+    if patterns is None:
+        patterns, labels = training_data()
+    return Pipeline([('tfidf', TfidfVectorizer()), ('clf', classifier)]).fit(patterns, labels)
+
+
+def test_exported_model_matches_the_shipped_pipeline():
+    with warnings.catch_warnings():
+        # A pipeline pickled by another scikit-learn version
+        warnings.simplefilter('ignore')
+        pipeline = load_intent_model(MODEL_PATH[:-len('.npz')] + '.pkl')
+    exported = load_intent_model(MODEL_PATH)
+    assert isinstance(exported, IntentModel)
+    assert exported.classes_.tolist() == pipeline.classes_.tolist()
+    found = messages()
+    np.testing.assert_array_equal(exported.predict_proba(found), pipeline.predict_proba(found))
+    for message in found[:20]:
+        np.testing.assert_array_equal(exported.predict_proba([message]), pipeline.predict_proba([message]))
+
+
+def test_softmax_model_is_bit_for_bit(tmp_path):
+    pipeline = fit(LogisticRegression(random_state=0, max_iter=500))
+    model = IntentModel.from_pipeline(pipeline)
+    assert not model.ovr
+    found = messages()
+    np.testing.assert_array_equal(model.predict_proba(found), pipeline.predict_proba(found))
+
+    path = str(tmp_path / 'intent.npz')
+    model.save(path)
+    np.testing.assert_array_equal(IntentModel.load(path).predict_proba(found), pipeline.predict_proba(found))
+
+
+@pytest.mark.filterwarnings('ignore:Using the .liblinear. solver:FutureWarning')
+@pytest.mark.parametrize('binary', [False, True])
+def test_one_vs_rest_models(binary):
+    patterns, labels = training_data()
+    if binary:
+        labels = ['greeting' if label == 'greeting' else 'other' for label in labels]
+    pipeline = fit(LogisticRegression(solver='liblinear'), patterns, labels)
+    model = IntentModel.from_pipeline(pipeline)
+    assert model.ovr
+    found = messages()
+    np.testing.assert_allclose(model.predict_proba(found), pipeline.predict_proba(found), rtol=1e-12, atol=1e-15)
+
+
+def test_tfidf_fit_matches_the_vectorizer():
+    patterns, _ = training_data()
+    vectorizer = TfidfVectorizer().fit(patterns)
+    tfidf = Tfidf.fit(patterns)
+    assert tfidf.terms == vectorizer.get_feature_names_out().tolist()
+    np.testing.assert_array_equal(tfidf.idf, vectorizer.idf_)
+    found = messages()
+    expected = vectorizer.transform(found).tocsr()
+    expected.sort_indices()
+    for got, want in zip(tfidf.transform(found), (expected.indptr, expected.indices, expected.data)):
+        np.testing.assert_array_equal(got, want)
+
+
+@pytest.mark.parametrize('settings', [{'ngram_range': (1, 2)}, {'sublinear_tf': True}, {'stop_words': 'english'},
+                                      {'vocabulary': ['hello', 'movie']}])
+def test_unsupported_vectorizers_are_refused(settings):
+    patterns, labels = training_data()
+    pipeline = Pipeline([('tfidf', TfidfVectorizer(**settings)), ('clf', LogisticRegression())]).fit(patterns, labels)
+    with pytest.raises(ValueError, match='Unsupported'):
+        IntentModel.from_pipeline(pipeline)
@@ -0,0 +1,55 @@
+"""The chatbot's knowledge base index and the sentences it was built from."""
+
+import pytest
+
+from chatbot.chatbot import INTENTS_PATH, MODEL_PATH, PopcornHubChatbot
+from chatbot.kb_index import KB_INDEX_PATH, KB_PATH, KBIndex, read_sentences, write_kb_index
+
+SENTENCES = [
+    "Watch parties sync playback for everyone in the room.",
+    "You can invite friends with a share link.",
+    "Snacks are not included with a subscription.",
+]
+
+
+def test_index_finds_the_most_similar_sentence(tmp_path):
+    path = str(tmp_path / 'kb.phkb')
+    write_kb_index(path, SENTENCES, version=3)
+    index = KBIndex.open(path)
+    assert index.version == 3 and len(index) == 3
+    assert [index.sentence(i) for i in range(3)] == SENTENCES
+    assert index.best('how do i invite my friends')[0] == 1
+    assert index.best('zzz') == (-1, 0.0)
+
+
+def test_index_knows_its_sentences():
+    index = KBIndex.build(SENTENCES)
+    assert index.built_from(list(SENTENCES))
+    assert not index.built_from(SENTENCES[:2])
+    assert not index.built_from(SENTENCES[:2] + ["Snacks are included."])
+
+
+def test_shipped_index_matches_the_knowledge_base():
+    assert KBIndex.open(KB_INDEX_PATH).built_from(read_sentences(KB_PATH))
+
+
+def make_bot(tmp_path, kb_path, kb_index_path):
+    return PopcornHubChatbot(model_path=MODEL_PATH, intents_path=INTENTS_PATH, kb_path=kb_path,
+                             memory_path=str(tmp_path / 'memory.json'), kb_index_path=kb_index_path)
+
+
+def test_chatbot_indexes_an_edited_knowledge_base(tmp_path):
+    kb_path = tmp_path / 'kb_sentences.txt'
+    kb_path.write_text('\n'.join(SENTENCES) + '\n')
+    kb_index_path = str(tmp_path / 'kb.phkb')
+    write_kb_index(kb_index_path, SENTENCES)
+
+    bot = make_bot(tmp_path, str(kb_path), kb_index_path)
+    assert bot.kb_index.built_from(SENTENCES)
+
+    edited = SENTENCES + ["Refunds are issued within five days."]
+    kb_path.write_text('\n'.join(edited) + '\n')
+    with pytest.warns(RuntimeWarning, match='older'):
+        bot = make_bot(tmp_path, str(kb_path), kb_index_path)
+    assert bot.kb_index.built_from(edited)
+    assert bot.kb_index.sentence(bot.kb_index.best('when are refunds issued')[0]) == edited[-1]
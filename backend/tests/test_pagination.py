@@ -0,0 +1,124 @@
+"""Keyset pagination of catalog listings."""
+
+import random
+
+import pytest
+
+import app_connexion
+from benchmarks.substring_search import make_catalog
+from catalog.cursor import decode_cursor, encode_cursor
+from catalog.facets import FacetIndex
+from catalog.store import CatalogStore
+
+
+def pages(index, limit, **filters):
+    """Follow the cursors of a listing; yields each page's ids."""
+    cursor = None
+    while True:
+        selection = index.select(limit=limit, cursor=cursor, **filters)
+        yield selection.ids
+        cursor = selection.next_cursor
+        if cursor is None:
+            return
+
+
+@pytest.mark.parametrize('limit', [1, 7, 50, 500])
+def test_cursor_pages_cover_the_listing_once(limit):
+    movies = make_catalog(120)
+    store = CatalogStore(movies)
+    index = FacetIndex(store)
+    listed = [movie_id for page in pages(index, limit) for movie_id in page]
+    assert listed == [movie['id'] for movie in movies]
+    expected = [movie['id'] for movie in movies if movie['rating'] >= 5]
+    assert [i for page in pages(index, limit, min_rating=5) for i in page] == expected
+
+
+def test_cursor_pages_do_not_shift_under_changes():
+    movies = make_catalog(100)
+    store = CatalogStore(movies)
+    index = FacetIndex(store)
+    rng = random.Random(0)
+
+    listed = []
+    removed = set()
+    selection = index.select(limit=10)
+    while True:
+        listed.extend(selection.ids)
+        # Between pages: new titles, re-rated ones and removals
+        for step in range(3):
+            store.put({'id': 1000 + len(listed) * 3 + step, 'title': 'New', 'rating': 9.0})
+        store.put(dict(rng.choice(list(store)), rating=1.0))
+        victim = rng.choice(movies)['id']
+        if store.remove(victim) is not None:
+            removed.add(victim)
+        if selection.next_cursor is None:
+            break
+        selection = index.select(limit=10, cursor=selection.next_cursor)
+
+    # The original titles in order, none twice; titles removed before their
+    # page was reached are gone, later additions are left out
+    assert len(listed) == len(set(listed))
+    original = [movie['id'] for movie in movies]
+    assert listed == [i for i in original if i in listed]
+    assert set(original) - set(listed) <= removed
+
+
+def test_offset_pages():
+    movies = make_catalog(30)
+    index = FacetIndex(CatalogStore(movies))
+    ids = [movie['id'] for movie in movies]
+    assert index.select(limit=10, offset=25).ids == ids[25:]
+    assert index.select(offset=28).ids == ids[28:]
+    assert index.select(limit=5, offset=40).ids == []
+    selection = index.select(limit=10, offset=5)
+    assert selection.ids == ids[5:15]
+    assert index.select(limit=10, cursor=selection.next_cursor).ids == ids[15:25]
+
+
+@pytest.mark.parametrize('options', [{'limit': 0}, {'limit': -1}, {'offset': -1}, {'cursor': 'not a cursor'}])
+def test_select_rejects_bad_pages(options):
+    index = FacetIndex(CatalogStore(make_catalog(5)))
+    with pytest.raises(ValueError):
+        index.select(**options)
+
+
+def test_cursor_round_trip():
+    token = encode_cursor(3, 17, 40)
+    assert decode_cursor(token, 3) == (17, 40)
+    assert decode_cursor(token, 9) == (17, 40)
+    with pytest.raises(ValueError, match='expired'):
+        # Issued by a newer catalog (e.g. before a restart)
+        decode_cursor(token, 2)
+    with pytest.raises(ValueError, match='expired'):
+        decode_cursor(encode_cursor(3, 41, 40), 3)
+    for bad in ['', 'abc', token + 'AAAA', '!!!!']:
+        with pytest.raises(ValueError):
+            decode_cursor(bad, 3)
+
+
+@pytest.fixture
+def client():
+    return app_connexion.app.test_client()
+
+
+@pytest.mark.parametrize('path', ['/api/movies', '/api/movies/browse'])
+def test_api_cursor(client, path):
+    first = client.get(f'{path}?limit=1')
+    body = first.get_json()
+    if path.endswith('browse'):
+        cursor, movies = body['next_cursor'], body['movies']
+    else:
+        cursor, movies = first.headers['X-Next-Cursor'], body
+    assert [movie['id'] for movie in movies] == [1]
+
+    second = client.get(f'{path}?limit=1&cursor={cursor}').get_json()
+    movies = second['movies'] if path.endswith('browse') else second
+    assert [movie['id'] for movie in movies] == [2]
+
+
+@pytest.mark.parametrize('path', ['/api/movies', '/api/movies/browse'])
+@pytest.mark.parametrize('query', ['limit=0', 'limit=-1', 'limit=abc', 'offset=-1', 'offset=x', 'cursor=bogus'])
+def test_api_rejects_bad_pages(client, path, query):
+    response = client.get(f'{path}?{query}')
+    assert response.status_code == 400
+    assert response.get_json()['error']
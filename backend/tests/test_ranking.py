@@ -0,0 +1,112 @@
+"""Rating leaderboards against sorts of the current catalog."""
+
+import math
+import random
+
+import pytest
+
+from benchmarks.substring_search import make_catalog
+from catalog import load_seed
+from catalog.ranking import MEAN_TOLERANCE, RatingIndex
+from catalog.store import CatalogStore, normalize
+
+GENRES = ['Drama', 'Comedy', 'Sci-Fi', 'Horror', 'Romance']
+
+
+def make_movies(size, seed=0):
+    rng = random.Random(seed)
+    movies = make_catalog(size, seed)
+    for movie in movies:
+        movie['votes'] = rng.choice([0, 10, 500, 5000, 200000])
+        movie['genre'] = rng.sample(GENRES, rng.randint(0, 3))
+        if rng.random() < 0.05:
+            movie['rating'] = None
+    return movies
+
+
+def rating_order(movies, genre=None):
+    movies = [movie for movie in movies if genre is None or genre in map(normalize, movie['genre'])]
+    return [movie['id'] for movie in sorted(
+        movies, key=lambda movie: (-movie['rating'] if movie['rating'] is not None else math.inf, movie['id']))]
+
+
+def weighted_order(movies, mean, min_votes, genre=None):
+    def key(movie):
+        if movie['rating'] is None:
+            return math.inf, movie['id']
+        votes = movie['votes']
+        return -(votes * movie['rating'] + min_votes * mean) / (votes + min_votes), movie['id']
+    movies = [movie for movie in movies if genre is None or genre in map(normalize, movie['genre'])]
+    return [movie['id'] for movie in sorted(movies, key=key)]
+
+
+def check(index, movies):
+    assert index.top() == rating_order(movies)
+    rated = [movie['rating'] for movie in movies if movie['rating'] is not None]
+    mean = sum(rated) / len(rated) if rated else 0.0
+    assert index.mean == pytest.approx(mean)
+    # The weighted keys use a mean at most MEAN_TOLERANCE old
+    assert abs(index._mean - mean) <= MEAN_TOLERANCE + 1e-9
+
+    assert index.top(weighted=True) == weighted_order(movies, index._mean, index.min_votes)
+    assert index.top(5, offset=3) == rating_order(movies)[3:8]
+    counts = {}
+    for movie in movies:
+        for genre in dict.fromkeys(map(normalize, movie['genre'])):
+            counts[genre] = counts.get(genre, 0) + 1
+    assert {name.lower(): count for name, count in index.genres()} == counts
+    for genre in counts:
+        assert index.top(genre=genre.upper()) == rating_order(movies, genre)
+        assert index.top(3, weighted=True, genre=genre) == weighted_order(
+            movies, index._mean, index.min_votes, genre)[:3]
+    assert index.top(genre='western') == []
+
+
+def test_seed_leaderboards():
+    movies = load_seed()
+    check(RatingIndex(CatalogStore(movies)), movies)
+
+
+def test_leaderboards_follow_updates_and_removals():
+    store = CatalogStore(make_movies(300))
+    index = RatingIndex(store, min_votes=100)
+    check(index, list(store))
+
+    rng = random.Random(1)
+    next_id = 1000
+    for step in range(400):
+        movie = rng.choice(list(store))
+        kind = rng.random()
+        if kind < 0.4:
+            store.put(dict(movie, rating=round(rng.uniform(1, 10), 1)))
+        elif kind < 0.5:
+            store.put(dict(movie, votes=rng.choice([0, 50, 100000])))
+        elif kind < 0.6:
+            store.put(dict(movie, genre=rng.sample(GENRES, rng.randint(0, 2))))
+        elif kind < 0.65:
+            store.put(dict(movie, rating=None))
+        elif kind < 0.7:
+            # Neither the rating, votes nor genres change
+            store.put(dict(movie, title=movie['title'] + ' II'))
+        elif kind < 0.85:
+            store.remove(movie['id'])
+        else:
+            next_id += 1
+            store.put(dict(movie, id=next_id, rating=round(rng.uniform(0, 10), 1)))
+        if step % 50 == 0:
+            check(index, list(store))
+    check(index, list(store))
+
+
+def test_mean_drift_reweights():
+    movies = make_movies(50)
+    for movie in movies:
+        movie['rating'] = 5.0
+    store = CatalogStore(movies)
+    index = RatingIndex(store, min_votes=1000)
+    index.top()
+    assert index._mean == 5.0
+    for movie in movies[:25]:
+        store.put(dict(movie, rating=9.0))
+    assert index._mean == pytest.approx(7.0)
+    check(index, list(store))
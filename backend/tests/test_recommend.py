@@ -0,0 +1,281 @@
+"""Recommendation engines against exact computations of the same data."""
+
+import json
+import math
+import pickle
+import random
+
+import numpy as np
+import pytest
+
+from benchmarks.vector_search import make_vectors
+from recommend import similarity, toplists
+from recommend.ann import IVFPQIndex
+from recommend.similarity import ItemSimilarity
+from recommend.toplists import TopLists, write_toplists
+
+
+@pytest.fixture(scope='module')
+def vectors():
+    return make_vectors(4000, 32, clusters=40)
+
+
+@pytest.fixture(scope='module')
+def index(vectors):
+    return IVFPQIndex.build(np.arange(1, len(vectors) + 1) * 3, vectors)
+
+
+def recall(index, queries, k=10, **options):
+    found = 0
+    for query in queries:
+        exact, _ = index.search_exact(query, k)
+        approximate, _ = index.search(query, k, **options)
+        found += len(set(exact.tolist()) & set(approximate.tolist()))
+    return found / (k * len(queries))
+
+
+def test_ivfpq_recall_against_exact_search(index, vectors):
+    rng = np.random.default_rng(1)
+    queries = vectors[rng.choice(len(vectors), 50, replace=False)] + 0.3 * rng.standard_normal((50, 32))
+    # About an eighth of the lists probed
+    assert recall(index, queries, nprobe=32) >= 0.9
+    # Every list probed: only the quantized estimate can miss
+    assert recall(index, queries, nprobe=len(index._centroids)) >= 0.99
+
+
+def test_ivfpq_search_ranks_exactly(index, vectors):
+    ids, similarity = index.search(vectors[0], 10)
+    assert ids[0] == 3
+    assert np.all(np.diff(similarity) <= 0)
+    np.testing.assert_allclose(similarity, [float(index.vector(i) @ vectors[0]) for i in ids], rtol=1e-5)
+
+
+def test_ivfpq_saved_index_answers_the_same(index, vectors, tmp_path):
+    path = str(tmp_path / 'vectors.phann')
+    index.save(path)
+    loaded = IVFPQIndex.load(path)
+    assert len(loaded) == len(index)
+    for query in vectors[:20]:
+        for built, mapped in zip(index.search(query, 10), loaded.search(query, 10)):
+            np.testing.assert_array_equal(built, mapped)
+    assert loaded.similar([3, 6], 5) == index.similar([3, 6], 5)
+    assert not {3, 6} & set(loaded.similar([3, 6], 5))
+
+
+
+def test_ivfpq_similar_leaves_the_given_titles_out(index, vectors):
+    taste = vectors[[0, 1]].mean(axis=0)
+    exact, _ = index.search_exact(taste, 12)
+    expected = [movie_id for movie_id in exact.tolist() if movie_id not in (3, 6)][:10]
+    found = index.similar([3, 6, 999999], 10, nprobe=len(index._centroids))
+    assert len(set(found) & set(expected)) >= 9
+    assert index.similar([999999]) == [] and index.similar([]) == []
+
+
+def test_embeddings_index_every_movie(tmp_path):
+    pytest.importorskip('sklearn')
+    from benchmarks.substring_search import make_catalog
+    from recommend.embeddings import embed, main
+
+    movies = make_catalog(300)
+    for movie in movies:
+        movie['genre'] = [['Drama', 'Comedy', 'Horror'][movie['id'] % 3]]
+    ids, vectors = embed(movies, dims=16)
+    assert ids.tolist() == [movie['id'] for movie in movies]
+    assert vectors.shape == (300, 16) and vectors.dtype == np.float32
+
+    source = tmp_path / 'movies.json'
+    source.write_text(json.dumps(movies))
+    output = str(tmp_path / 'vectors.phann')
+    assert main([str(source), output, '--dims', '16', '--lists', '8']) == 0
+    loaded = IVFPQIndex.load(output)
+    assert len(loaded) == 300 and loaded.dims == 16
+    assert movies[0]['id'] not in loaded.similar([movies[0]['id']], 5)
+
+def test_toplists_round_trip(tmp_path):
+    rng = random.Random(0)
+    lists = {f"user-{i}": rng.sample(range(1, 500), rng.randint(0, 20)) for i in range(300)}
+    lists['émilie'] = [7, 8]
+    path = str(tmp_path / 'toplists.phtop')
+    write_toplists(path, lists, version=42)
+
+    table = TopLists(path)
+    assert len(table) == len(lists) and table.version == 42
+    for user, ids in lists.items():
+        assert user in table
+        assert table.get(user) == ids
+    assert table.get('stranger') is None and 'stranger' not in table
+
+
+
+def test_toplists_keep_64_bit_ids(tmp_path):
+    path = str(tmp_path / 'toplists.phtop')
+    big = [2**31, 2**40 + 1, 2**63 - 1]
+    write_toplists(path, {'fan': big, 'other': [1]})
+    table = TopLists(path)
+    assert table.get('fan') == big and table.get('other') == [1]
+
+
+def test_toplists_resolve_hash_collisions(tmp_path, monkeypatch):
+    # Few distinct hashes: most users share a slot chain with others
+    monkeypatch.setattr(toplists, 'user_hash', lambda user: 1 + len(user) % 3)
+    lists = {'a' * n: [n] for n in range(1, 40)}
+    path = str(tmp_path / 'toplists.phtop')
+    write_toplists(path, lists)
+
+    table = TopLists(path)
+    for user, ids in lists.items():
+        assert table.get(user) == ids
+    assert table.get('b') is None and table.get('a' * 40) is None
+
+
+def test_toplists_recommend_skips_watchlist_and_tops_up(tmp_path):
+    path = str(tmp_path / 'toplists.phtop')
+    write_toplists(path, {'fan': [5, 4, 3]})
+    table = TopLists(path)
+    assert table.recommend('fan', [4], 3, fallback=[9, 5, 8]) == [5, 3, 9]
+    assert table.recommend('fan', [], 2, fallback=iter(())) == [5, 4]
+    assert table.recommend('stranger', [], 3, fallback=[1]) is None
+
+
+def make_watchlists(users=60, titles=40, seed=0):
+    rng = random.Random(seed)
+    return {f"user-{i}": rng.sample(range(1, titles + 1), rng.randint(1, 8)) for i in range(users)}
+
+
+def scores(engine, watchlist):
+    ids, totals = engine.scores(watchlist)
+    return dict(zip(ids.tolist(), np.round(totals, 9).tolist()))
+
+
+def test_similarity_follows_watchlist_events():
+    watchlists = make_watchlists()
+    # Room for every title, so no neighbor list is ever truncated
+    engine = ItemSimilarity(watchlists, neighbors=64)
+    engine.scores([1])
+
+    rng = random.Random(1)
+    for _ in range(300):
+        user = rng.choice(list(watchlists) + ['newcomer'])
+        watchlist = watchlists.setdefault(user, [])
+        movie_id = rng.randint(1, 45)
+        if movie_id in watchlist:
+            watchlist.remove(movie_id)
+            engine.removed(user, movie_id)
+        else:
+            watchlist.append(movie_id)
+            engine.added(user, movie_id)
+    engine.flush()
+
+    rebuilt = ItemSimilarity(neighbors=64).fit(watchlists)
+    for watchlist in list(watchlists.values())[:20] + [[44, 45], [1, 2, 3]]:
+        assert scores(engine, watchlist) == scores(rebuilt, watchlist)
+        assert engine.recommend(watchlist, 5) == rebuilt.recommend(watchlist, 5)
+
+
+
+def pair_counts(engine):
+    """The built co-occurrence counts, by pair of movie ids."""
+    low, high = engine._pair_keys >> 32, engine._pair_keys & 0xffffffff
+    items = engine._items
+    return {frozenset((int(items[a]), int(items[b]))): int(count)
+            for a, b, count in zip(low, high, engine._pair_counts)}
+
+
+def test_similarity_folds_changed_pairs_into_the_build(monkeypatch):
+    monkeypatch.setattr(similarity, 'MIN_COMPACT', 16)
+    watchlists = make_watchlists()
+    engine = ItemSimilarity(watchlists, neighbors=64)
+    engine.scores([1])
+
+    rng = random.Random(2)
+    largest = 0
+    for _ in range(500):
+        user = rng.choice(list(watchlists))
+        watchlist = watchlists[user]
+        movie_id = rng.randint(1, 45)
+        if movie_id in watchlist:
+            watchlist.remove(movie_id)
+            engine.apply(user, movie_id, False)
+        else:
+            watchlist.append(movie_id)
+            engine.apply(user, movie_id, True)
+        largest = max(largest, len(engine._pair_changes))
+    assert largest <= max(16, similarity.COMPACT_FRACTION * len(engine._pair_keys)) + 8
+
+    rebuilt = ItemSimilarity(neighbors=64).fit(watchlists)
+    engine._compact()
+    assert not engine._pair_changes
+    assert pair_counts(engine) == pair_counts(rebuilt)
+    for watchlist in list(watchlists.values())[:20]:
+        assert scores(engine, watchlist) == scores(rebuilt, watchlist)
+
+def test_similarity_ignores_changes_the_build_already_counts():
+    watchlists = {'a': [1, 2], 'b': [1, 2, 3]}
+    engine = ItemSimilarity(watchlists)
+    # Queued before the first build, which already sees both watchlists
+    engine.added('b', 3)
+    engine.flush()
+    assert scores(engine, [1]) == scores(ItemSimilarity().fit(watchlists), [1])
+    engine.removed('b', 3)
+    engine.flush()
+    assert 3 not in scores(engine, [1])
+
+
+def brute_scores(watchlists, watchlist, neighbors=None):
+    """Summed cosine similarities of each title to a watchlist, from the
+    co-occurrence counts, keeping each title's best `neighbors`."""
+    counts, together = {}, {}
+    for ids in watchlists.values():
+        ids = set(ids)
+        for a in ids:
+            counts[a] = counts.get(a, 0) + 1
+            for b in ids - {a}:
+                together[a, b] = together.get((a, b), 0) + 1
+    totals = {}
+    for watched in set(watchlist) & set(counts):
+        similar = sorted(((together[watched, other] / math.sqrt(counts[watched] * counts[other]), other)
+                          for other in counts if (watched, other) in together),
+                         key=lambda item: (-item[0], item[1]))[:neighbors]
+        for similarity, other in similar:
+            if other not in watchlist:
+                totals[other] = totals.get(other, 0.0) + similarity
+    return {movie_id: round(total, 9) for movie_id, total in totals.items()}
+
+
+@pytest.mark.parametrize('neighbors', [3, 64])
+def test_similarity_matches_cosine_scan(neighbors):
+    watchlists = make_watchlists(users=80, titles=30, seed=2)
+    engine = ItemSimilarity(watchlists, neighbors=neighbors)
+    rng = random.Random(3)
+    for watchlist in list(watchlists.values())[:20] + [rng.sample(range(1, 35), 4), [99]]:
+        assert scores(engine, watchlist) == brute_scores(watchlists, watchlist, neighbors)
+
+
+def test_similarity_recommend():
+    watchlists = {'a': [1, 2, 3], 'b': [1, 2], 'c': [1, 4], 'd': [5]}
+    engine = ItemSimilarity(watchlists)
+    # 2 is kept with 1 by two users, 3 and 4 by one each; 3 also beside 2
+    assert engine.recommend([1]) == [2, 3, 4]
+    assert engine.recommend([1], 2) == [2, 3]
+    assert engine.recommend([1, 2], 1) == [3]
+    assert engine.recommend([1], 5, fallback=[4, 1, 9, 8, 7]) == [2, 3, 4, 9, 8]
+    assert engine.recommend([], 2, fallback=[5, 6, 7]) == [5, 6]
+    assert engine.recommend([42], fallback=iter([42, 6])) == [6]
+
+
+
+def test_similarity_ties_at_the_limit_go_by_id():
+    # Every title is kept alongside 1 by one user: all score the same
+    watchlists = {f"user-{i}": [1, i] for i in range(200, 1, -1)}
+    engine = ItemSimilarity(watchlists, neighbors=200)
+    for limit in (1, 10, 150):
+        assert engine.recommend([1], limit) == list(range(2, limit + 2))
+    assert engine.recommend([1], 0) == []
+
+def test_similarity_copies_carry_the_table():
+    engine = ItemSimilarity(make_watchlists(), neighbors=8)
+    engine.scores([1])
+    copy = pickle.loads(pickle.dumps(engine))
+    for watchlist in [[1], [2, 3], [40, 7]]:
+        assert copy.recommend(watchlist, 5) == engine.recommend(watchlist, 5)
@@ -0,0 +1,60 @@
+"""GET /api/movies/recommendations: which rankings each caller costs."""
+
+import pytest
+
+import app_connexion
+from catalog import RATINGS
+from recommend.toplists import TopLists, write_toplists
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(app_connexion, 'WATCHLISTS', {})
+    monkeypatch.setattr(app_connexion, 'TOPLISTS', None)
+    return app_connexion.app.test_client()
+
+
+def fail(*args, **kwargs):
+    raise AssertionError("the catalog should not be scored")
+
+
+def test_empty_watchlist_is_served_by_rating(client, monkeypatch):
+    monkeypatch.setattr(app_connexion.SCORES, 'top', fail)
+    response = client.get('/api/movies/recommendations?limit=2', headers={'X-User-ID': 'new'})
+    assert [movie['id'] for movie in response.get_json()] == RATINGS.top(2)
+
+
+def test_full_toplist_is_served_without_scoring(client, monkeypatch, tmp_path):
+    path = str(tmp_path / 'toplists.phtop')
+    write_toplists(path, {'fan': [2, 1]})
+    monkeypatch.setattr(app_connexion, 'TOPLISTS', TopLists(path))
+    monkeypatch.setattr(app_connexion.SCORES, 'top', fail)
+    monkeypatch.setattr(app_connexion.RATINGS, 'top', fail)
+    app_connexion.WATCHLISTS['fan'] = [3]
+    response = client.get('/api/movies/recommendations?limit=2', headers={'X-User-ID': 'fan'})
+    assert [movie['id'] for movie in response.get_json()] == [2, 1]
+
+
+def test_short_toplist_is_topped_up_by_score(client, tmp_path):
+    path = str(tmp_path / 'toplists.phtop')
+    write_toplists(path, {'fan': [2]})
+    app_connexion.TOPLISTS = TopLists(path)
+    app_connexion.WATCHLISTS['fan'] = [2]
+    response = client.get('/api/movies/recommendations', headers={'X-User-ID': 'fan'})
+    assert [movie['id'] for movie in response.get_json()] == [1]
+
+
+def test_users_missing_from_the_toplists_are_scored_live(client, tmp_path):
+    path = str(tmp_path / 'toplists.phtop')
+    write_toplists(path, {'fan': [2]})
+    app_connexion.TOPLISTS = TopLists(path)
+    app_connexion.WATCHLISTS['stranger'] = [2]
+    response = client.get('/api/movies/recommendations', headers={'X-User-ID': 'stranger'})
+    assert [movie['id'] for movie in response.get_json()] == [1]
+
+
+@pytest.mark.parametrize('limit', ['abc', '0', '-1', '2.5'])
+def test_bad_limit_is_rejected(client, limit):
+    response = client.get(f'/api/movies/recommendations?limit={limit}')
+    assert response.status_code == 400
+    assert "'limit'" in response.get_json()['error']
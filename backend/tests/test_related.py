@@ -0,0 +1,61 @@
+"""Related movies: the neighbor table, and the curated lists behind it."""
+
+import json
+
+import numpy as np
+import pytest
+
+from catalog import load_seed
+from catalog.graph import related_ids
+from catalog.related import RelatedTable, main, related_movies, write_related
+from catalog.store import CatalogStore
+
+
+def served(store, movie_id, table=None):
+    return [related['id'] for related in related_movies(store, store.get(movie_id), table)]
+
+
+def test_seed_related_movies_hydrate_to_the_listed_titles():
+    movies = load_seed()
+    store = CatalogStore(load_seed())
+    for movie in movies:
+        assert movie['relatedMovies']
+        assert related_movies(store, store.get(movie['id'])) == movie['relatedMovies']
+
+
+def test_table_neighbors_win_over_curated_lists(tmp_path):
+    store = CatalogStore(load_seed() + [{'id': 3, 'title': 'Memento', 'rating': 8.4}])
+    path = str(tmp_path / 'related.phrel')
+    # Movie 1 gets 3 then 2; movie 2 has no neighbors; 3 has an unknown one
+    write_related(path, np.array([1, 2, 3, 9]), np.array([[2, 1], [-1, -1], [3, -1], [-1, -1]]),
+                  np.array([[0.5, 0.25], [0, 0], [0.1, 0], [0, 0]]))
+    table = RelatedTable(path)
+
+    assert served(store, 1, table) == [3, 2]
+    assert related_movies(store, store.get(1), table, limit=1) == [
+        {'id': 3, 'title': 'Memento', 'poster': None, 'rating': 8.4}]
+    # Nothing in the table for movie 2: its curated list
+    assert served(store, 2, table) == [1]
+    assert served(store, 3, table) == []
+
+
+def test_related_titles_are_hydrated_when_served():
+    store = CatalogStore(load_seed())
+    store.put(dict(store.get(2), rating=9.9, title='Shawshank'))
+    assert related_movies(store, store.get(1))[0]['rating'] == 9.9
+    store.remove(2)
+    assert served(store, 1) == []
+
+
+def test_build_reports_the_neighbors_written(tmp_path, capsys):
+    pytest.importorskip('sklearn')
+    movies = load_seed()
+    source = tmp_path / 'movies.json'
+    source.write_text(json.dumps(movies))
+    output = str(tmp_path / 'related.phrel')
+    assert main([str(source), output, '--neighbors', '10', '--workers', '1']) == 0
+    # The seed titles share no description words, people or genres
+    assert capsys.readouterr().out.startswith('Wrote 0 related movies for 2 titles (up to 10 each)')
+    table = RelatedTable(output)
+    assert [table.related(movie['id']) for movie in movies] == [[], []]
+    assert {movie['id']: related_ids(movie) for movie in movies} == {1: [2], 2: [1]}
@@ -0,0 +1,120 @@
+"""Vectorized catalog scoring against per-title arithmetic."""
+
+import math
+import random
+
+import numpy as np
+import pytest
+
+from catalog.scoring import POPULARITY_SCALE, YEAR_CEILING, YEAR_FLOOR, ScoreIndex
+from catalog.store import CatalogStore, normalize
+from tests.test_ranking import GENRES, make_movies
+
+
+def expected_scores(index, movies, weighted=False, taste=(), genres=None, **weights):
+    weights = dict(index.weights, **weights)
+    by_id = {movie['id']: movie for movie in movies}
+    watched = [by_id[i] for i in taste if i in by_id]
+    profile = {}
+    for movie in watched:
+        for genre in set(map(normalize, movie['genre'])):
+            profile[genre] = profile.get(genre, 0) + 1 / len(watched)
+    extra = {normalize(name): weight for name, weight in (genres or {}).items()}
+
+    scores = {}
+    for movie in movies:
+        if movie['id'] in taste:
+            continue
+        rating, votes, year = movie['rating'], movie.get('votes') or 0, movie.get('releaseYear')
+        if rating is None:
+            value = 0.0
+        elif weighted:
+            value = (votes * rating + index.min_votes * index._mean) / max(votes + index.min_votes, 1) / 10
+        else:
+            value = rating / 10
+        score = weights['rating'] * value
+        if year is not None:
+            score += weights['year'] * min(max(year - YEAR_FLOOR, 0) / (YEAR_CEILING - YEAR_FLOOR), 1)
+        score += weights['popularity'] * min(math.log10(1 + votes) / POPULARITY_SCALE, 1)
+        for genre in set(map(normalize, movie['genre'])):
+            score += weights['genre'] * profile.get(genre, 0) + extra.get(genre, 0)
+        scores[movie['id']] = score
+    return scores
+
+
+def check(index, movies, limit=10, **options):
+    expected = expected_scores(index, movies, **options)
+    taste = options.get('taste', ())
+    weights = {name: value for name, value in options.items() if name not in ('weighted', 'taste', 'genres')}
+    ids, scores = index.scores(options.get('weighted', False), index.taste(taste) if taste else None,
+                               options.get('genres'), exclude=taste, **weights)
+    found = {movie_id: score for movie_id, score in zip(ids.tolist(), scores.tolist()) if score > -np.inf}
+    assert found.keys() == expected.keys()
+    for movie_id, score in expected.items():
+        assert found[movie_id] == pytest.approx(score, abs=1e-5)
+
+    top = index.top(limit, **options)
+    assert top == sorted(found, key=lambda movie_id: (-found[movie_id], movie_id))[:limit]
+    # Agrees with the exact scores wherever float32 rounding cannot matter
+    for better, worse in zip(top, top[1:]):
+        assert expected[better] >= expected[worse] - 1e-5
+
+
+def test_scores_match_per_title_arithmetic():
+    movies = make_movies(400)
+    rng = random.Random(2)
+    for movie in movies:
+        movie['releaseYear'] = rng.choice([None, 1890, 1950, 1999, 2024, 2040])
+    index = ScoreIndex(CatalogStore(movies), min_votes=100)
+    watchlist = [movies[3]['id'], movies[7]['id'], 999999]
+
+    check(index, movies)
+    check(index, movies, limit=400, weighted=True)
+    check(index, movies, taste=watchlist)
+    check(index, movies, limit=25, weighted=True, taste=watchlist, genres={'HORROR': 2.0, 'western': 9.0})
+    check(index, movies, year=1.0, popularity=0.0, rating=0.5)
+
+
+def test_scores_follow_updates_and_removals():
+    store = CatalogStore(make_movies(200, seed=3))
+    index = ScoreIndex(store, min_votes=100)
+    index.top()
+
+    rng = random.Random(4)
+    next_id = 1000
+    for step in range(300):
+        movie = rng.choice(list(store))
+        kind = rng.random()
+        if kind < 0.4:
+            store.put(dict(movie, rating=rng.choice([None, 2.5, 7.0, 9.9]), votes=rng.choice([0, 40, 9000])))
+        elif kind < 0.55:
+            # New genres, some never seen before, widen the matrix
+            store.put(dict(movie, genre=rng.sample(GENRES + [f"Genre {step}"], 2)))
+        elif kind < 0.75:
+            store.remove(movie['id'])
+        else:
+            next_id += 1
+            store.put(dict(movie, id=next_id))
+        if step % 60 == 0:
+            check(index, list(store), taste=[movie['id']], genres={'drama': 0.3})
+    movies = list(store)
+    assert len(index) == len(movies)
+    check(index, movies, limit=len(movies))
+    check(index, movies, weighted=True, taste=[movies[0]['id'], movies[1]['id']])
+
+
+def test_top_limits():
+    index = ScoreIndex(CatalogStore(make_movies(30)))
+    everything = index.top()
+    assert len(everything) == 30
+    assert index.top(0) == []
+    assert index.top(5) == everything[:5]
+    assert index.top(100) == everything
+    assert not set(everything[:3]) & set(index.top(taste=everything[:3]))
+
+
+def test_ties_at_the_limit_go_by_id():
+    movies = [{'id': movie_id, 'title': str(movie_id), 'rating': 7.0, 'genre': []} for movie_id in range(50, 0, -1)]
+    index = ScoreIndex(CatalogStore(movies), weights={'popularity': 0.0})
+    for limit in (1, 7, 49):
+        assert index.top(limit) == list(range(1, limit + 1))
@@ -0,0 +1,235 @@
+"""Catalog text indexes against brute-force scans of the same records."""
+
+import math
+import random
+
+import pytest
+
+from benchmarks.substring_search import make_catalog, pick
+from catalog import load_seed
+from catalog.autocomplete import AutocompleteIndex, normalize_title, title_keys
+from catalog.search import (B, FIELD_BOOSTS, FUZZY_WEIGHT, K1, MAX_FUZZY_TERMS, MAX_PREFIX_TERMS,
+                            MIN_PREFIX_LENGTH, SearchIndex, movie_fields, tokenize)
+from catalog.spelling import SpellingIndex, edit_distance, max_distance
+from catalog.store import CatalogStore, normalize
+from catalog.trigram import TrigramIndex
+
+CATALOGS = {
+    'seed': load_seed,
+    'synthetic': lambda: make_catalog(400),
+}
+
+
+@pytest.fixture(params=sorted(CATALOGS))
+def movies(request):
+    return CATALOGS[request.param]()
+
+
+def queries(movies, count=60, seed=1):
+    """Words and fragments of the records, some misspelled, and a few
+    words no record has."""
+    rng = random.Random(seed)
+    words = sorted({word for movie in movies for tokens in movie_fields(movie).values() for word in tokens})
+    found = []
+    for _ in range(count):
+        word = rng.choice(words)
+        kind = rng.random()
+        if kind < 0.3:
+            found.append(' '.join(rng.sample(words, rng.randint(2, 4))))
+        elif kind < 0.6 and len(word) > 3:
+            # One or two edits
+            i = rng.randrange(len(word))
+            found.append(word[:i] + rng.choice('aeiouxz') + word[i + 1:])
+        elif kind < 0.9:
+            found.append(word[:rng.randint(1, len(word))])
+        else:
+            found.append(pick(rng, 1)[0] + 'qq')
+    return found
+
+
+def rounded(ranked):
+    """Scores to 9 digits, so sums taken in another order still tie."""
+    return sorted(((movie_id, round(score, 9)) for movie_id, score in ranked),
+                  key=lambda item: (-item[1], item[0]))
+
+
+def brute_suggest(movies, word, limit=3):
+    counts = {}
+    for movie in movies:
+        for term in set(tokenize(movie.get('title'))):
+            counts[term] = counts.get(term, 0) + 1
+    word = word.lower()
+    if word in counts:
+        return [(word, 0)]
+    distance = max_distance(word)
+    if not distance:
+        return []
+    found = sorted((edit_distance(word, term, distance), -count, term) for term, count in counts.items())
+    return [(term, d) for d, _, term in found if d <= distance][:limit]
+
+
+def brute_search(movies, query, limit=None, spelling=True):
+    """BM25 over every record, with the index's prefix and spelling
+    expansion."""
+    fields = {movie['id']: movie_fields(movie) for movie in movies}
+    df = {}
+    for tokens in fields.values():
+        for term in set(token for field in tokens.values() for token in field):
+            df[term] = df.get(term, 0) + 1
+    weights = {}
+    fuzzy = 0
+    terms = list(dict.fromkeys(tokenize(query)))
+    if terms and terms[-1] not in df and len(terms[-1]) >= MIN_PREFIX_LENGTH:
+        completions = sorted((-count, term) for term, count in df.items() if term.startswith(terms[-1]))
+        if completions:
+            weights.update((term, 1.0) for _, term in completions[:MAX_PREFIX_TERMS])
+            terms.pop()
+    for term in terms:
+        if term in df or not spelling or fuzzy >= MAX_FUZZY_TERMS:
+            weights[term] = 1.0
+            continue
+        fuzzy += 1
+        for correction, distance in brute_suggest(movies, term):
+            weights[correction] = max(weights.get(correction, 0.0), FUZZY_WEIGHT ** distance)
+
+    docs = len(fields)
+    average = {field: sum(len(f[field]) for f in fields.values()) / docs for field in FIELD_BOOSTS}
+    scores = {}
+    for movie_id, tokens in fields.items():
+        score = 0.0
+        for term, weight in weights.items():
+            if term not in df:
+                continue
+            idf = weight * math.log((docs - df[term] + 0.5) / (df[term] + 0.5) + 1.0)
+            for field, boost in FIELD_BOOSTS.items():
+                tf = tokens[field].count(term)
+                if tf:
+                    norm = K1 * (1 - B + B * len(tokens[field]) / average[field])
+                    score += boost * idf * (K1 + 1) * tf / (tf + norm)
+        if score:
+            scores[movie_id] = score
+    ranked = rounded(scores.items())
+    return ranked[:limit] if limit else ranked
+
+
+def test_spelling_matches_scan(movies):
+    index = SpellingIndex(CatalogStore(movies))
+    for query in queries(movies):
+        for word in tokenize(query):
+            assert index.suggest(word) == brute_suggest(movies, word), word
+
+
+@pytest.mark.parametrize('limit', [None, 1, 3, 10])
+def test_search_matches_bm25_scan(movies, limit):
+    store = CatalogStore(movies)
+    index = SearchIndex(store, spelling=SpellingIndex(store))
+    for query in queries(movies):
+        assert rounded(index.search(query, limit)) == brute_search(movies, query, limit), query
+
+
+def test_search_follows_updates(movies):
+    store = CatalogStore(movies)
+    index = SearchIndex(store)
+    index.search('warm up')
+    rng = random.Random(2)
+    for movie in rng.sample(movies, min(len(movies), 20)):
+        store.remove(movie['id'])
+    renamed = dict(movies[0], title=movies[0]['title'] + ' Returns')
+    store.put(renamed)
+    current = list(store)
+    for query in queries(movies, count=30) + ['returns']:
+        assert rounded(index.search(query, 5)) == brute_search(current, query, 5, spelling=False), query
+
+
+@pytest.mark.parametrize('query', ['incep', 'INCEPT', 'dream-shar', 'christopher nol'])
+def test_search_completes_last_word(query):
+    index = SearchIndex(CatalogStore(load_seed()))
+    assert [movie_id for movie_id, _ in index.search(query)] == [1]
+    # Only the last word is read as a prefix
+    assert index.search('incep thief') == index.search('thief')
+
+
+@pytest.mark.parametrize('limit', [0, -1])
+def test_search_limit_below_one_returns_best(movies, limit):
+    index = SearchIndex(CatalogStore(movies))
+    query = movies[0]['title']
+    assert index.search(query, limit) == index.search(query, 1)
+
+
+def test_trigrams_match_scan(movies):
+    store = CatalogStore(movies)
+    index = TrigramIndex(store)
+    words = [movie['title'].split()[-1].lower() for movie in movies[:5]]
+    padded = ['\x00', '\x00\x00'] + [word[-n:] + '\x00' * m for word in words for n in (1, 2) for m in (1, 2)]
+    for query in queries(movies) + ['', 'e', 'in', ' the '] + padded:
+        expected = [movie['id'] for movie in movies
+                    if normalize(query) in normalize(movie.get('title'))
+                    or normalize(query) in normalize(movie.get('description'))]
+        assert index.match_ids(query) == expected, query
+        assert index.matches(query) == store.matches(query), query
+
+
+@pytest.mark.parametrize('limit', [None, 1, 5])
+def test_autocomplete_matches_scan(movies, limit):
+    index = AutocompleteIndex(CatalogStore(movies), threshold=8)
+    for query in queries(movies):
+        prefix = normalize_title(query)
+        if not prefix:
+            continue
+        matching = [movie for movie in movies if any(key.startswith(prefix) for key in title_keys(movie['title']))]
+        matching.sort(key=lambda movie: (-movie['rating'], movie['id']))
+        expected = [(movie['id'], movie['title'], movie.get('releaseYear'))
+                    for movie in matching][:min(limit or index.k, index.k)]
+        assert index.complete(query, limit) == expected, query
+
+
+def autocomplete_scan(movies, query, k):
+    prefix = normalize_title(query)
+    matching = [movie for movie in movies if any(key.startswith(prefix) for key in title_keys(movie['title']))]
+    matching.sort(key=lambda movie: (-movie['rating'], movie['id']))
+    return [(movie['id'], movie['title'], movie.get('releaseYear')) for movie in matching][:k]
+
+
+def test_autocomplete_follows_updates():
+    movies = make_catalog(400)
+    store = CatalogStore(movies)
+    index = AutocompleteIndex(store, threshold=8)
+    rng = random.Random(3)
+    prefixes = sorted({normalize_title(movie['title'])[:n] for movie in rng.sample(movies, 60) for n in (1, 2, 4)})
+    index.complete('warm up')
+
+    for step in range(600):
+        movie = rng.choice(list(store))
+        kind = rng.random()
+        if kind < 0.7:
+            store.put(dict(movie, rating=round(rng.uniform(1, 10), 1)))
+        elif kind < 0.8:
+            store.put(dict(movie, title=pick(rng, 1)[0].title()))
+        elif kind < 0.9:
+            store.remove(movie['id'])
+        else:
+            store.put(dict(movie, id=1000 + step))
+        if step % 100 == 0:
+            for prefix in prefixes:
+                assert index.complete(prefix) == autocomplete_scan(list(store), prefix, index.k), prefix
+    for prefix in prefixes:
+        assert index.complete(prefix) == autocomplete_scan(list(store), prefix, index.k), prefix
+
+
+def test_autocomplete_rerating_does_not_rank_whole_ranges(monkeypatch):
+    movies = make_catalog(20000)
+    store = CatalogStore(movies)
+    index = AutocompleteIndex(store)
+    best = max(movies, key=lambda movie: (movie['rating'], -movie['id']))
+    prefix = normalize_title(best['title'])[0]
+    assert index.complete(prefix)[0][0] == best['id']
+    matching = len(autocomplete_scan(movies, prefix, None))
+
+    ranked = []
+    best_of = index._best
+    monkeypatch.setattr(index, '_best', lambda movie_ids: ranked.append(len(movie_ids)) or best_of(movie_ids))
+    store.put(dict(best, rating=0.0))
+    expected = autocomplete_scan(list(store), prefix, index.k)
+    assert index.complete(prefix) == expected
+    # Recomputed from child lists along one path, not from the range
+    assert sum(ranked) < matching / 3